@@ -0,0 +1,365 @@
+"""
+爬虫性能基准测试
+在本地启动模拟 Firecrawl 服务（可配置延迟分布、错误率与正文大小），
+用 scrape_asyncio.main_async 完整跑一轮并报告吞吐、延迟分位数、CPU 与峰值内存
+
+用法:
+    python benchmark.py --urls 2000 --latency lognormal:0.3,0.8 --error-rate 0.02
+    MAX_CONCURRENT=50 SCRAPE_ENGINE=batch python benchmark.py --output after.json --compare before.json
+
+爬虫自身的配置（MAX_CONCURRENT、HOST_*、HEDGE 等）照常通过环境变量传入；
+基准测试只覆盖服务地址、文章列表、输出目录，并关闭响应缓存。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = Path(__file__).parent
+
+
+def parse_latency(spec: str):
+    """
+    解析延迟分布，返回无参采样函数（秒）
+
+    - fixed:0.2
+    - uniform:0.05,0.5
+    - lognormal:0.3,0.8  （中位数, sigma）
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(v) for v in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"延迟分布参数必须是数字: {spec}")
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"未知的延迟分布: {spec}（可选 fixed:s / uniform:a,b / lognormal:median,sigma）")
+
+
+class MockFirecrawl:
+    """
+    模拟 Firecrawl v2 的 /scrape 与 /batch/scrape 接口
+
+    每个 URL 的处理延迟从配置的分布中采样，按 error_rate 返回错误状态码，
+    成功时返回 payload_kb 大小的 Markdown 正文。
+    """
+
+    def __init__(self, latency: str, error_rate: float, error_status: List[int], payload_kb: float, seed: int):
+        random.seed(seed)
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+        self.body = (filler * (int(payload_kb * 1024) // len(filler) + 1))[:int(payload_kb * 1024)]
+        self.requests = 0
+        self.errors = 0
+        self.jobs: Dict[str, List[dict]] = {}
+
+    def _document(self, url: str) -> dict:
+        return {"markdown": f"# {url}\n\n{self.body}", "metadata": {"sourceURL": url, "statusCode": 200}}
+
+    def _fails(self) -> bool:
+        return random.random() < self.error_rate
+
+    async def scrape(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self.sample_latency())
+        if self._fails():
+            self.errors += 1
+            status = random.choice(self.error_status)
+            return web.json_response({"success": False, "error": f"mock error {status}"}, status=status)
+        return web.json_response({"success": True, "data": self._document(body["url"])})
+
+    async def start_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        job_id = uuid.uuid4().hex
+        now = time.monotonic()
+        self.jobs[job_id] = [
+            {"url": url, "ready": now + self.sample_latency(), "ok": not self._fails()}
+            for url in body["urls"]
+        ]
+        return web.json_response({"success": True, "id": job_id, "url": f"/v2/batch/scrape/{job_id}"})
+
+    async def batch_status(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        items = self.jobs.get(request.match_info["job_id"])
+        if items is None:
+            return web.json_response({"success": False, "error": "job not found"}, status=404)
+        now = time.monotonic()
+        finished = [item for item in items if item["ready"] <= now]
+        return web.json_response({
+            "success": True,
+            "status": "completed" if len(finished) == len(items) else "scraping",
+            "completed": len(finished),
+            "total": len(items),
+            "data": [self._document(item["url"]) for item in finished if item["ok"]],
+        })
+
+    async def batch_errors(self, request: web.Request) -> web.Response:
+        items = self.jobs.get(request.match_info["job_id"], [])
+        failed = [item for item in items if not item["ok"] and item["ready"] <= time.monotonic()]
+        self.errors += len(failed)
+        return web.json_response({
+            "success": True,
+            "errors": [{"url": item["url"], "error": "mock error"} for item in failed],
+            "robotsBlocked": [],
+        })
+
+    async def cancel_batch(self, request: web.Request) -> web.Response:
+        self.jobs.pop(request.match_info["job_id"], None)
+        return web.json_response({"success": True, "status": "cancelled"})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"requests": self.requests, "errors": self.errors})
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.add_routes([
+            web.post("/v2/scrape", self.scrape),
+            web.post("/v2/batch/scrape", self.start_batch),
+            web.get("/v2/batch/scrape/{job_id}", self.batch_status),
+            web.get("/v2/batch/scrape/{job_id}/errors", self.batch_errors),
+            web.delete("/v2/batch/scrape/{job_id}", self.cancel_batch),
+            web.get("/stats", self.stats),
+        ])
+        return app
+
+
+def _serve(options: dict, ready) -> None:
+    """子进程入口：运行模拟服务并通过管道返回端口（服务端开销不计入爬虫的 CPU 与内存）"""
+    async def run():
+        mock = MockFirecrawl(**options)
+        runner = web.AppRunner(mock.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        ready.send(runner.addresses[0][1])
+        ready.close()
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def _percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    rank = min(int(len(samples) * pct / 100), len(samples) - 1)
+    return samples[rank]
+
+
+def _cpu_seconds() -> float:
+    """本进程与已结束子进程（分片 worker）的 CPU 时间之和"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """本进程与已结束子进程中最大的常驻内存峰值"""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _fetch_stats(port: int) -> dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /stats HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n")
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.partition(b"\r\n\r\n")[2])
+
+
+def run_benchmark(args: argparse.Namespace, port: int, work_dir: Path) -> dict:
+    """在本进程内执行一轮爬取并收集指标"""
+    articles_file = work_dir / "articles.jsonl"
+    with open(articles_file, "w", encoding="utf-8") as f:
+        for i in range(args.urls):
+            f.write(json.dumps({"title": f"Bench {i}", "url": f"https://site{i % args.hosts}.bench.test/a/{i}"}) + "\n")
+
+    # scrape_asyncio 在导入时读取配置，因此先设置环境变量再导入
+    os.environ.update({
+        "FIRECRAWL_URL": f"http://127.0.0.1:{port}",
+        "FIRECRAWL_API_KEY": os.environ.get("FIRECRAWL_API_KEY") or "bench",
+        "ARTICLES_FILE": str(articles_file),
+        "OUTPUT_DIR": str(work_dir / "output"),
+        "STATE_DB": str(work_dir / "state.db"),
+        "CACHE_MODE": "off",
+        "GUI_MODE": "false",
+    })
+    os.environ.pop("GUI_IPC_FD", None)
+    (work_dir / "output").mkdir()
+    sys.path.insert(0, str(BASE_DIR))
+    import scrape_asyncio
+
+    # 通过事件 sink 收集每个 URL 的端到端耗时（含重试）
+    latencies: List[float] = []
+    summary: dict = {}
+
+    def collect(events: List[dict]) -> None:
+        for event in events:
+            if event.get("type") == "task" and event["data"]["status"] in ("success", "failed"):
+                latencies.append(event["data"]["elapsed"])
+            elif event.get("type") == "complete":
+                summary.update(event["data"])
+
+    scrape_asyncio._gui_events.sink = collect
+
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with output:
+        asyncio.run(scrape_asyncio.main_async())
+    wall = time.perf_counter() - wall_start
+    cpu = _cpu_seconds() - cpu_start
+
+    upstream = asyncio.run(_fetch_stats(port))
+    latencies.sort()
+    processed = summary.get("success", 0) + summary.get("failed", 0)
+    return {
+        "revision": _git_revision(),
+        "timestamp": int(time.time()),
+        "config": {
+            "urls": args.urls, "hosts": args.hosts, "latency": args.latency, "error_rate": args.error_rate,
+            "payload_kb": args.payload_kb,
+            "engine": scrape_asyncio.SCRAPE_ENGINE, "max_concurrent": scrape_asyncio.MAX_CONCURRENT,
+            "adaptive": scrape_asyncio.ADAPTIVE_CONCURRENCY, "shards": scrape_asyncio.SHARDS,
+        },
+        "success": summary.get("success", 0),
+        "failed": summary.get("failed", 0),
+        "upstream_requests": upstream["requests"],
+        "upstream_errors": upstream["errors"],
+        "wall_seconds": wall,
+        "urls_per_second": processed / wall if wall > 0 else 0.0,
+        "latency": {f"p{p}": _percentile(latencies, p) for p in (50, 90, 95, 99)} | {"max": latencies[-1] if latencies else None},
+        "cpu_seconds": cpu,
+        "cpu_percent": cpu / wall * 100 if wall > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _format(value: Optional[float], unit: str = "", digits: int = 2) -> str:
+    return "-" if value is None else f"{value:.{digits}f}{unit}"
+
+
+def print_report(result: dict, baseline: Optional[dict] = None) -> None:
+    """输出基准结果；给出基线时附带变化百分比"""
+    def delta(key: str, sub: Optional[str] = None) -> str:
+        if baseline is None:
+            return ""
+        old = baseline.get(key) if sub is None else (baseline.get(key) or {}).get(sub)
+        new = result.get(key) if sub is None else result[key].get(sub)
+        if not old or new is None:
+            return ""
+        return f"  ({(new - old) / old * 100:+.1f}% vs {baseline.get('revision') or '基线'})"
+
+    config = result["config"]
+    print(f"\n{'='*60}")
+    print(f"📊 基准测试结果 ({result['revision'] or '未知版本'})")
+    print(f"{'='*60}")
+    print(f"URL 数: {config['urls']}（{config['hosts']} 个主机） 延迟: {config['latency']} 错误率: {config['error_rate']}")
+    adaptive = "（自适应）" if config["adaptive"] else ""
+    shards = f"  分片: {config['shards']}" if config["shards"] else ""
+    print(f"引擎: {config['engine']}  并发: {config['max_concurrent']}{adaptive}{shards}")
+    print(f"成功 / 失败: {result['success']} / {result['failed']}  上游请求: {result['upstream_requests']}（错误 {result['upstream_errors']}）")
+    print(f"总用时: {_format(result['wall_seconds'], 's')}")
+    print(f"吞吐: {_format(result['urls_per_second'], ' URL/s')}{delta('urls_per_second')}")
+    for name in ("p50", "p90", "p95", "p99", "max"):
+        print(f"延迟 {name}: {_format(result['latency'][name], 's', 3)}{delta('latency', name)}")
+    print(f"CPU: {_format(result['cpu_seconds'], 's')}（{_format(result['cpu_percent'], '%', 1)}）{delta('cpu_seconds')}")
+    print(f"峰值内存: {_format(result['peak_rss_mb'], ' MB', 1)}{delta('peak_rss_mb')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用本地模拟 Firecrawl 服务测试爬虫性能")
+    parser.add_argument("--urls", type=int, default=2000, help="文章数量（默认 2000）")
+    parser.add_argument("--hosts", type=int, default=50, help="URL 分布的主机数（默认 50）")
+    parser.add_argument("--latency", default="lognormal:0.2,0.5",
+                        help="服务端延迟分布 fixed:s / uniform:a,b / lognormal:median,sigma（默认 lognormal:0.2,0.5）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回错误的比例（默认 0）")
+    parser.add_argument("--error-status", default="503", help="错误状态码，逗号分隔时随机选取（默认 503）")
+    parser.add_argument("--payload-kb", type=float, default=20, help="每篇正文大小 KB（默认 20）")
+    parser.add_argument("--seed", type=int, default=1, help="模拟服务的随机种子")
+    parser.add_argument("--output", help="把结果写入 JSON 文件，便于跨版本比较")
+    parser.add_argument("--compare", help="与之前 --output 保存的结果比较")
+    parser.add_argument("--verbose", action="store_true", help="显示爬虫自身的输出")
+    args = parser.parse_args()
+
+    try:
+        parse_latency(args.latency)
+        error_status = [int(code) for code in args.error_status.split(",")]
+    except ValueError as e:
+        parser.error(str(e))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    options = {
+        "latency": args.latency, "error_rate": args.error_rate, "error_status": error_status,
+        "payload_kb": args.payload_kb, "seed": args.seed,
+    }
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    server = multiprocessing.Process(target=_serve, args=(options, sender), daemon=True)
+    server.start()
+    try:
+        if not receiver.poll(30):
+            sys.exit("❌ 模拟服务启动失败")
+        port = receiver.recv()
+        with tempfile.TemporaryDirectory(prefix="scrape-bench-") as work_dir:
+            result = run_benchmark(args, port, Path(work_dir))
+    finally:
+        server.terminate()
+        server.join()
+
+    print_report(result, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
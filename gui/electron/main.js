@@ -18,6 +18,10 @@ const projectRoot = join(__dirname, '../..')
 // 配置文件路径 - 使用用户数据目录存储配置
 const getConfigPath = () => join(app.getPath('userData'), 'scraper-config.json')
 
+// 事件专用管道（fd 3，长度前缀帧）；Windows 不支持额外 fd，仍使用 stdout JSON Lines
+const useIpcChannel = process.platform !== 'win32' && process.env.SCRAPER_IPC !== 'off'
+const IPC_FD = 3
+
 function createWindow() {
   mainWindow = new BrowserWindow({
     width: 1200,
@@ -56,6 +60,44 @@ function createWindow() {
   }
 }
 
+// ============ 爬虫事件解析 ============
+
+// 将 Python 输出的事件转发给渲染进程
+function dispatchScraperEvent(data) {
+  if (data.type === 'progress') {
+    mainWindow?.webContents.send('scraper:progress', data)
+  } else if (data.type === 'task') {
+    mainWindow?.webContents.send('scraper:task-update', data)
+  } else if (data.type === 'complete') {
+    mainWindow?.webContents.send('scraper:complete', data)
+    pythonProcess = null
+  } else if (data.type === 'error') {
+    mainWindow?.webContents.send('scraper:error', { message: data.message })
+  }
+}
+
+// 解析长度前缀帧：4 字节大端长度 + UTF-8 JSON 数组（一帧为一批事件）
+function createFrameDecoder(onEvents) {
+  let buffer = Buffer.alloc(0)
+
+  return (chunk) => {
+    buffer = buffer.length ? Buffer.concat([buffer, chunk]) : chunk
+    let offset = 0
+    while (buffer.length - offset >= 4) {
+      const length = buffer.readUInt32BE(offset)
+      if (buffer.length - offset - 4 < length) break
+      const payload = buffer.toString('utf8', offset + 4, offset + 4 + length)
+      offset += 4 + length
+      try {
+        onEvents(JSON.parse(payload))
+      } catch (err) {
+        console.error('[Python IPC] Invalid frame:', err)
+      }
+    }
+    buffer = buffer.subarray(offset)
+  }
+}
+
 // ============ 爬虫控制 IPC Handlers ============
 
 // 读取保存的配置（内部辅助函数）
@@ -112,26 +154,29 @@ ipcMain.handle('scraper:start', async (event, config = {}) => {
       envVars.FIRECRAWL_API_KEY = firecrawlApiKey
     }
 
+    // 事件走专用管道时，stdout 只剩普通日志（以及管道不可用时回退的 JSON Lines）
+    if (useIpcChannel) {
+      envVars.GUI_IPC_FD = String(IPC_FD)
+    }
+
     pythonProcess = spawn('uv', ['run', 'python', scriptPath], {
       cwd: projectRoot,
       detached: true,  // 创建进程组，便于停止
-      env: envVars
+      env: envVars,
+      stdio: useIpcChannel ? ['pipe', 'pipe', 'pipe', 'pipe'] : 'pipe'
     })
 
+    if (useIpcChannel) {
+      const decode = createFrameDecoder((events) => events.forEach(dispatchScraperEvent))
+      pythonProcess.stdio[IPC_FD].on('data', decode)
+    }
+
     // 逐行解析 stdout (JSON Lines)
     const rl = createInterface({ input: pythonProcess.stdout })
 
     rl.on('line', (line) => {
       try {
-        const data = JSON.parse(line)
-        if (data.type === 'progress') {
-          mainWindow?.webContents.send('scraper:progress', data)
-        } else if (data.type === 'task') {
-          mainWindow?.webContents.send('scraper:task-update', data)
-        } else if (data.type === 'complete') {
-          mainWindow?.webContents.send('scraper:complete', data)
-          pythonProcess = null
-        }
+        dispatchScraperEvent(JSON.parse(line))
       } catch {
         // 非 JSON 行，普通日志输出
         console.log('[Python]', line)
@@ -4,6 +4,7 @@ import { BentoGrid } from './components/layout/BentoGrid'
 import { ProgressCard } from './components/cards/ProgressCard'
 import { StatsCard } from './components/cards/StatsCard'
 import { ActiveTasksCard } from './components/cards/ActiveTasksCard'
+import { FailureSummaryCard } from './components/cards/FailureSummaryCard'
 import { ControlBar } from './components/cards/ControlBar'
 import { TaskListPage } from './components/pages/TaskListPage'
 import { SettingsPage } from './components/pages/SettingsPage'
@@ -18,6 +19,7 @@ function App() {
   const isCompleted = useScraperStore((s) => s.isCompleted)
   const progress = useScraperStore((s) => s.progress)
   const allTasks = useScraperStore((s) => s.allTasks)
+  const completeData = useScraperStore((s) => s.completeData)
   const currentPage = useScraperStore((s) => s.currentPage)
   const setCurrentPage = useScraperStore((s) => s.setCurrentPage)
   const importedFile = useScraperStore((s) => s.importedFile)
@@ -133,6 +135,13 @@ function App() {
                 tasks={allTasks}
                 onViewAll={handleViewAll}
               />
+
+              {isCompleted && completeData?.failureSummary && completeData.failureSummary.length > 0 && (
+                <FailureSummaryCard
+                  summary={completeData.failureSummary}
+                  failuresFile={completeData.failuresFile}
+                />
+              )}
             </BentoGrid>
           </>
         )
@@ -1,7 +1,7 @@
 import { Card } from '../shared/Card'
 import { TaskItem } from '../shared/TaskItem'
 import { cn } from '../../utils/cn'
-import type { TaskData } from '../../types/scraper'
+import type { TaskData, TaskStatus } from '../../types/scraper'
 
 export interface ActiveTasksCardProps {
   tasks: TaskData[]
@@ -18,7 +18,7 @@ export function ActiveTasksCard({
 }: ActiveTasksCardProps) {
   // 按状态排序：running > pending > failed > success
   const sortedTasks = [...tasks].sort((a, b) => {
-    const statusOrder = { running: 0, pending: 1, failed: 2, success: 3 }
+    const statusOrder: Record<TaskStatus, number> = { running: 0, pending: 1, failed: 2, skipped: 3, success: 4 }
     return statusOrder[a.status] - statusOrder[b.status]
   })
 
@@ -0,0 +1,80 @@
+import { Card } from '../shared/Card'
+import { cn } from '../../utils/cn'
+import type { FailureGroup } from '../../types/scraper'
+
+export interface FailureSummaryCardProps {
+  summary: FailureGroup[]
+  failuresFile?: string | null
+  className?: string
+}
+
+// 错误分类的显示名称，http_<状态码> 等未列出的分类原样显示
+const classLabels: Record<string, string> = {
+  timeout: '超时',
+  connection: '连接错误',
+  empty: '内容为空',
+  io: '本地写入',
+  cancelled: '已取消',
+  other: '其他',
+}
+
+function classLabel(errorClass: string) {
+  if (errorClass.startsWith('http_')) {
+    return `HTTP ${errorClass.slice(5)}`
+  }
+  return classLabels[errorClass] ?? errorClass
+}
+
+export function FailureSummaryCard({
+  summary,
+  failuresFile,
+  className,
+}: FailureSummaryCardProps) {
+  const total = summary.reduce((sum, group) => sum + group.count, 0)
+
+  return (
+    <Card span={12} className={cn('relative', className)}>
+      {/* Header */}
+      <div className="flex justify-between items-center mb-6">
+        <h3 className="text-lg font-semibold">
+          失败分类
+          <span className="text-error text-sm font-normal ml-3">共 {total.toLocaleString()} 篇</span>
+        </h3>
+        {failuresFile && (
+          <span className="text-xs text-secondary truncate max-w-[50%]" title={failuresFile}>
+            完整列表: {failuresFile}
+          </span>
+        )}
+      </div>
+
+      {/* Groups */}
+      <div className="space-y-4">
+        {summary.map((group) => (
+          <div key={group.errorClass}>
+            <div className="flex justify-between items-center text-sm mb-1.5">
+              <span className="text-primary font-medium">{classLabel(group.errorClass)}</span>
+              <span className="text-secondary">{group.count.toLocaleString()}</span>
+            </div>
+            <div className="h-1.5 rounded-full bg-white/5 overflow-hidden">
+              <div
+                className="h-full rounded-full bg-gradient-to-r from-red-500 to-red-400"
+                style={{ width: `${total > 0 ? (group.count / total) * 100 : 0}%` }}
+              />
+            </div>
+            {group.samples.length > 0 && (
+              <ul className="mt-2 space-y-1">
+                {group.samples.map((sample) => (
+                  <li key={sample.index} className="text-xs text-secondary truncate" title={`${sample.url}\n${sample.error}`}>
+                    <span className="text-primary/80">#{sample.index}</span>
+                    <span className="mx-2">{sample.title || sample.url}</span>
+                    <span className="text-error/80">{sample.error}</span>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
+        ))}
+      </div>
+    </Card>
+  )
+}
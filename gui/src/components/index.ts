@@ -13,6 +13,7 @@ export { ProgressCard } from './cards/ProgressCard'
 export { StatsCard } from './cards/StatsCard'
 export { ActiveTasksCard } from './cards/ActiveTasksCard'
 export { ControlBar } from './cards/ControlBar'
+export { FailureSummaryCard } from './cards/FailureSummaryCard'
 
 // Types
 export type { CardProps } from './shared/Card'
@@ -25,3 +26,4 @@ export type { ProgressCardProps } from './cards/ProgressCard'
 export type { StatsCardProps } from './cards/StatsCard'
 export type { ActiveTasksCardProps } from './cards/ActiveTasksCard'
 export type { ControlBarProps } from './cards/ControlBar'
+export type { FailureSummaryCardProps } from './cards/FailureSummaryCard'
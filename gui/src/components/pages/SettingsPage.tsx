@@ -126,7 +126,7 @@ export function SettingsPage() {
               'transition-all'
             )}
           />
-          <p className="text-xs text-secondary">Firecrawl 服务地址</p>
+          <p className="text-xs text-secondary">Firecrawl 服务地址，多个实例用逗号分隔</p>
         </div>
 
         {/* Firecrawl API Key */}
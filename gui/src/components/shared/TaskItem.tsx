@@ -29,6 +29,10 @@ const statusConfig: Record<TaskStatus, { dot: string; bar: string }> = {
     dot: 'bg-red-400 shadow-[0_0_6px_rgba(248,113,113,0.6)]',
     bar: 'bg-gradient-to-r from-red-500 to-red-400',
   },
+  skipped: {
+    dot: 'bg-amber-400/70',
+    bar: 'bg-amber-400/40',
+  },
 }
 
 export function TaskItem({
@@ -137,18 +137,19 @@ export const useScraperStore = create<ScraperStore>()(
         state.isCompleted = true
         state.completeData = data
 
-        // 获取失败任务的 ID 列表
-        const failedIds = new Set(
-          data.failedTasks?.map((t) => `task-${String(t.index).padStart(4, '0')}`) || []
+        // failedTasks 只是失败记录的抽样，不能据此推断其余任务成功：
+        // 结束时仍未收到最终状态的任务一律标为失败，抽样中有记录的附上错误信息
+        const failedErrors = new Map(
+          (data.failedTasks || []).map((t) => [`task-${String(t.index).padStart(4, '0')}`, t.error])
         )
 
-        // 更新所有 running/pending 任务的最终状态
         state.allTasks = state.allTasks.map((task) => {
           if (task.status === 'running' || task.status === 'pending') {
             return {
               ...task,
-              status: failedIds.has(task.id) ? 'failed' : 'success',
+              status: 'failed',
               progress: 100,
+              error: failedErrors.get(task.id) ?? task.error ?? '运行结束时未收到该任务的最终状态',
             }
           }
           return task
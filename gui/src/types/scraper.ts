@@ -17,6 +17,16 @@ export interface ProgressData {
   running: number
   percentage: number
   eta?: number
+  concurrency?: number
+  pool?: HttpPoolStats
+}
+
+export interface HttpPoolStats {
+  size: number
+  active: number
+  queued: number
+  requests: number
+  opened: number
 }
 
 export interface ProgressUpdate extends BaseMessage {
@@ -25,7 +35,7 @@ export interface ProgressUpdate extends BaseMessage {
 }
 
 // Task Update
-export type TaskStatus = 'pending' | 'running' | 'success' | 'failed'
+export type TaskStatus = 'pending' | 'running' | 'success' | 'failed' | 'skipped'
 
 export interface TaskData {
   id: string
@@ -49,6 +59,14 @@ export interface FailedTask {
   url: string
   title: string
   error: string
+  errorClass?: string
+  attempts?: number
+}
+
+export interface FailureGroup {
+  errorClass: string
+  count: number
+  samples: FailedTask[]
 }
 
 export interface CompleteData {
@@ -57,6 +75,8 @@ export interface CompleteData {
   failed: number
   elapsed: number
   failedTasks: FailedTask[]
+  failureSummary?: FailureGroup[]
+  failuresFile?: string | null
 }
 
 export interface CompleteNotification extends BaseMessage {
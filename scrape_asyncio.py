@@ -1,4 +1,3 @@
-
 """
 文章异步爬虫
 使用 asyncio+Firecrawl 实现异步并发爬取
@@ -11,44 +10,512 @@ import sys
 import time
 import signal
 import asyncio
+import bisect
+import contextvars
+import csv
+import hashlib
+import heapq
+import hmac
+import importlib
+import multiprocessing
+import random
+import re
+import secrets
+import socket
+import sqlite3
+import statistics
+import uuid
+import zlib
+import xml.etree.ElementTree as ET
 import aiofiles
+import aiohttp
+import firecrawl
+import httpx
 from pathlib import Path
 from firecrawl import AsyncFirecrawl
-from datetime import datetime
-from dataclasses import dataclass
-from typing import List, Dict, Optional, AsyncIterator
-from aiohttp import ClientError
+from firecrawl.v2 import AsyncFirecrawlClient
+from firecrawl.v2.types import ScrapeOptions, PaginationConfig
+from firecrawl.v2.utils.http_client_async import AsyncHttpClient
+from datetime import datetime, timezone
+from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Optional, AsyncIterator, AsyncIterable, Callable, NamedTuple
+from aiohttp import ClientError, web
+from httpx import TimeoutException, TransportError
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing, contextmanager
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from urllib.parse import unquote, urljoin, urlsplit, urlunsplit
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖：未安装时归档输出使用 zlib 压缩
+    zstandard = None
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:  # 可选依赖：未安装时 HTTP2=true 回退到 HTTP/1.1
+    h2 = None
 
 # 配置
-FIRECRAWL_URL = os.environ.get("FIRECRAWL_URL", "http://localhost:8547")
+FIRECRAWL_URL = os.environ.get("FIRECRAWL_URL", "http://localhost:8547")  # 多个实例用逗号分隔，或使用 JSON 数组配置权重与 Key
 FIRECRAWL_API_KEY = os.environ.get("FIRECRAWL_API_KEY", "")  # 必须通过 GUI 或环境变量配置
 BASE_DIR = Path(__file__).parent
 OUTPUT_DIR = Path(os.environ.get("OUTPUT_DIR", str(BASE_DIR)))
 ARTICLES_FILE = Path(os.environ.get("ARTICLES_FILE", str(BASE_DIR / "cbre_data_center_articles.json")))
+ARTICLES_FORMAT = os.environ.get("ARTICLES_FORMAT", "").lower()  # json / jsonl / csv，留空按扩展名判断
+READ_CHUNK_SIZE = 64 * 1024  # 流式读取文章列表的块大小
+MAX_ARTICLE_BYTES = 16 * 1024 * 1024  # 单个 JSON 条目的最大字符数
+STATE_DB = Path(os.environ.get("STATE_DB", str(OUTPUT_DIR / ".scrape_state.db")))  # 断点续传状态库
+OUTPUT_SINK = os.environ.get("OUTPUT_SINK", "files").lower()  # files / jsonl / archive
+OUTPUT_SUBDIR_SIZE = int(os.environ.get("OUTPUT_SUBDIR_SIZE", "0"))  # files 模式下按索引分子目录，每个子目录的文章数（0 不分）
+WRITE_QUEUE_SIZE = int(os.environ.get("WRITE_QUEUE_SIZE", "256"))  # 写入队列容量，写入落后时爬取协程等待
+WRITE_BATCH_SIZE = 64  # 每次交给写入线程的最大条目数
+POSTPROCESS = os.environ.get("POSTPROCESS", "")  # 写出前的后处理步骤（逗号分隔，可用 模块:函数 引入自定义步骤），留空不处理
+POSTPROCESS_WORKERS = int(os.environ.get("POSTPROCESS_WORKERS", "0"))  # 后处理进程数，0 为 CPU 核数
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "2000"))  # chunks 步骤每块的最大字符数
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "200"))  # 相邻块重叠的字符数
+STATE_LOOKUP_BATCH = 500  # 每次查询状态库的 URL 数
+STATE_COMMIT_BATCH = 200  # 累计多少条写入后提交
+STATE_KEYS_BATCH = 10000  # 预读去重键时每次从状态库读取的条数
+REFRESH_AFTER = float(os.environ.get("REFRESH_AFTER", "0"))  # 已成功条目超过多少秒后重新抓取（0 表示从不刷新）
+REFRESH_REPORT_MAX = 50  # 结束时列出的内容变化文章数上限（完整列表见状态库 changed_at）
+FAILURE_REPORT_MAX = 50  # 结束时列出的失败文章数上限（完整列表见输出目录下的 failures.jsonl）
+FAILURE_SAMPLES = 5  # complete 事件中每个错误分类附带的失败样例数
+FAILURE_FLUSH_BATCH = 100  # 失败记录累计多少条后写入 failures.jsonl
+ARTICLES_INBOX = os.environ.get("ARTICLES_INBOX", "")  # 运行期间追加文章的 JSON Lines 文件，留空不启用
+INBOX_POLL_INTERVAL = 1.0  # 检查追加文件的间隔（秒）
+INBOX_INDEX_START = 1_000_000_000  # 追加条目的序号从此值之后开始，与列表条目的序号互不重叠
+
+# 发现阶段：设置 DISCOVER 后不读取 ARTICLES_FILE，边发现 URL 边爬取
+DISCOVER = os.environ.get("DISCOVER", "")  # 逗号分隔的来源：sitemap:<站点或 sitemap 地址>、map:<站点地址>
+DISCOVER_INCLUDE = os.environ.get("DISCOVER_INCLUDE", "")  # 只爬取匹配该正则的 URL，留空不过滤
+DISCOVER_LIMIT = int(os.environ.get("DISCOVER_LIMIT", "0"))  # 最多发现的 URL 数（去重、过滤后），0 不限
+DISCOVER_QUEUE_SIZE = 1000  # 已发现、尚未交给调度的 URL 缓冲，爬取落后时发现阶段等待
+SITEMAP_MAX_DEPTH = 3  # sitemap 索引的最大嵌套层数
+SITEMAP_MAX_BYTES = 64 * 1024 * 1024  # 单个 sitemap 解压后的最大字节数（协议上限为 50MB）
+
+# 抓取参数（同时作为响应缓存键的一部分）
+SCRAPE_OPTIONS = {"formats": ["markdown"], "only_main_content": True}
+
+# 响应缓存配置：off 关闭 / use TTL 内直接使用 / revalidate 总是请求上游、失败时回退旧缓存 / only 仅使用缓存
+CACHE_MODE = os.environ.get("CACHE_MODE", "use").lower()
+CACHE_DIR = Path(os.environ.get("CACHE_DIR", str(BASE_DIR / ".scrape_cache")))
+CACHE_TTL = float(os.environ.get("CACHE_TTL", str(24 * 3600)))  # 秒
+CACHE_MAX_MB = float(os.environ.get("CACHE_MAX_MB", "1024"))
+
+# URL 去重配置
+DEDUP = os.environ.get("DEDUP", "true").lower() == "true"
+DEDUP_BLOOM_BITS = int(os.environ.get("DEDUP_BLOOM_BITS", str(1 << 24)))  # 布隆过滤器位数（默认 2MB）
+DEDUP_RECENT = 10000  # 内存中保留的最近完成条目数
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "spm",
+}
 
 # 并发配置
 MAX_CONCURRENT = int(os.environ.get("MAX_CONCURRENT", "15"))
-BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "50"))
-RETRY_COUNT = 3  # 失败重试次数
-RETRY_DELAY_BASE = 1.0  # 重试基础延迟（秒），使用指数退避
-REQUEST_TIMEOUT = 60.0  # 单个请求超时时间（秒）
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "50"))  # 待爬取队列的最小缓冲容量
+RETRY_COUNT = int(os.environ.get("RETRY_COUNT", "3"))  # 每篇文章最多尝试次数
+RETRY_DELAY_BASE = float(os.environ.get("RETRY_DELAY_BASE", "1.0"))  # 重试基础延迟（秒），使用去相关抖动退避
+RETRY_DELAY_MAX = float(os.environ.get("RETRY_DELAY_MAX", "30"))  # 单次退避上限（秒）
+RETRY_AFTER_MAX = 300.0  # 服务端 Retry-After 的最长遵守时间（秒）
+RETRY_BUDGET = float(os.environ.get("RETRY_BUDGET", "0.2"))  # 本轮重试次数不超过首次请求数的比例
+RETRY_BUDGET_MIN = 10  # 请求数较少时仍允许的最少重试次数
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}  # 可重试的 HTTP 状态码
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "60"))  # 单个请求超时（秒），同时作为 Firecrawl 的 timeout 参数
+REQUEST_TIMEOUT_GRACE = 5.0  # 本地等待比服务端超时多出的余量（秒），让服务端先超时并停止渲染
+REQUEST_TIMEOUT_MIN = 1.0  # 按截止时间缩短后的最短超时（秒）
+
+# 执行引擎：single 为逐条请求，batch 为提交 Firecrawl 批量任务
+SCRAPE_ENGINE = os.environ.get("SCRAPE_ENGINE", "single").lower()
+BATCH_SCRAPE_SIZE = int(os.environ.get("BATCH_SCRAPE_SIZE", "50"))  # 每个批量任务的 URL 数
+BATCH_SCRAPE_JOBS = int(os.environ.get("BATCH_SCRAPE_JOBS", "2"))  # 同时进行的批量任务数
+BATCH_POLL_INTERVAL = float(os.environ.get("BATCH_POLL_INTERVAL", "2"))  # 批量任务状态轮询间隔（秒）
+
+# 自适应并发配置（MAX_CONCURRENT 作为初始并发）
+ADAPTIVE_CONCURRENCY = os.environ.get("ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+ADAPTIVE_MIN_CONCURRENT = int(os.environ.get("ADAPTIVE_MIN_CONCURRENT", "2"))
+ADAPTIVE_MAX_CONCURRENT = int(os.environ.get("ADAPTIVE_MAX_CONCURRENT", str(MAX_CONCURRENT * 4)))
+ADAPTIVE_LATENCY_WINDOW = 50  # 参与 p50 计算的最近样本数
+ADAPTIVE_MIN_SAMPLES = 10  # 每次调整前至少需要的新样本数
+ADAPTIVE_LATENCY_TOLERANCE = 1.3  # p50 不超过基线的倍数时视为平稳
+ADAPTIVE_BACKOFF_RATIO = 0.7  # 过载时的乘性回退系数
+
+# 按主机限速配置（0 表示不限），HOST_LIMITS 为按域名覆盖的 JSON 配置
+HOST_MAX_IN_FLIGHT = int(os.environ.get("HOST_MAX_IN_FLIGHT", "0"))
+HOST_RATE_LIMIT = float(os.environ.get("HOST_RATE_LIMIT", "0"))
+HOST_BURST = int(os.environ.get("HOST_BURST", "1"))
+HOST_LIMITS = os.environ.get("HOST_LIMITS", "")
+HOST_LOOKAHEAD = int(os.environ.get("HOST_LOOKAHEAD", "10000"))  # 待爬取队列的预读条目数（优先级排序与主机调度的窗口）
+RUN_TIME_BUDGET = float(os.environ.get("RUN_TIME_BUDGET", "0"))  # 本轮运行时间预算（秒），0 不限
+
+# 分片执行：协调者按一致性哈希把文章分给多个 worker 进程（本机或其他主机）
+SHARDS = int(os.environ.get("SHARDS", "0"))  # 协调者在本机启动的 worker 进程数
+SHARD_LISTEN = os.environ.get("SHARD_LISTEN", "")  # 协调者监听地址 host:port，供其他主机的 worker 连接
+SHARD_COORDINATOR = os.environ.get("SHARD_COORDINATOR", "")  # 设置后以 worker 身份连接该协调者
+SHARD_NAME = os.environ.get("SHARD_NAME", "")  # worker 名称，默认为 主机名-进程号
+SHARD_TOKEN = os.environ.get("SHARD_TOKEN", "")  # worker 连接协调者的共享口令，设置 SHARD_LISTEN 时必填
+SHARD_TIMEOUT = float(os.environ.get("SHARD_TIMEOUT", "30"))  # worker 无消息多久视为失联（秒）
+SHARD_WINDOW = int(os.environ.get("SHARD_WINDOW", "1000"))  # 每个 worker 最多持有的未完成条目数
+SHARD_HEARTBEAT = 1.0  # worker 心跳间隔（秒）
+SHARD_REPLICAS = 64  # 一致性哈希环上每个 worker 的虚拟节点数
+SHARD_LINE_LIMIT = 16 * 1024 * 1024  # 分片协议单条消息的最大长度
+
+# 多端点熔断配置（FIRECRAWL_URL 含多个实例时生效）
+CIRCUIT_FAILURES = int(os.environ.get("CIRCUIT_FAILURES", "5"))  # 连续失败多少次后熔断
+CIRCUIT_COOLDOWN = float(os.environ.get("CIRCUIT_COOLDOWN", "30"))  # 熔断后首次探测前的等待（秒），再次熔断时翻倍
+CIRCUIT_MAX_COOLDOWN = 300.0
+
+# 对冲请求：请求耗时超过近期延迟分位数时再发一个副本，取先完成的结果
+HEDGE = os.environ.get("HEDGE", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))  # 触发对冲的延迟分位数
+HEDGE_MAX_RATIO = float(os.environ.get("HEDGE_MAX_RATIO", "0.05"))  # 对冲请求占总请求数的上限
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "1.0"))  # 对冲等待下限（秒），避免快速请求也被对冲
+HEDGE_WINDOW = 500  # 参与分位数计算的最近样本数
+HEDGE_MIN_SAMPLES = 20  # 样本不足时不对冲
+
+# 到 Firecrawl 的 HTTP 连接池：复用空闲连接，连接数上限默认跟随并发上限
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "0"))  # 每个实例的最大连接数，0 为并发上限（开启对冲时加上余量）
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "60"))  # 空闲连接保留时间（秒）
+HTTP2 = os.environ.get("HTTP2", "false").lower() == "true"  # 需安装 h2，多个请求复用少量连接
+HTTP_POOL_SHARD = 8  # HTTP/1.1 时每个 httpx 客户端的连接数，连接数上限更大时拆成多个客户端
 
 # GUI 模式
 GUI_MODE = os.environ.get("GUI_MODE", "false").lower() == "true"
+EMIT_INTERVAL = float(os.environ.get("EMIT_INTERVAL", "0.1"))  # GUI 事件合并输出周期（秒），0 表示逐条输出
+GUI_IPC_FD = os.environ.get("GUI_IPC_FD", "")  # GUI 事件专用管道的文件描述符，留空则使用 stdout
+
+# 指标与追踪
+METRICS_LISTEN = os.environ.get("METRICS_LISTEN", "")  # 设置 host:port 后在 /metrics 输出 Prometheus 格式指标
+TRACE_FILE = os.environ.get("TRACE_FILE", "")  # 设置后把各阶段 span 以 JSON Lines 追加写入该文件
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # 耗时直方图分桶（秒）
+
+# 守护模式：常驻进程通过本地 HTTP 接口接收爬取任务，共享客户端连接池与全局并发上限
+DAEMON_LISTEN = os.environ.get("DAEMON_LISTEN", "")  # host:port 或 unix:/path/to.sock，留空不启用
+DAEMON_TOKEN = os.environ.get("DAEMON_TOKEN", "")  # 设置后请求须带 Authorization: Bearer <口令>
+DAEMON_MAX_JOBS = int(os.environ.get("DAEMON_MAX_JOBS", "4"))  # 同时运行的任务数，其余排队
+DAEMON_JOB_HISTORY = 100  # 保留的已结束任务数
+DAEMON_EVENT_BUFFER = 1000  # 每个事件订阅者缓冲的事件批数，消费过慢时断开
+DAEMON_FAILURE_PAGE_MAX = 1000  # 失败记录接口单页的最大条数
 
 # 全局停止标志
 _stop_requested = False
 # 存储所有正在运行的任务，用于取消
 _running_tasks: set = set()
+# 本轮使用的响应缓存（CACHE_MODE=off 时为 None）
+_response_cache: Optional["ScrapeCache"] = None
+# 本轮时间预算的截止时间戳（RUN_TIME_BUDGET=0 时为 None）；守护模式下各任务互相独立
+_run_deadline: contextvars.ContextVar = contextvars.ContextVar("run_deadline", default=None)
+# 守护模式下当前协程所属的任务（单次运行时为 None）
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_job", default=None)
+
+
+def _output_dir() -> Path:
+    """本轮的输出目录：守护模式下为当前任务的输出目录"""
+    job = _current_job.get()
+    return job.output_dir if job is not None else Path(OUTPUT_DIR)
+
+
+class GuiEventStream:
+    """
+    GUI 事件的缓冲输出
+
+    - task 事件按任务 ID 合并，一个周期内只输出最后一次更新（终态总是最后一次，不会丢失）
+    - progress 事件只保留最新快照，按固定周期输出
+    - 每个周期的事件合并为一次写入和一次 flush
+    - 其他事件（complete / error）先刷出缓冲，再立即输出，保证 GUI 收到准确的最终状态
+    未启动周期任务时（事件循环外或 EMIT_INTERVAL=0）所有事件逐条输出。
+
+    指定 ipc_fd 时事件写入该管道而不是 stdout：每批事件编码为一个 JSON 数组，
+    前置 4 字节大端长度作为一帧；管道不可用时自动回退到 stdout 的 JSON Lines。
+    """
+
+    def __init__(self, interval: float, ipc_fd: str = ""):
+        self.interval = interval
+        self._tasks: Dict[str, dict] = {}
+        self._progress: Optional[dict] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._ipc_fd = ipc_fd
+        self._ipc = None
+        self.sink = None  # 分片 worker 把事件转发给协调者：sink(events)
+
+    def emit(self, data: dict):
+        kind = data.get("type")
+        if self._ticker is not None and kind == "task":
+            task_id = data["data"]["id"]
+            # 先移除再插入，使输出顺序与最后一次更新的顺序一致
+            self._tasks.pop(task_id, None)
+            self._tasks[task_id] = data
+        elif self._ticker is not None and kind == "progress":
+            self._progress = data
+        else:
+            self.flush(data)
+
+    def flush(self, extra: Optional[dict] = None):
+        """输出所有缓冲事件（以及可选的一条即时事件）"""
+        events = list(self._tasks.values())
+        if self._progress is not None:
+            events.append(self._progress)
+        if extra is not None:
+            events.append(extra)
+        self._tasks.clear()
+        self._progress = None
+        if not events:
+            return
+        if self.sink is not None:
+            self.sink(events)
+            return
+        if self._ipc_fd and self._write_frame(events):
+            return
+        sys.stdout.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events))
+        sys.stdout.flush()
+
+    def _write_frame(self, events: List[dict]) -> bool:
+        """以长度前缀帧写入 IPC 管道，失败时关闭管道并返回 False"""
+        try:
+            if self._ipc is None:
+                self._ipc = open(int(self._ipc_fd), "wb")
+            payload = json.dumps(events, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._ipc.write(len(payload).to_bytes(4, "big") + payload)
+            self._ipc.flush()
+            return True
+        except (OSError, ValueError):
+            self._ipc_fd = ""
+            self._ipc = None
+            return False
+
+    def start(self):
+        if self.interval > 0 and self._ticker is None:
+            self._ticker = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+        self.flush()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+
+_gui_events = GuiEventStream(EMIT_INTERVAL, GUI_IPC_FD)
+
+
+# 当前任务所在的 span，各 asyncio 任务互相独立
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def _format_labels(labels: tuple) -> str:
+    """Prometheus 标签：反斜杠、双引号与换行需要转义"""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Telemetry:
+    """
+    运行指标与追踪
+
+    - 计数器、直方图与仪表，设置 METRICS_LISTEN 时在 /metrics 以 Prometheus 文本格式输出
+    - span() 记录阶段耗时到 scrape_stage_seconds{stage=...} 直方图；
+      设置 TRACE_FILE 时同时把 span（trace_id / span_id / parent_id、起止时间、属性）按行写出
+    指标总是在内存中累计，开销只有几次字典操作。
+    """
+
+    def __init__(self):
+        self._counters: Dict[tuple, float] = {}
+        self._histograms: Dict[tuple, list] = {}  # (名称, 标签) -> [各桶计数..., 总和, 次数]
+        self._gauges: Dict[str, object] = {}  # 名称 -> 返回当前值的函数
+        self._types: Dict[str, str] = {}
+        self._help: Dict[str, str] = {}
+        self._trace = None
+        self._runner: Optional[web.AppRunner] = None
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """计数器加 value"""
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+        self._types.setdefault(name, "counter")
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """向直方图记录一个样本"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = [0] * (len(METRICS_BUCKETS) + 3)
+            self._types.setdefault(name, "histogram")
+        histogram[bisect.bisect_left(METRICS_BUCKETS, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def gauge(self, name: str, read, help_text: str = "") -> None:
+        """登记仪表：输出时调用 read() 取当前值"""
+        self._gauges[name] = read
+        self._types[name] = "gauge"
+        if help_text:
+            self._help[name] = help_text
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        记录一个阶段：耗时计入 scrape_stage_seconds，开启追踪时写出 span
+
+        嵌套调用时自动以外层 span 为父节点；attributes 可在块内通过返回的字典补充。
+        """
+        parent = _current_span.get()
+        record = {
+            "trace_id": attributes.pop("trace_id", None) or (parent["trace_id"] if parent else f"{random.getrandbits(128):032x}"),
+            "span_id": f"{random.getrandbits(64):016x}",
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "attributes": attributes,
+        }
+        token = _current_span.set(record)
+        started = time.time()
+        status = "ok"
+        try:
+            yield record["attributes"]
+        except BaseException as e:
+            status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(record, started, status)
+
+    def record(self, name: str, started: float, **attributes) -> None:
+        """记录一个从 started（time.time()）到现在的阶段，作为当前 span 的子节点"""
+        parent = _current_span.get()
+        record = {
+            "trace_id": parent["trace_id"] if parent else f"{random.getrandbits(128):032x}",
+            "span_id": f"{random.getrandbits(64):016x}",
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "attributes": attributes,
+        }
+        self._finish(record, started, "ok")
+
+    def _finish(self, record: dict, started: float, status: str) -> None:
+        ended = time.time()
+        self.observe("scrape_stage_seconds", ended - started, stage=record["name"])
+        if self._trace is not None:
+            record.update(start=started, end=ended, duration_ms=round((ended - started) * 1000, 3), status=status)
+            self._trace.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        lines: List[str] = []
+        described = set()
+
+        def header(name: str):
+            if name in described:
+                return
+            described.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {self._types[name]}")
+
+        for (name, labels), value in sorted(self._counters.items()):
+            header(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            header(name)
+            cumulative = 0
+            for bound, count in zip((*METRICS_BUCKETS, float("inf")), histogram):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-2]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram[-1]}")
+        for name, read in sorted(self._gauges.items()):
+            try:
+                value = read()
+            except Exception:
+                continue
+            header(name)
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def start(self, listen: str, trace_file: str) -> None:
+        """
+        按配置启动 /metrics 服务与追踪文件
+
+        Raises:
+            ValueError: METRICS_LISTEN 格式不正确
+            OSError: 端口被占用或追踪文件无法打开
+        """
+        if trace_file:
+            self._trace = open(trace_file, "a", encoding="utf-8")
+        if listen:
+            host, port = _parse_address(listen, "127.0.0.1")
+
+            async def metrics(request: web.Request) -> web.Response:
+                return web.Response(text=self.render(), content_type="text/plain", charset="utf-8",
+                                    headers={"X-Content-Type-Options": "nosniff"})
+
+            app = web.Application()
+            app.router.add_get("/metrics", metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, host, port).start()
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+_telemetry = Telemetry()
+_telemetry.describe("scrape_stage_seconds", "Time spent per stage (limiter_wait, request, process, cache_write, postprocess, write, attempt)")
+_telemetry.describe("scrape_requests_total", "Upstream scrape requests sent")
+_telemetry.describe("scrape_retries_total", "Attempts deferred for retry")
+_telemetry.describe("scrape_errors_total", "Failed attempts by error class")
+_telemetry.describe("scrape_results_total", "Finished articles by status")
+_telemetry.describe("scrape_bytes_in_total", "Markdown bytes received from Firecrawl")
+_telemetry.describe("scrape_bytes_out_total", "Bytes written to output files")
 
 
 def emit_json(data: dict):
-    """输出 JSON Line 到 stdout（仅在 GUI 模式下）"""
-    if GUI_MODE:
-        print(json.dumps(data, ensure_ascii=False), flush=True)
+    """
+    输出 JSON Line 到 stdout（仅在 GUI 模式下，经缓冲合并后输出；分片 worker 转发给协调者）
+
+    守护模式下事件进入当前任务自己的事件流
+    """
+    job = _current_job.get()
+    if job is not None:
+        job.events.emit(data)
+    elif GUI_MODE or _gui_events.sink is not None:
+        _gui_events.emit(data)
+
+
+def emit_error(message: str, hint: Optional[str] = None):
+    """输出错误：GUI 模式与守护模式任务发送 error 事件，命令行模式打印错误及处理提示"""
+    emit_json({"type": "error", "message": message})
+    if not GUI_MODE:
+        print(f"❌ 错误: {message}")
+        if hint:
+            print(hint)
 
 
-def emit_progress(total: int, completed: int, success: int, failed: int, pending: int, running: int, eta: Optional[float] = None):
+def emit_progress(total: int, completed: int, success: int, failed: int, pending: int, running: int, eta: Optional[float] = None, concurrency: Optional[int] = None, pool: Optional[dict] = None):
     """输出进度更新"""
     percentage = round(completed / total * 100, 2) if total > 0 else 0
     emit_json({
@@ -62,7 +529,9 @@ def emit_progress(total: int, completed: int, success: int, failed: int, pending
             "pending": pending,
             "running": running,
             "percentage": percentage,
-            "eta": eta
+            "eta": eta,
+            "concurrency": concurrency,
+            "pool": pool
         }
     })
 
@@ -85,8 +554,9 @@ def emit_task_update(index: int, url: str, title: str, status: str, progress: in
     })
 
 
-def emit_complete(total: int, success: int, failed: int, elapsed: float, failed_tasks: List[dict]):
-    """输出完成通知"""
+def emit_complete(total: int, success: int, failed: int, elapsed: float, failed_tasks: List[dict],
+                  failure_summary: Optional[List[dict]] = None, failures_file: Optional[str] = None):
+    """输出完成通知（failed_tasks 只含各错误分类的样例，完整列表在 failures_file 中）"""
     emit_json({
         "type": "complete",
         "timestamp": int(datetime.now().timestamp() * 1000),
@@ -95,39 +565,21 @@ def emit_complete(total: int, success: int, failed: int, elapsed: float, failed_
             "success": success,
             "failed": failed,
             "elapsed": elapsed,
-            "failedTasks": failed_tasks
+            "failedTasks": failed_tasks,
+            "failureSummary": failure_summary or [],
+            "failuresFile": failures_file
         }
     })
 
 
 async def _cleanup_firecrawl_client(client) -> None:
-    """
-    安全清理 AsyncFirecrawl 客户端资源
-
-    支持多种 SDK 版本的内部实现：
-    - client.close() - 直接关闭方法
-    - client._client.close() - httpx AsyncClient
-    - client._client.aclose() - httpx 新版本
-    """
-    cleanup_methods = [
-        # 直接关闭方法
-        lambda c: c.close() if hasattr(c, 'close') and callable(c.close) else None,
-        # httpx AsyncClient (旧版)
-        lambda c: c._client.close() if hasattr(c, '_client') and hasattr(c._client, 'close') else None,
-        # httpx AsyncClient (新版)
-        lambda c: c._client.aclose() if hasattr(c, '_client') and hasattr(c._client, 'aclose') else None,
-    ]
-
-    for get_method in cleanup_methods:
-        try:
-            method = get_method(client)
-            if method is not None:
-                result = method
-                if asyncio.iscoroutine(result):
-                    await result
-                break
-        except Exception:
-            continue
+    """关闭客户端的连接池：对冲包装转发给内部客户端，端点池逐个关闭各实例"""
+    if isinstance(client, HedgedClient):
+        client = client.client
+    if isinstance(client, FirecrawlPool):
+        await client.close()
+    else:
+        await _http_pool.release(client)
 
 
 def setup_signal_handlers():
@@ -177,7 +629,7 @@ def setup_async_signal_handlers(loop: asyncio.AbstractEventLoop):
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapeResult:
     """爬取结果"""
     index: int
@@ -186,487 +638,4805 @@ class ScrapeResult:
     success: bool
     error: Optional[str] = None
     elapsed: float = 0.0
+    attempts: int = 0
+    filename: Optional[str] = None
+    content_hash: Optional[str] = None
+    cached: bool = False
+    retry_in: Optional[float] = None  # 非空表示本次尝试失败、应在该秒数后重试，结果尚未确定
+    changed: Optional[bool] = None  # 到期刷新的条目：内容是否与上次抓取不同；非刷新条目为 None
+    skipped: bool = False  # 预计无法在截止时间前完成而未爬取（不计入失败，也不写入状态库）
+    error_class: Optional[str] = None  # 失败时的错误分类（同指标中的 error_class）
 
 
-async def load_articles_async() -> List[Dict[str, str]]:
+def _validate_article(i: int, article) -> Dict[str, str]:
+    """校验单篇文章条目"""
+    if not isinstance(article, dict) or 'title' not in article or 'url' not in article:
+        raise ValueError(f"文章 {i} 缺少 'title' 或 'url' 键")
+    return article
+
+
+class Article(NamedTuple):
+    """待爬取条目"""
+    index: int
+    title: str
+    url: str
+    copy_from: Optional[str] = None  # 本轮已写出的重复 URL 的源文件名，由 worker 直接复制
+    previous: Optional[tuple] = None  # 到期刷新条目上次的 (内容哈希, 文件名)，内容未变化时不重写
+    priority: float = 0.0
+    deadline: Optional[float] = None  # 截止时间戳
+    timeout: Optional[float] = None  # 该 URL 的请求超时（秒），覆盖 REQUEST_TIMEOUT 与 HOST_LIMITS
+
+
+def _parse_schedule(i: int, article: Dict[str, str], started: float) -> tuple[float, Optional[float], Optional[float]]:
     """
-    异步从JSON文件加载文章列表
+    解析文章条目可选的 priority（数值越大越先爬取）、deadline 与 timeout
 
-    Returns:
-        文章列表，每个文章包含 'title' 和 'url' 键
+    deadline 为数字时表示相对本轮开始的秒数，为字符串时按 ISO 8601 时间解析（无时区视为本地时间）；
+    timeout 为该 URL 的请求超时秒数，覆盖 REQUEST_TIMEOUT 与 HOST_LIMITS。CSV 中的空值视为未设置。
 
-    Raises:
-        FileNotFoundError: 文件不存在
-        ValueError: JSON 格式不正确
+    Returns:
+        (优先级, 截止时间戳, 请求超时)
     """
-    async with aiofiles.open(ARTICLES_FILE, 'r', encoding='utf-8') as f:
-        content = await f.read()
-        data = json.loads(content)
+    priority = article.get('priority')
+    deadline = article.get('deadline')
+    timeout = article.get('timeout')
+    try:
+        priority = float(priority) if priority not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        raise ValueError(f"文章 {i} 的 priority 不是数字: {priority!r}") from None
+    try:
+        timeout = float(timeout) if timeout not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError(f"文章 {i} 的 timeout 不是数字: {timeout!r}") from None
+    if timeout is not None and timeout <= 0:
+        raise ValueError(f"文章 {i} 的 timeout 必须大于 0: {timeout!r}")
+    if deadline in (None, ""):
+        return priority, None, timeout
+    try:
+        return priority, started + float(deadline), timeout
+    except (TypeError, ValueError):
+        pass
+    try:
+        return priority, datetime.fromisoformat(str(deadline)).timestamp(), timeout
+    except ValueError:
+        raise ValueError(f"文章 {i} 的 deadline 无法解析: {deadline!r}") from None
 
-    if 'articles' not in data:
-        raise ValueError("JSON 文件缺少 'articles' 键")
 
-    articles = data['articles']
-    for i, article in enumerate(articles):
-        if 'title' not in article or 'url' not in article:
-            raise ValueError(f"文章 {i} 缺少 'title' 或 'url' 键")
+def _article_schedule(article: Article) -> tuple[float, Optional[float]]:
+    """待爬取条目的 (优先级, 截止时间戳)，截止时间已计入本轮时间预算"""
+    deadline = article.deadline
+    run_deadline = _run_deadline.get()
+    if run_deadline is not None:
+        deadline = run_deadline if deadline is None else min(deadline, run_deadline)
+    return article.priority, deadline
 
-    return articles
 
+def _request_timeout(timeout: Optional[float], deadline: Optional[float]) -> float:
+    """本次请求的超时（秒）：条目或主机的覆盖值，否则 REQUEST_TIMEOUT；有截止时间时不超过剩余时间"""
+    seconds = timeout or REQUEST_TIMEOUT
+    if deadline is not None:
+        seconds = min(seconds, max(deadline - time.time(), REQUEST_TIMEOUT_MIN))
+    return seconds
 
-async def get_existing_indices(output_dir: Path) -> set[int]:
+
+def _detect_articles_format(path: Path) -> str:
+    """根据 ARTICLES_FORMAT 或文件扩展名判断输入格式"""
+    if ARTICLES_FORMAT:
+        if ARTICLES_FORMAT not in ("json", "jsonl", "csv"):
+            raise ValueError(f"不支持的 ARTICLES_FORMAT: {ARTICLES_FORMAT}")
+        return ARTICLES_FORMAT
+    suffix = path.suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    return "json"
+
+
+class _JsonStreamReader:
+    """
+    增量 JSON 读取器：按块读取文件，用 raw_decode 逐个解析值，
+    内存占用只与单个条目大小有关，与文件大小无关
     """
-    异步获取已存在文件的索引集合
 
-    Args:
-        output_dir: 输出目录
+    def __init__(self, f):
+        self._f = f
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
 
-    Returns:
-        已存在文件的索引集合
+    async def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = await self._f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        if len(self._buf) > MAX_ARTICLE_BYTES:
+            raise ValueError("JSON 中单个条目过大或格式不正确")
+        return True
+
+    async def peek(self) -> str:
+        """跳过空白并返回下一个字符，文件结束时返回空字符串"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not await self._fill():
+                return ""
+
+    async def expect(self, char: str) -> None:
+        if await self.peek() != char:
+            raise ValueError(f"JSON 格式不正确: 此处应为 '{char}'")
+        self._pos += 1
+
+    async def value(self):
+        """解析下一个完整的 JSON 值"""
+        await self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if await self._fill():
+                    continue
+                raise
+            # 值恰好位于缓冲区末尾时（如数字）可能被截断，读入更多后重新解析
+            if end == len(self._buf) and await self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+async def _iter_json_articles(path: Path) -> AsyncIterator[Dict[str, str]]:
+    """流式解析 {"articles": [...]} 或顶层数组 [...]"""
+    async with aiofiles.open(path, 'r', encoding='utf-8') as f:
+        reader = _JsonStreamReader(f)
+
+        first = await reader.peek()
+        if first == "{":
+            # 逐个跳过 articles 之前的键，定位到 articles 数组
+            await reader.expect("{")
+            while True:
+                if await reader.peek() == "}":
+                    raise ValueError("JSON 文件缺少 'articles' 键")
+                key = await reader.value()
+                await reader.expect(":")
+                if key == "articles":
+                    break
+                await reader.value()
+                if await reader.peek() == ",":
+                    await reader.expect(",")
+        elif first != "[":
+            raise ValueError("JSON 文件顶层必须是对象或数组")
+
+        await reader.expect("[")
+        if await reader.peek() == "]":
+            return
+        i = 0
+        while True:
+            yield _validate_article(i, await reader.value())
+            i += 1
+            separator = await reader.peek()
+            if separator == "]":
+                return
+            await reader.expect(",")
+
+
+async def _read_lines(f) -> AsyncIterator[List[str]]:
     """
-    # 使用 asyncio.to_thread 包装同步的 glob 操作
-    existing_files = await asyncio.to_thread(lambda: list(output_dir.glob("*.md")))
+    按 READ_CHUNK_SIZE 块读取文本文件，在进程内按换行符切分，每块产出一批完整的行（不含换行符）；
+    逐行迭代 aiofiles 每行都要切换一次线程
+    """
+    buf = ""
+    while True:
+        chunk = await f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buf += chunk
+        end = buf.rfind("\n")
+        if end >= 0:
+            yield buf[:end].split("\n")
+            buf = buf[end + 1:]
+        if len(buf) > MAX_ARTICLE_BYTES:
+            raise ValueError("文章列表中单行过大或格式不正确")
+    if buf:
+        yield [buf]
 
-    existing_indices: set[int] = set()
-    for file in existing_files:
-        try:
-            idx = int(file.name[:3])
-            existing_indices.add(idx)
-        except (ValueError, IndexError):
-            pass
 
-    return existing_indices
+async def _iter_jsonl_articles(path: Path) -> AsyncIterator[Dict[str, str]]:
+    """逐行解析 JSON Lines，空行忽略"""
+    async with aiofiles.open(path, 'r', encoding='utf-8') as f:
+        i = 0
+        async for lines in _read_lines(f):
+            for line in lines:
+                if not line.strip():
+                    continue
+                yield _validate_article(i, json.loads(line))
+                i += 1
 
 
-async def scrape_single_article(
-    semaphore: asyncio.Semaphore,
-    client: AsyncFirecrawl,
-    index: int,
-    title: str,
-    url: str,
-    total: int,
-    output_dir: str
-) -> ScrapeResult:
+async def _iter_csv_articles(path: Path) -> AsyncIterator[Dict[str, str]]:
+    """逐条解析带表头的 CSV（至少包含 title、url 列）"""
+    async with aiofiles.open(path, 'r', encoding='utf-8', newline='') as f:
+        header: Optional[List[str]] = None
+        record = ""
+        i = 0
+        async for lines in _read_lines(f):
+            for line in lines:
+                record += line
+                # 引号未闭合说明字段内含换行，补回换行后继续拼接下一行
+                if record.count('"') % 2:
+                    record += "\n"
+                    continue
+                row = next(csv.reader([record]), [])
+                record = ""
+                if not row:
+                    continue
+                if header is None:
+                    header = [name.strip() for name in row]
+                    if 'title' not in header or 'url' not in header:
+                        raise ValueError("CSV 表头必须包含 'title' 和 'url' 列")
+                    continue
+                yield _validate_article(i, dict(zip(header, row)))
+                i += 1
+
+
+def iter_articles_async(path: Optional[Path] = None) -> AsyncIterator[Dict[str, str]]:
     """
-    异步爬取单篇文章（带超时和指数退避重试）
+    流式读取文章列表，支持 JSON（对象或数组）、JSON Lines 与 CSV
 
     Args:
-        semaphore: 并发控制信号量
-        client: 共享的 AsyncFirecrawl 客户端
-        index: 文章索引
-        title: 文章标题
-        url: 文章 URL
-        total: 总文章数
-        output_dir: 输出目录
+        path: 文章列表文件，默认 ARTICLES_FILE
 
     Returns:
-        ScrapeResult: 爬取结果
+        逐篇产出文章的异步迭代器
+
+    Raises:
+        ValueError: 格式不正确（在迭代过程中抛出）
     """
-    global _stop_requested
+    path = Path(path or ARTICLES_FILE)
+    fmt = _detect_articles_format(path)
+    if fmt == "jsonl":
+        return _iter_jsonl_articles(path)
+    if fmt == "csv":
+        return _iter_csv_articles(path)
+    return _iter_json_articles(path)
 
-    result = ScrapeResult(
-        index=index,
-        title=title,
-        url=url,
-        success=False
-    )
 
-    start_time = time.time()
+async def load_articles_async() -> List[Dict[str, str]]:
+    """
+    异步从文件加载完整文章列表（大文件请使用 iter_articles_async 流式读取）
 
-    # 检查是否收到停止请求
-    if _stop_requested:
-        result.error = "Stopped by user"
-        result.elapsed = time.time() - start_time
-        return result
+    Returns:
+        文章列表，每个文章包含 'title' 和 'url' 键
 
-    async with semaphore:
-        try:
-            if not GUI_MODE:
-                print(f"[{index}/{total}] 开始爬取: {title[:60]}...")
+    Raises:
+        FileNotFoundError: 文件不存在
+        ValueError: 格式不正确
+    """
+    return [article async for article in iter_articles_async()]
 
-            # 发送任务开始状态
-            emit_task_update(index, url, title, "running", 10, elapsed=0)
 
-            # 爬取文章（带指数退避重试）
-            for attempt in range(RETRY_COUNT):
-                if _stop_requested:
-                    result.error = "Stopped by user"
-                    result.elapsed = time.time() - start_time
-                    emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
-                    return result
+def parse_discover_sources(spec: str) -> List[tuple[str, str]]:
+    """
+    解析发现来源：逗号分隔的 sitemap:<地址> 或 map:<地址>
 
-                try:
-                    # 更新进度：正在请求
-                    emit_task_update(index, url, title, "running", 30 + attempt * 20, elapsed=time.time() - start_time)
-
-                    # 添加超时控制
-                    doc = await asyncio.wait_for(
-                        client.scrape(
-                            url,
-                            formats=["markdown"],
-                            only_main_content=True,
-                        ),
-                        timeout=REQUEST_TIMEOUT
-                    )
+    Raises:
+        ValueError: 来源类型未知或地址不是 http(s) URL
+    """
+    sources = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, sep, target = part.partition(":")
+        kind = kind.strip().lower()
+        target = target.strip()
+        if not sep or kind not in ("sitemap", "map"):
+            raise ValueError(f"未知的发现来源: {part}（可选 sitemap:<地址>、map:<地址>）")
+        if urlsplit(target).scheme not in ("http", "https"):
+            raise ValueError(f"发现来源的地址必须是 http(s) URL: {part}")
+        sources.append((kind, target))
+    if not sources:
+        raise ValueError("未配置任何发现来源")
+    return sources
 
-                    if not doc or not doc.markdown:
-                        raise ValueError("无法获取内容")
-
-                    # 更新进度：正在保存
-                    emit_task_update(index, url, title, "running", 80, elapsed=time.time() - start_time)
-
-                    # 创建安全的文件名（移除可能导致问题的字符）
-                    safe_title = "".join(
-                        c for c in title
-                        if c.isalnum() or c in (' ', '-', '_', '，', '。', '？', '！', '&', ':')
-                    ).rstrip()
-                    safe_title = safe_title[:100]
-                    filename = f"{index:03d}_{safe_title}.md"
-                    filepath = Path(output_dir) / filename
-
-                    # 异步写入文件
-                    content = (
-                        f"# {index}. {title}\n\n"
-                        f"**URL:** {url}\n\n"
-                        f"**抓取时间:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                        "---\n\n"
-                        f"{doc.markdown}"
-                    )
-                    async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-                        await f.write(content)
 
-                    result.success = True
-                    result.elapsed = time.time() - start_time
+def _title_from_url(url: str) -> str:
+    """发现的 URL 没有标题时，用路径最后一段（或主机名）作为标题"""
+    parts = urlsplit(url)
+    segment = unquote(parts.path.rstrip("/").rsplit("/", 1)[-1])
+    return segment or parts.hostname or url
 
-                    if not GUI_MODE:
-                        print(f"[{index}/{total}] ✓ 成功 ({result.elapsed:.1f}s): {filepath.name}")
 
-                    # 发送任务成功状态
-                    emit_task_update(index, url, title, "success", 100, elapsed=result.elapsed)
-                    return result
+async def _sitemap_roots(session: aiohttp.ClientSession, target: str) -> List[str]:
+    """sitemap 来源的入口：地址本身是 sitemap 时直接使用，否则读取 robots.txt 中的 Sitemap 行，默认 /sitemap.xml"""
+    path = urlsplit(target).path.lower()
+    if path.endswith((".xml", ".gz")) or "sitemap" in path:
+        return [target]
+    robots = urljoin(target, "/robots.txt")
+    try:
+        async with session.get(robots) as response:
+            text = await response.text(errors="replace") if response.status == 200 else ""
+    except (ClientError, TimeoutError):
+        text = ""
+    roots = [
+        line.split(":", 1)[1].strip() for line in text.splitlines()
+        if line.lower().startswith("sitemap:") and line.split(":", 1)[1].strip()
+    ]
+    return roots or [urljoin(target, "/sitemap.xml")]
 
-                except (ClientError, asyncio.TimeoutError, ValueError, ConnectionError) as e:
-                    if attempt < RETRY_COUNT - 1:
-                        # 指数退避: 1s, 2s, 4s...
-                        delay = RETRY_DELAY_BASE * (2 ** attempt)
-                        if not GUI_MODE:
-                            print(f"[{index}/{total}] 第{attempt+1}次尝试失败: {str(e)[:100]}，{delay:.1f}秒后重试...")
-                        await asyncio.sleep(delay)
-                    else:
-                        result.error = str(e)
-                        result.elapsed = time.time() - start_time
-                        if not GUI_MODE:
-                            print(f"[{index}/{total}] ❌ 失败: {str(e)[:100]}")
-                        emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
-                        return result
 
-        except asyncio.CancelledError:
-            # 任务被取消（用户点击停止）
-            result.error = "Cancelled by user"
-            result.elapsed = time.time() - start_time
-            if not GUI_MODE:
-                print(f"[{index}/{total}] ⏹ 已取消: {title[:40]}...")
-            emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
-            raise  # 重新抛出以通知 gather
+async def _iter_sitemap(session: aiohttp.ClientSession, url: str, children: List[str]) -> AsyncIterator[tuple[str, Optional[str]]]:
+    """
+    边下载边解析一个 sitemap（支持 gzip 压缩）：urlset 中的页面逐条产出 (URL, 标题)，
+    sitemapindex 中的子 sitemap 追加到 children；标题取自新闻 sitemap 的 news:title
+    """
+    async with session.get(url) as response:
+        response.raise_for_status()
+        parser = ET.XMLPullParser(events=("start", "end"))
+        decompressor = None
+        root = None
+        loc = title = None
+        size = 0
+        first = True
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            if first:
+                first = False
+                # .xml.gz 通常以 application/gzip 返回，不带 Content-Encoding，按内容判断
+                if chunk[:2] == b"\x1f\x8b":
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            size += len(chunk)
+            if size > SITEMAP_MAX_BYTES:
+                raise ValueError(f"sitemap 超过 {SITEMAP_MAX_BYTES // (1024 * 1024)}MB: {url}")
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = element
+                    continue
+                tag = element.tag.rsplit("}", 1)[-1]
+                if tag == "loc":
+                    loc = (element.text or "").strip()
+                elif tag == "title" and "news" in element.tag:
+                    title = (element.text or "").strip() or None
+                elif tag == "url":
+                    if loc:
+                        yield loc, title
+                    loc = title = None
+                elif tag == "sitemap":
+                    if loc:
+                        children.append(urljoin(url, loc))
+                    loc = None
+            if root is not None:
+                root.clear()  # 已处理的条目不再保留在树中
+        parser.close()
 
-        except (ClientError, asyncio.TimeoutError, ValueError, ConnectionError, OSError) as e:
-            result.error = str(e)
-            result.elapsed = time.time() - start_time
+
+async def _iter_sitemap_source(session: aiohttp.ClientSession, target: str) -> AsyncIterator[tuple[str, Optional[str]]]:
+    """按层展开 sitemap 索引，一个 sitemap 出错只提示，不影响同一站点的其他 sitemap"""
+    visited: set = set()
+    pending = deque((root, 0) for root in await _sitemap_roots(session, target))
+    while pending:
+        url, depth = pending.popleft()
+        if url in visited or depth > SITEMAP_MAX_DEPTH:
+            continue
+        visited.add(url)
+        children: List[str] = []
+        try:
+            async with aclosing(_iter_sitemap(session, url, children)) as entries:
+                async for entry in entries:
+                    yield entry
+        except (ClientError, TimeoutError, ET.ParseError, ValueError, zlib.error) as e:
             if not GUI_MODE:
-                print(f"[{index}/{total}] ❌ 异常: {str(e)[:100]}")
-            emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
-            return result
+                print(f"⚠️ 读取 sitemap 失败 {url}: {str(e)[:100] or type(e).__name__}")
+        pending.extend((child, depth + 1) for child in children)
 
-    result.elapsed = time.time() - start_time
-    return result
 
+async def _iter_map_source(target: str) -> AsyncIterator[tuple[str, Optional[str]]]:
+    """Firecrawl map：一次返回站点的 URL 列表（服务端结合 sitemap 与页面链接）"""
+    endpoint = load_endpoints()[0]
+    client = _http_pool.create(endpoint.key or FIRECRAWL_API_KEY, endpoint.url)
+    try:
+        data = await asyncio.wait_for(
+            client.map(target, limit=DISCOVER_LIMIT or None, timeout=int(REQUEST_TIMEOUT * 1000)),
+            timeout=REQUEST_TIMEOUT + REQUEST_TIMEOUT_GRACE
+        )
+    finally:
+        await _http_pool.release(client)
+    for link in data.links or []:
+        if isinstance(link, str):
+            yield link, None
+        elif link.url:
+            yield link.url, link.title or None
 
-async def process_batch(
-    batch: List[tuple],
-    semaphore: asyncio.Semaphore,
-    client: AsyncFirecrawl,
-    total: int
-) -> List[ScrapeResult]:
+
+async def discover_articles(spec: str) -> AsyncIterator[Optional[Dict[str, str]]]:
     """
-    处理一批文章
+    发现阶段：并发运行各来源，发现的 URL 去重、按 DISCOVER_INCLUDE 过滤后立即产出文章条目，
+    爬取在第一个 URL 发现后即开始，不必等待整个站点发现完毕
 
-    Args:
-        batch: 待处理的文章批次
-        semaphore: 并发控制信号量
-        client: Firecrawl 客户端
-        total: 总文章数
+    单个来源失败只提示，不影响其他来源。去重只保留 64 位哈希，百万级 URL 也只占几十 MB。
+    暂时没有新 URL 时产出一次 None，让 ArticleSource 先交出已读取的条目。
 
-    Returns:
-        本批次的爬取结果列表
+    Raises:
+        ValueError: 来源配置或 DISCOVER_INCLUDE 不正确（在迭代开始时抛出）
     """
-    global _running_tasks
+    sources = parse_discover_sources(spec)
+    try:
+        include = re.compile(DISCOVER_INCLUDE) if DISCOVER_INCLUDE else None
+    except re.error as e:
+        raise ValueError(f"DISCOVER_INCLUDE 不是合法的正则表达式: {e}") from e
 
-    # 创建任务并追踪它们
-    coroutines = [
-        scrape_single_article(semaphore, client, index, title, url, total, OUTPUT_DIR)
-        for index, title, url in batch
-    ]
-    tasks = [asyncio.create_task(coro) for coro in coroutines]
+    queue: asyncio.Queue = asyncio.Queue(DISCOVER_QUEUE_SIZE)
+    session = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT),
+        headers={"User-Agent": "Mozilla/5.0 (compatible; firecrawl-scraper)"},
+    )
+
+    async def run(kind: str, target: str) -> None:
+        count = 0
+        try:
+            entries = _iter_sitemap_source(session, target) if kind == "sitemap" else _iter_map_source(target)
+            async with aclosing(entries):
+                async for entry in entries:
+                    await queue.put(entry)
+                    count += 1
+        except Exception as e:
+            if not GUI_MODE:
+                print(f"⚠️ 发现来源 {kind}:{target} 失败: {str(e)[:100] or type(e).__name__}")
+            return
+        if not GUI_MODE:
+            print(f"🔎 发现来源 {kind}:{target} 完成，共 {count} 个 URL")
 
-    # 将任务添加到全局集合
-    _running_tasks.update(tasks)
+    async def finish(tasks: List[asyncio.Task]) -> None:
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await queue.put(None)
 
+    tasks = [asyncio.create_task(run(kind, target)) for kind, target in sources]
+    finisher = asyncio.create_task(finish(tasks))
+    seen: set = set()
+    idle = True  # 上次产出 None 之后还没有产出新条目
     try:
-        # 等待所有任务完成，允许异常传播
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return results
+        while True:
+            if queue.empty() and not idle:
+                idle = True
+                yield None
+            entry = await queue.get()
+            if entry is None:
+                break
+            url, title = entry
+            if include is not None and not include.search(url):
+                continue
+            key = int(dedup_key(url)[:16], 16)
+            if key in seen:
+                continue
+            seen.add(key)
+            idle = False
+            yield {"title": title or _title_from_url(url), "url": url}
+            if DISCOVER_LIMIT and len(seen) >= DISCOVER_LIMIT:
+                break
     finally:
-        # 完成后从全局集合移除
-        _running_tasks.difference_update(tasks)
+        for task in (*tasks, finisher):
+            task.cancel()
+        await asyncio.gather(*tasks, finisher, return_exceptions=True)
+        await session.close()
 
 
-async def process_articles_in_batches(
-    pending_articles: List[tuple],
-    semaphore: asyncio.Semaphore,
-    client: AsyncFirecrawl,
-    total: int
-) -> AsyncIterator[tuple[int, ScrapeResult | Exception]]:
+class RunStateStore:
     """
-    分批处理文章，使用生成器降低内存峰值
+    持久化运行状态（SQLite），按 URL 哈希记录每篇文章的状态、尝试次数、内容哈希与时间戳
 
-    Args:
-        pending_articles: 待处理文章列表
-        semaphore: 并发控制信号量
-        client: Firecrawl 客户端
-        total: 总文章数
-
-    Yields:
-        (批次索引, 结果) 元组
+    断点续传时按 URL 做索引查询，不再扫描输出目录；
+    列表中同一位置的 URL 发生变化时也能正确识别为未完成。
+    查询与写入都在专用的单线程中执行，不阻塞事件循环；写入累计一批（或超过 1 秒）后才提交。
     """
-    global _stop_requested
 
-    for batch_start in range(0, len(pending_articles), BATCH_SIZE):
-        if _stop_requested:
-            break
+    def __init__(self, path: Path):
+        self.path = path
+        self.created = not path.exists()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scrape-state")
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                idx INTEGER,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                content_hash TEXT,
+                filename TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                fetched_at REAL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(articles)")}
+        if "canonical" not in columns:
+            self._conn.execute("ALTER TABLE articles ADD COLUMN canonical TEXT")
+        if "changed_at" not in columns:
+            self._conn.execute("ALTER TABLE articles ADD COLUMN changed_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS articles_canonical ON articles (canonical)")
+        self._conn.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
 
-        batch_end = min(batch_start + BATCH_SIZE, len(pending_articles))
-        batch = pending_articles[batch_start:batch_end]
+    @staticmethod
+    def url_hash(url: str) -> str:
+        return hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
 
-        batch_results = await process_batch(batch, semaphore, client, total)
+    async def completed(self, urls: List[str]) -> Dict[str, tuple]:
+        """
+        批量查询已成功抓取的 URL
 
-        for i, result in enumerate(batch_results):
-            yield (batch_start + i, result)
+        Returns:
+            已成功的 URL 哈希 -> (抓取时间, 内容哈希, 文件名)
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._completed, urls)
 
-        # 批次间短暂休息，让系统有时间释放资源
-        if batch_end < len(pending_articles):
-            await asyncio.sleep(0.1)
+    async def find_completed(self, canonical: str) -> Optional[str]:
+        """按去重键查找已成功抓取的文章，返回其输出文件名"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._find_completed, canonical)
 
+    async def record(
+        self,
+        index: int,
+        url: str,
+        success: bool,
+        attempts: int = 0,
+        content_hash: Optional[str] = None,
+        filename: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        写入一篇文章的抓取结果（累加尝试次数），按批提交
 
-async def main_async():
-    """异步主函数"""
-    global _stop_requested
+        内容哈希与上次不同时更新 changed_at；已成功的条目刷新失败时保留成功状态与原文件，
+        fetched_at 不变，下一轮仍会重新抓取。
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._record, index, url, success, attempts, content_hash, filename, error
+        )
 
-    # 在事件循环中设置异步信号处理器
-    try:
-        loop = asyncio.get_running_loop()
-        setup_async_signal_handlers(loop)
-    except Exception:
-        pass  # 如果失败，使用传统信号处理器
+    async def completed_keys(self) -> AsyncIterator[List[str]]:
+        """分批读出已成功抓取的文章的去重键（按 rowid 翻页，每批一次线程切换）"""
+        after = 0
+        while True:
+            rows = await asyncio.get_running_loop().run_in_executor(self._executor, self._completed_keys, after)
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield [row[1] for row in rows]
 
-    start_time_total = time.time()
+    async def record_completed(self, entries: List[tuple[int, str]]) -> None:
+        """一次写入并提交多条已完成的 (索引, URL)，用于迁移旧版本的完成记录"""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._record_completed, entries)
 
-    # 创建输出目录
-    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+    def _completed(self, urls: List[str]) -> Dict[str, tuple]:
+        hashes = [self.url_hash(url) for url in urls]
+        done: Dict[str, tuple] = {}
+        for start in range(0, len(hashes), STATE_LOOKUP_BATCH):
+            chunk = hashes[start:start + STATE_LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT url_hash, fetched_at, content_hash, filename FROM articles "
+                f"WHERE status = 'success' AND url_hash IN ({placeholders})",
+                chunk,
+            )
+            done.update((row[0], row[1:]) for row in rows)
+        return done
 
-    if not GUI_MODE:
-        print(f"输出目录: {OUTPUT_DIR}")
-        print(f"Firecrawl URL: {FIRECRAWL_URL}")
-        print(f"最大并发数: {MAX_CONCURRENT}")
-        print(f"批次大小: {BATCH_SIZE}")
-        print(f"请求超时: {REQUEST_TIMEOUT}s")
-        print("=" * 70)
+    def _completed_keys(self, after: int) -> List[tuple]:
+        return self._conn.execute(
+            "SELECT rowid, canonical FROM articles WHERE rowid > ? AND status = 'success' AND canonical IS NOT NULL "
+            "ORDER BY rowid LIMIT ?",
+            (after, STATE_KEYS_BATCH),
+        ).fetchall()
 
-    # 检查 API Key 是否配置
-    if not FIRECRAWL_API_KEY:
-        error_msg = "未配置 Firecrawl API Key，请在设置中配置"
-        if GUI_MODE:
-            emit_json({"type": "error", "message": error_msg})
-        else:
-            print(f"❌ 错误: {error_msg}")
-            print("请设置环境变量 FIRECRAWL_API_KEY 或在 GUI 设置中配置")
-        return
+    def _find_completed(self, canonical: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT filename FROM articles WHERE canonical = ? AND status = 'success' AND filename IS NOT NULL LIMIT 1",
+            (canonical,),
+        ).fetchone()
+        return row[0] if row else None
 
-    # 检查文章列表文件是否存在
-    if not os.path.exists(ARTICLES_FILE):
-        error_msg = f"找不到文章列表文件 {ARTICLES_FILE}"
-        if GUI_MODE:
-            emit_json({"type": "error", "message": error_msg})
-        else:
-            print(f"❌ 错误: {error_msg}")
-            print("请先运行 playwright 脚本来提取文章列表")
-        return
+    def _record(
+        self,
+        index: int,
+        url: str,
+        success: bool,
+        attempts: int,
+        content_hash: Optional[str],
+        filename: Optional[str],
+        error: Optional[str],
+    ) -> None:
+        now = time.time()
+        self._conn.execute(
+            """
+            INSERT INTO articles (url_hash, url, canonical, idx, status, attempts, content_hash, filename, error,
+                                  created_at, updated_at, fetched_at, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url_hash) DO UPDATE SET
+                canonical = excluded.canonical,
+                idx = excluded.idx,
+                status = CASE WHEN articles.status = 'success' THEN articles.status ELSE excluded.status END,
+                attempts = articles.attempts + excluded.attempts,
+                changed_at = CASE
+                    WHEN excluded.content_hash IS NOT articles.content_hash AND excluded.content_hash IS NOT NULL
+                    THEN excluded.updated_at ELSE articles.changed_at END,
+                content_hash = COALESCE(excluded.content_hash, articles.content_hash),
+                filename = COALESCE(excluded.filename, articles.filename),
+                error = excluded.error,
+                updated_at = excluded.updated_at,
+                fetched_at = COALESCE(excluded.fetched_at, articles.fetched_at)
+            """,
+            (
+                self.url_hash(url), url, dedup_key(url), index, "success" if success else "failed", attempts,
+                content_hash, filename, error, now, now, now if success else None, now if content_hash else None,
+            ),
+        )
+        self._uncommitted += 1
+        self._commit()
 
-    # 异步加载文章列表
-    try:
-        articles = await load_articles_async()
-    except (ValueError, json.JSONDecodeError) as e:
-        error_msg = str(e)
-        if GUI_MODE:
-            emit_json({"type": "error", "message": error_msg})
-        else:
-            print(f"❌ 错误: {e}")
-        return
+    def _record_completed(self, entries: List[tuple[int, str]]) -> None:
+        for index, url in entries:
+            self._record(index, url, True, 0, None, None, None)
+        self._commit(force=True)
 
-    total = len(articles)
+    def _commit(self, force: bool = False) -> None:
+        """累计足够多的写入或距上次提交超过 1 秒时提交"""
+        if not self._uncommitted:
+            return
+        if force or self._uncommitted >= STATE_COMMIT_BATCH or time.monotonic() - self._last_commit > 1.0:
+            self._conn.commit()
+            self._uncommitted = 0
+            self._last_commit = time.monotonic()
 
-    if not GUI_MODE:
-        print(f"总共需要爬取 {total} 篇文章\n")
+    def close(self) -> None:
+        """等待已提交的读写完成后提交并关闭"""
+        self._executor.shutdown(wait=True)
+        self._commit(force=True)
+        self._conn.close()
 
-    # 异步检查已存在的文件
-    existing_indices = await get_existing_indices(Path(OUTPUT_DIR))
-    existing_count = len(existing_indices)
 
-    # 准备待爬取文章列表
-    pending_articles = [
-        (i + 1, article['title'], article['url'])
-        for i, article in enumerate(articles)
-        if (i + 1) not in existing_indices
-    ]
+def normalize_url(url: str) -> str:
+    """
+    规范化 URL：协议与主机名小写、去掉默认端口、片段 (#...)、末尾斜杠与跟踪参数，查询参数排序
 
-    if not GUI_MODE:
-        if existing_count > 0:
-            print(f"检测到已有 {existing_count} 篇文章，剩余 {len(pending_articles)} 篇待爬取")
-        print(f"实际需要爬取: {len(pending_articles)} 篇文章")
+    仅用于缓存与去重的键，实际请求仍使用原始 URL；无法解析的 URL 原样返回
+    """
+    try:
+        parts = urlsplit(url.strip())
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if port and not (scheme == "http" and port == 80) and not (scheme == "https" and port == 443):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip("/") or "/"
+
+    params = []
+    for pair in parts.query.split("&"):
+        if not pair:
+            continue
+        name = pair.split("=", 1)[0].lower()
+        if name in TRACKING_PARAMS or name.startswith("utm_"):
+            continue
+        params.append(pair)
+    params.sort()
+
+    return urlunsplit((scheme, host, path, "&".join(params), ""))
+
+
+def dedup_key(url: str) -> str:
+    """去重键：规范化 URL 去掉协议后的哈希（http 与 https 视为同一篇文章）"""
+    normalized = normalize_url(url)
+    _, sep, rest = normalized.partition("://")
+    return hashlib.blake2b((rest if sep else normalized).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ScrapeCache:
+    """
+    磁盘响应缓存（SQLite），键为规范化 URL 与抓取参数的哈希，内容 zlib 压缩存储
+
+    - 超过 TTL 的条目视为过期（revalidate / only 模式下仍可作为回退）
+    - 总大小超过上限时按最近访问时间 (LRU) 淘汰
+    - SQLite 读写与压缩/解压都在专用的单线程中执行，不阻塞事件循环，也无需加锁
+    """
+
+    def __init__(self, path: Path, mode: str, ttl: float, max_bytes: int):
+        if mode not in ("use", "revalidate", "only"):
+            raise ValueError(f"不支持的 CACHE_MODE: {mode}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scrape-cache")
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    @staticmethod
+    def key(url: str, options: dict) -> str:
+        raw = normalize_url(url) + "\n" + json.dumps(options, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, url: str, options: dict, allow_stale: bool = False) -> Optional[str]:
+        """
+        读取缓存的 Markdown
+
+        Args:
+            allow_stale: 是否返回超过 TTL 的条目
+
+        Returns:
+            命中时返回内容，否则返回 None
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._get, url, options, allow_stale)
+
+    async def put(self, url: str, options: dict, markdown: str) -> None:
+        """写入（或覆盖）缓存条目，必要时淘汰最久未访问的条目"""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._put, url, options, markdown)
+
+    def _get(self, url: str, options: dict, allow_stale: bool) -> Optional[str]:
+        key = self.key(url, options)
+        row = self._conn.execute("SELECT data, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (not allow_stale and now - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._touch()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def _put(self, url: str, options: dict, markdown: str) -> None:
+        key = self.key(url, options)
+        data = zlib.compress(markdown.encode("utf-8"), 1)
+        now = time.time()
+        old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, url, data, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, url, data, len(data), now, now),
+        )
+        self._size += len(data) - (old[0] if old else 0)
+        if self._size > self.max_bytes:
+            self._evict()
+        self._touch()
+
+    def _evict(self) -> None:
+        """按 LRU 淘汰到上限的 90% 以下"""
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at")
+        victims = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            victims.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def _touch(self) -> None:
+        self._uncommitted += 1
+        if self._uncommitted >= STATE_COMMIT_BATCH or time.monotonic() - self._last_commit > 1.0:
+            self._conn.commit()
+            self._uncommitted = 0
+            self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """等待已提交的读写完成后提交并关闭"""
+        self._executor.shutdown(wait=True)
+        self._conn.commit()
+        self._conn.close()
+
+
+class BloomFilter:
+    """固定大小的布隆过滤器：用于快速判断去重键“肯定未出现过”，避免逐条查询状态库"""
+
+    def __init__(self, bits: int, hashes: int = 7):
+        self._bits = max(bits, 8)
+        self._hashes = hashes
+        self._array = bytearray((self._bits + 7) // 8)
+
+    def _positions(self, key: str):
+        value = int(key, 16)
+        h1 = value & 0xFFFFFFFFFFFFFFFF
+        h2 = (value >> 64) | 1
+        for i in range(self._hashes):
+            yield (h1 + i * h2) % self._bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class UrlDeduplicator:
+    """
+    运行内 URL 去重：规范化后相同的 URL 只爬取一次，结果分发到所有原始索引
+
+    - 与排队中/进行中的条目重复：挂为别名，主条目完成后由 worker 复制结果
+    - 与刚完成的条目重复：从最近完成记录中取得文件名，直接复制已写出的文件
+    - 与更早运行中完成的条目重复：开始过滤前用状态库中已成功条目的去重键预热布隆过滤器，
+      命中后再查询状态库取得文件名
+
+    除布隆过滤器的固定位数组外，内存只与排队中的条目数量相关，与输入规模无关。
+    到期重新抓取的条目不与更早的结果去重（否则只会复制到自己的旧文件）。
+    不传状态库时（分片 worker）只在本进程内去重。
+    """
+
+    def __init__(self, store: Optional[RunStateStore]):
+        self._store = store
+        self._bloom = BloomFilter(DEDUP_BLOOM_BITS)
+        self._pending: Dict[str, int] = {}  # 去重键 -> 排队中/进行中的主条目索引
+        self._aliases: Dict[int, List[Article]] = {}  # 主条目索引 -> 重复条目
+        self._recent: OrderedDict = OrderedDict()  # 去重键 -> 最近成功写出的文件名（可能尚未写入状态库）
+        self.duplicates = 0
+
+    async def filter(self, articles: AsyncIterator[Article]) -> AsyncIterator[Article]:
+        """过滤待爬取条目；已完成的重复条目附带源文件名，交由 worker 复制"""
+        if self._store is not None:
+            async for keys in self._store.completed_keys():
+                for key in keys:
+                    self._bloom.add(key)
+        async with aclosing(articles):
+            async for article in articles:
+                key = dedup_key(article.url)
+
+                primary = self._pending.get(key)
+                if primary is not None:
+                    self._aliases.setdefault(primary, []).append(article)
+                    self.duplicates += 1
+                    continue
+
+                if article.previous is None and key in self._bloom:
+                    filename = self._recent.get(key)
+                    if filename is None and self._store is not None:
+                        filename = await self._store.find_completed(key)
+                    if filename and _article_writer.exists(_output_dir(), filename):
+                        self.duplicates += 1
+                        yield article._replace(copy_from=filename)
+                        continue
+
+                self._bloom.add(key)
+                self._pending[key] = article.index
+                yield article
+
+    def complete(self, index: int, url: str, result: ScrapeResult | BaseException) -> List[Article]:
+        """
+        主条目结束（无论成败）
+
+        Returns:
+            需要分发结果的重复条目列表
+        """
+        key = dedup_key(url)
+        self._pending.pop(key, None)
+        if isinstance(result, ScrapeResult) and result.success and result.filename:
+            self._recent[key] = result.filename
+            if len(self._recent) > DEDUP_RECENT:
+                self._recent.popitem(last=False)
+        return self._aliases.pop(index, [])
+
+
+class ArticleSource:
+    """
+    惰性待爬取来源：边读取文章列表边产出 Article，跳过已成功抓取的 URL
+
+    每读取一批文章做一次状态库查询。读取过程中持续累计数量，读取完毕后 exhausted 为 True，
+    此时 pending 即为本轮待爬取总数。
+
+    设置 REFRESH_AFTER 时，抓取时间早于该期限的已成功条目重新产出，previous 为
+    (上次内容哈希, 上次文件名)，供写出时比较内容是否变化。
+
+    来源可以产出 None 表示暂时没有新条目，此时不等凑满一批，立即查询并交出已读取的条目。
+
+    给出 inbox 时，读取列表期间与读取完毕后持续检查该 JSON Lines 文件新增的行，
+    追加的文章从 INBOX_INDEX_START 起单独编号，不占用列表条目的序号；调用方把已出结果数回填到 completed，
+    全部条目都有结果且没有新增行时结束。
+    """
+
+    def __init__(
+        self,
+        articles: AsyncIterator[Dict[str, str]],
+        store: RunStateStore,
+        inbox: Optional[Path] = None,
+        inbox_busy: Optional[Callable[[], bool]] = None
+    ):
+        self._articles = articles
+        self._store = store
+        self._inbox = inbox
+        self._inbox_busy = inbox_busy  # 返回 True 时追加文件还有进行中的写入，暂不结束
+        self._inbox_offset = 0
+        self._inbox_seen = 0  # 上次读取时的文件长度（含未写完的行）
+        self._started = time.time()
+        self.total = 0  # 已读取的文章数（含追加文件）
+        self._listed = 0  # 已读取的列表条目数，即最后一个列表条目的序号
+        self.pending = 0  # 已产出的待爬取数
+        self.skipped = 0  # 已完成而跳过的文章数
+        self.refreshed = 0  # 已完成但到期、重新抓取的文章数
+        self.added = 0  # 从追加文件读取的文章数
+        self.completed = 0  # 调用方回填的已出结果数
+        self.exhausted = False  # 文章列表已读完（追加文件中仍可能有新条目）
+        self.closed = False  # 已停止检查追加文件，之后追加的行不会再被读取
+
+    def _entry(self, article: Dict[str, str], inbox: bool = False) -> Article:
+        self.total += 1
+        if inbox:
+            self.added += 1
+            index = INBOX_INDEX_START + self.added
+        else:
+            self._listed += 1
+            index = self._listed
+        priority, deadline, timeout = _parse_schedule(index, article, self._started)
+        return Article(
+            index, article['title'], article['url'], priority=priority, deadline=deadline, timeout=timeout
+        )
+
+    async def _resolve(self, batch: List[Article]) -> List[Article]:
+        if not batch:
+            return []
+        done = await self._store.completed([entry.url for entry in batch])
+        cutoff = time.time() - REFRESH_AFTER
+        pending = []
+        for entry in batch:
+            row = done.get(self._store.url_hash(entry.url))
+            if row is not None:
+                fetched_at, content_hash, filename = row
+                if REFRESH_AFTER <= 0 or (fetched_at is not None and fetched_at >= cutoff):
+                    continue
+                self.refreshed += 1
+                entry = entry._replace(previous=(content_hash, filename))
+            pending.append(entry)
+        self.skipped += len(batch) - len(pending)
+        self.pending += len(pending)
+        return pending
+
+    def _read_inbox(self) -> List[Dict[str, str]]:
+        """读取追加文件中新增的完整行，无效的行提示后忽略"""
+        try:
+            with open(self._inbox, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self._inbox_offset:
+                    self._inbox_offset = 0  # 文件被截断或替换，从头读取
+                f.seek(self._inbox_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        end = data.rfind(b"\n") + 1  # 只处理已写完整的行
+        self._inbox_seen = self._inbox_offset + len(data)
+        self._inbox_offset += end
+        articles = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            index = INBOX_INDEX_START + self.added + len(articles) + 1
+            try:
+                article = _validate_article(index, json.loads(line))
+                _parse_schedule(index, article, self._started)
+                articles.append(article)
+            except ValueError as e:
+                if not GUI_MODE:
+                    print(f"⚠️ 追加文件中的条目无效，已忽略: {e}")
+        return articles
+
+    async def _poll_inbox(self) -> List[Article]:
+        articles = await asyncio.to_thread(self._read_inbox)
+        return await self._resolve([self._entry(article, inbox=True) for article in articles])
+
+    async def __aiter__(self) -> AsyncIterator[Article]:
+        batch: List[Article] = []
+        next_poll = time.monotonic() + INBOX_POLL_INTERVAL
+        async with aclosing(self._articles):
+            async for article in self._articles:
+                if article is None:
+                    # 来源暂时没有新条目（发现阶段等待网络）：不等凑满一批，先交出已读取的条目
+                    for item in await self._resolve(batch):
+                        yield item
+                    batch = []
+                    continue
+                batch.append(self._entry(article))
+                if len(batch) >= STATE_LOOKUP_BATCH:
+                    for item in await self._resolve(batch):
+                        yield item
+                    batch = []
+                if self._inbox is not None and time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + INBOX_POLL_INTERVAL
+                    for item in await self._poll_inbox():
+                        yield item
+        for item in await self._resolve(batch):
+            yield item
+        self.exhausted = True
+
+        # 列表读完后继续检查追加文件，直到所有条目都有结果
+        while self._inbox is not None and not _stop_requested and not _misses_deadline(_run_deadline.get(), 0.0):
+            items = await self._poll_inbox()
+            for item in items:
+                yield item
+            if not items:
+                if self.completed >= self.pending and not self._inbox_grew() and not (self._inbox_busy and self._inbox_busy()):
+                    break
+                await asyncio.sleep(INBOX_POLL_INTERVAL)
+        self.closed = True
+
+    def _inbox_grew(self) -> bool:
+        """读取线程返回后追加文件是否又有新内容（在事件循环中检查，之后 closed 置位前不再让出）"""
+        try:
+            return self._inbox.stat().st_size > self._inbox_seen
+        except OSError:
+            return False
+
+
+async def get_existing_indices(output_dir: Path) -> set[int]:
+    """
+    异步获取已存在文件的索引集合（仅用于从旧版本迁移到状态库）
+
+    Args:
+        output_dir: 输出目录
+
+    Returns:
+        已存在文件的索引集合
+    """
+    # 使用 asyncio.to_thread 包装同步的 glob 操作
+    pattern = "*/*.md" if OUTPUT_SUBDIR_SIZE > 0 else "*.md"
+    existing_files = await asyncio.to_thread(lambda: list(output_dir.glob(pattern)))
+
+    existing_indices: set[int] = set()
+    for file in existing_files:
+        try:
+            idx = int(file.name.split("_", 1)[0])
+            existing_indices.add(idx)
+        except (ValueError, IndexError):
+            pass
+
+    return existing_indices
+
+
+async def migrate_legacy_state(store: RunStateStore) -> int:
+    """
+    新建状态库时按旧版本的文件名序号一次性迁移完成记录（仅适用于 ARTICLES_FILE）
+
+    在开始爬取前读完整个文章列表，本轮提前停止也不会遗漏尚未读到的条目
+
+    Returns:
+        迁移的条目数
+    """
+    legacy_indices = await get_existing_indices(_output_dir())
+    if not legacy_indices:
+        return 0
+    migrated = 0
+    entries: List[tuple[int, str]] = []
+    async with aclosing(iter_articles_async()) as articles:
+        index = 0
+        async for article in articles:
+            index += 1
+            if index in legacy_indices:
+                entries.append((index, article['url']))
+                if len(entries) >= STATE_COMMIT_BATCH:
+                    await store.record_completed(entries)
+                    migrated += len(entries)
+                    entries = []
+    if entries:
+        await store.record_completed(entries)
+        migrated += len(entries)
+    return migrated
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制器，替代固定的 asyncio.Semaphore
+
+    - 加性增长：p50 延迟相对基线保持平稳且并发已被用满时，上限 +1
+    - 乘性回退：超时、429、5xx 等过载信号出现时，上限乘以回退系数
+    - min_limit == max_limit 时退化为固定并发的信号量
+
+    用法与信号量一致: ``async with limiter: ...``
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+        self._latencies: deque = deque(maxlen=ADAPTIVE_LATENCY_WINDOW)
+        self._samples_since_update = 0
+        self._baseline_p50: Optional[float] = None
+        self._last_backoff = 0.0
+
+    @property
+    def adaptive(self) -> bool:
+        return self.min_limit != self.max_limit
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    @property
+    def p50(self) -> Optional[float]:
+        if not self._latencies:
+            return None
+        return statistics.median(self._latencies)
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._cond:
+            self.in_flight -= 1
+            # 上限可能刚被调高，一次唤醒所有可用槽位
+            self._cond.notify(max(1, self.limit - self.in_flight))
+        return False
+
+    def record_success(self, latency: float) -> None:
+        """记录一次成功请求的延迟，每累计约一个窗口（当前上限个样本）评估一次"""
+        # 固定并发时也保留延迟样本，用于预计条目能否赶上截止时间
+        self._latencies.append(latency)
+        if not self.adaptive:
+            return
+
+        self._samples_since_update += 1
+        if self._samples_since_update < max(self.limit, ADAPTIVE_MIN_SAMPLES):
+            return
+        self._samples_since_update = 0
+
+        p50 = self.p50
+        if self._baseline_p50 is None or p50 < self._baseline_p50:
+            self._baseline_p50 = p50
+        else:
+            # 基线缓慢跟随，适应目标站点整体变慢的情况
+            self._baseline_p50 = self._baseline_p50 * 0.99 + p50 * 0.01
+
+        if p50 <= self._baseline_p50 * ADAPTIVE_LATENCY_TOLERANCE:
+            # 只有并发已被用满时增长才有意义
+            if self.in_flight >= self.limit - 1:
+                self._limit = min(self._limit + 1, self.max_limit)
+        else:
+            # 延迟明显上升：服务端开始排队，温和回退
+            self._limit = max(self._limit * 0.9, self.min_limit)
+
+    def record_overload(self) -> None:
+        """记录过载信号（超时 / 429 / 5xx），每个冷却期内最多回退一次"""
+        if not self.adaptive:
+            return
+
+        now = time.monotonic()
+        cooldown = self.p50 or 1.0
+        if now - self._last_backoff < cooldown:
+            return
+        self._last_backoff = now
+        self._limit = max(self._limit * ADAPTIVE_BACKOFF_RATIO, self.min_limit)
+        self._samples_since_update = 0
+
+
+def create_limiter() -> AdaptiveLimiter:
+    """创建并发限制器（关闭自适应时等价于固定并发的信号量）"""
+    if ADAPTIVE_CONCURRENCY:
+        return AdaptiveLimiter(MAX_CONCURRENT, ADAPTIVE_MIN_CONCURRENT, ADAPTIVE_MAX_CONCURRENT)
+    return AdaptiveLimiter(MAX_CONCURRENT, MAX_CONCURRENT, MAX_CONCURRENT)
+
+
+class FairLimiter:
+    """
+    守护模式下多个任务共享的全局并发上限
+
+    上限仍由包装的 AdaptiveLimiter 按延迟与过载信号调整；空出的槽位在有等待者的任务之间轮流分配，
+    积压很多的任务不会让后提交的任务饿死。
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.limiter = limiter
+        self._waiters: "OrderedDict[str, deque]" = OrderedDict()  # 任务 ID -> 等待中的 Future
+
+    def share(self, key: str) -> "_FairShare":
+        """某个任务使用的限制器视图"""
+        return _FairShare(self, key)
+
+    async def acquire(self, key: str) -> None:
+        limiter = self.limiter
+        if not self._waiters and limiter.in_flight < limiter.limit:
+            limiter.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        self._grant()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # 分到槽位后、开始使用前被取消
+            raise
+
+    def release(self) -> None:
+        self.limiter.in_flight -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        """按任务轮流唤醒等待者，直到用满当前上限"""
+        limiter = self.limiter
+        while self._waiters and limiter.in_flight < limiter.limit:
+            key, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if future.done():
+                continue  # 等待方已被取消
+            limiter.in_flight += 1
+            future.set_result(None)
+
+
+class _FairShare:
+    """单个任务的并发份额：用法与 AdaptiveLimiter 相同，延迟与过载信号反馈给共享的限制器"""
+
+    def __init__(self, fair: FairLimiter, key: str):
+        self._fair = fair
+        self._key = key
+        self.in_flight = 0  # 本任务占用的槽位数
+
+    async def __aenter__(self):
+        await self._fair.acquire(self._key)
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._fair.release()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._fair.limiter, name)
+
+
+def _is_overload_error(error: BaseException) -> bool:
+    """判断异常是否代表服务端过载（超时、429、5xx、连接失败）"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, ClientError, TransportError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+class EmptyContentError(ValueError):
+    """Firecrawl 返回成功但没有正文，重试通常也无法得到内容"""
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """读取异常所附响应的 Retry-After 头（秒数或 HTTP 日期），没有时返回 None"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    try:
+        value = headers.get("retry-after")
+    except (AttributeError, TypeError):
+        return None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def classify_error(error: BaseException) -> tuple[bool, Optional[float]]:
+    """
+    判断一次失败是否值得重试
+
+    - 超时、连接错误、408/425/429/5xx：暂时性错误，可重试
+    - 其余 4xx、空正文、本地文件写入失败：永久性错误，立即失败
+    - 其他未知异常（如 Firecrawl 返回 success=false）：按暂时性处理
+
+    Returns:
+        (是否可重试, 服务端通过 Retry-After 要求的等待秒数)
+    """
+    if isinstance(error, EmptyContentError):
+        return False, None
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, ClientError, TransportError)):
+        return True, _retry_after(error)
+    if isinstance(error, OSError):
+        return False, None
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        retryable = status_code in RETRY_STATUS_CODES or status_code >= 500
+        return retryable, _retry_after(error) if retryable else None
+    return True, None
+
+
+def _error_class(error: BaseException) -> str:
+    """指标中使用的错误分类"""
+    if isinstance(error, EmptyContentError):
+        return "empty"
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, TimeoutException)):
+        return "timeout"
+    if isinstance(error, (ConnectionError, ClientError, TransportError)):
+        return "connection"
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return f"http_{status_code}"
+    if isinstance(error, OSError):
+        return "io"
+    return "other"
+
+
+def _result_error_class(result: ScrapeResult) -> str:
+    """失败结果的错误分类；批量与分片模式只有错误信息时按停止 / 其他归类"""
+    if result.error_class:
+        return result.error_class
+    if result.error in ("Stopped by user", "Cancelled by user"):
+        return "cancelled"
+    return "other"
+
+
+def _backoff_delay(previous: float) -> float:
+    """去相关抖动退避：在 [基础延迟, 上次延迟 × 3] 间随机取值，不超过 RETRY_DELAY_MAX"""
+    return min(RETRY_DELAY_MAX, random.uniform(RETRY_DELAY_BASE, max(previous, RETRY_DELAY_BASE) * 3))
+
+
+class FailureLog:
+    """
+    本轮失败文章的流式记录
+
+    每条失败追加一行到 输出目录/failures.jsonl（index、url、title、error、errorClass、attempts），
+    内存中只保留按错误分类的计数与每类前 FAILURE_SAMPLES 条样例；失败再多，内存占用与 complete 事件的大小也不变。
+    记录先在内存中缓冲，每 FAILURE_FLUSH_BATCH 条、分页读取前与关闭时在线程中写入文件，不阻塞事件循环。
+    本轮没有失败时删除上一轮留下的文件。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+        self._buffer: List[str] = []  # 尚未写入文件的行
+        self._lock = asyncio.Lock()  # 文件写入与读取依次进行，保持记录顺序
+        self.count = 0
+        self._classes: Dict[str, int] = {}
+        self._samples: Dict[str, List[dict]] = {}
+
+    async def add(self, result: ScrapeResult) -> None:
+        error_class = _result_error_class(result)
+        record = {
+            "index": result.index,
+            "url": result.url,
+            "title": result.title,
+            "error": result.error or "Unknown error",
+            "errorClass": error_class,
+            "attempts": result.attempts,
+        }
+        self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+        self._classes[error_class] = self._classes.get(error_class, 0) + 1
+        samples = self._samples.setdefault(error_class, [])
+        if len(samples) < FAILURE_SAMPLES:
+            samples.append(record)
+        if len(self._buffer) >= FAILURE_FLUSH_BATCH:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """把缓冲的记录写入文件"""
+        async with self._lock:
+            if self._buffer:
+                text, self._buffer = "".join(self._buffer), []
+                await asyncio.to_thread(self._write, text)
+
+    def _write(self, text: str) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(text)
+        self._file.flush()
+
+    def summary(self) -> List[dict]:
+        """按错误分类汇总，数量多的在前"""
+        return [
+            {"errorClass": name, "count": count, "samples": self._samples[name]}
+            for name, count in sorted(self._classes.items(), key=lambda item: -item[1])
+        ]
+
+    def samples(self) -> List[dict]:
+        """各分类的样例，按 index 排序"""
+        return sorted((record for records in self._samples.values() for record in records), key=lambda r: r["index"])
+
+    async def page(self, offset: int, limit: int) -> List[dict]:
+        """分页读取失败记录（按完成顺序）；翻到靠后的页需要逐行跳过，在线程中读取"""
+        await self.flush()
+        async with self._lock:
+            return await asyncio.to_thread(self._page, offset, limit)
+
+    def _page(self, offset: int, limit: int) -> List[dict]:
+        records = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for number, line in enumerate(f):
+                    if number >= offset + limit:
+                        break
+                    if number >= offset:
+                        records.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        return records
+
+    async def close(self) -> None:
+        await self.flush()
+        async with self._lock:
+            await asyncio.to_thread(self._close)
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self.count == 0:
+            self.path.unlink(missing_ok=True)
+
+
+class RetryBudget:
+    """
+    本轮的重试预算
+
+    重试总次数不超过 首次请求数 × RETRY_BUDGET + RETRY_BUDGET_MIN，
+    上游整体故障时不会因每篇文章各自重试而把请求量放大数倍。
+    """
+
+    def __init__(self, ratio: float, minimum: int):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def record_request(self) -> None:
+        """登记一次首次请求"""
+        self.requests += 1
+
+    def try_acquire(self) -> bool:
+        """申请一次重试，预算用尽时返回 False"""
+        if self.retries < self.minimum + self.ratio * self.requests:
+            self.retries += 1
+            return True
+        self.denied += 1
+        return False
+
+
+@dataclass
+class RetryState:
+    """单篇文章跨多次尝试的重试状态，随延迟重试的条目一起排队"""
+    started: float  # 首次开始时间
+    attempts: int = 0
+    delay: float = 0.0  # 上一次退避时长
+    trace_id: str = field(default_factory=lambda: f"{random.getrandbits(128):032x}")  # 各次尝试的 span 共用
+
+
+@dataclass
+class EndpointConfig:
+    """单个 Firecrawl 实例的配置"""
+    url: str
+    weight: float = 1.0
+    key: str = ""
+
+
+def load_endpoints() -> List[EndpointConfig]:
+    """
+    解析 FIRECRAWL_URL：单个地址、逗号分隔的多个地址，
+    或 JSON 数组 [{"url": "...", "weight": 2, "key": "..."}]（数组元素也可以是地址字符串）
+
+    Raises:
+        ValueError: 配置格式错误
+    """
+    raw = FIRECRAWL_URL.strip()
+    if raw.startswith("["):
+        try:
+            items = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"FIRECRAWL_URL 不是合法的 JSON: {e}") from e
+    else:
+        items = [part.strip() for part in raw.split(",") if part.strip()]
+
+    endpoints = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"url": item}
+        if not isinstance(item, dict) or not isinstance(item.get("url"), str):
+            raise ValueError(f"FIRECRAWL_URL 条目格式错误: {item!r}")
+        try:
+            weight = float(item.get("weight", 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"FIRECRAWL_URL 中 {item['url']} 的 weight 必须为数字")
+        if weight <= 0:
+            raise ValueError(f"FIRECRAWL_URL 中 {item['url']} 的 weight 必须大于 0")
+        endpoints.append(EndpointConfig(item["url"].rstrip("/"), weight, str(item.get("key") or "")))
+    if not endpoints:
+        raise ValueError("FIRECRAWL_URL 未配置任何地址")
+    return endpoints
+
+
+class _PooledHttpClient(AsyncHttpClient):
+    """
+    SDK 请求客户端的连接池版本
+
+    与 SDK 的 AsyncHttpClient 接口相同，但自带按连接数上限保留空闲连接（可选 HTTP/2）的 httpx 客户端；
+    新建连接与等待空闲连接的请求经 httpx 的 trace 扩展统计，不改动 SDK 与 httpx 的内部实现。
+
+    httpcore 的连接池每次分配连接都要遍历池中全部连接与请求，单个池保留上百个连接时 CPU 开销随并发
+    平方增长；HTTP/1.1 时把连接数上限拆给多个每个 HTTP_POOL_SHARD 个连接的 httpx 客户端，
+    请求交给进行中请求最少的一个。HTTP/2 时多个请求复用少量连接，使用单个客户端。
+    """
+
+    def __init__(self, pool: "FirecrawlHttpPool", api_key: Optional[str], api_url: str, size: int):
+        # 不调用父类构造：父类会创建不保留连接的 httpx 客户端，这里只沿用其接口
+        self.api_key = api_key
+        self.api_url = api_url
+        self._pool = pool
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        shards = 1 if pool.http2 else -(-size // HTTP_POOL_SHARD)
+        per_shard = -(-size // shards)
+        self._shards = [
+            httpx.AsyncClient(
+                base_url=api_url,
+                headers=headers,
+                limits=httpx.Limits(
+                    max_connections=per_shard, max_keepalive_connections=per_shard, keepalive_expiry=pool.keepalive_expiry
+                ),
+                http2=pool.http2,
+            )
+            for _ in range(shards)
+        ]
+        self._active = [0] * shards  # 各客户端进行中的请求数
+
+    @property
+    def active(self) -> int:
+        return sum(self._active)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(http.aclose() for http in self._shards))
+
+    async def _request(self, method: str, endpoint: str, headers: Optional[Dict[str, str]], timeout: Optional[float],
+                       **kwargs) -> httpx.Response:
+        pool = self._pool
+        waiting = True
+
+        async def trace(event: str, info: dict) -> None:
+            # 分到连接（新建或复用）之前的请求在连接池中排队
+            nonlocal waiting
+            if waiting and (event.startswith("connection.connect_") or event.endswith(".send_request_headers.started")):
+                waiting = False
+                pool.queued -= 1
+            if event.startswith("connection.connect_") and event.endswith(".complete"):
+                pool.opened += 1
+
+        shard = min(range(len(self._shards)), key=self._active.__getitem__)
+        pool.requests += 1
+        pool.queued += 1
+        self._active[shard] += 1
+        try:
+            return await self._shards[shard].request(
+                method, endpoint, headers=headers, timeout=timeout, extensions={"trace": trace}, **kwargs
+            )
+        finally:
+            self._active[shard] -= 1
+            if waiting:
+                pool.queued -= 1
+
+    async def post(self, endpoint: str, data: Dict, headers: Optional[Dict[str, str]] = None,
+                   timeout: Optional[float] = None) -> httpx.Response:
+        # 与 SDK 相同，请求体附带 SDK 版本来源
+        payload = {**data, "origin": f"python-sdk@{firecrawl.__version__}"}
+        return await self._request("POST", endpoint, headers, timeout, json=payload)
+
+    async def get(self, endpoint: str, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        return await self._request("GET", endpoint, headers, timeout)
+
+    async def delete(self, endpoint: str, headers: Optional[Dict[str, str]] = None,
+                     timeout: Optional[float] = None) -> httpx.Response:
+        return await self._request("DELETE", endpoint, headers, timeout)
+
+
+class FirecrawlHttpPool:
+    """
+    到 Firecrawl 实例的 HTTP 连接池
+
+    SDK 自带的 httpx 客户端不保留空闲连接（max_keepalive_connections=0），每个请求都重新建立 TCP 连接，
+    高并发时握手开销大且大量连接停留在 TIME_WAIT。这里为每个实例创建 v2 客户端，并通过其公开的
+    async_http_client 属性传入按并发上限配置连接池的请求客户端，空闲连接保留 HTTP_KEEPALIVE_EXPIRY 秒复用；
+    客户端由这里创建，也由这里关闭。
+    """
+
+    def __init__(self, keepalive_expiry: float, http2: bool):
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and h2 is not None
+        self._clients: Dict[int, _PooledHttpClient] = {}  # id(客户端) -> 传入的请求客户端
+        self.requests = 0
+        self.queued = 0  # 等待空闲连接的请求数，持续大于 0 说明连接数上限偏小
+        self.opened = 0  # 累计新建连接数，远小于请求数说明连接得到复用
+
+    @staticmethod
+    def size() -> int:
+        """每个实例的连接数上限：默认等于并发上限，开启对冲时留出对冲请求的余量"""
+        if HTTP_MAX_CONNECTIONS > 0:
+            return HTTP_MAX_CONNECTIONS
+        size = ADAPTIVE_MAX_CONCURRENT if ADAPTIVE_CONCURRENCY else MAX_CONCURRENT
+        if HEDGE:
+            size += int(size * HEDGE_MAX_RATIO) + 1
+        return size
+
+    @property
+    def active(self) -> int:
+        """进行中的请求数"""
+        return sum(http.active for http in self._clients.values())
+
+    def create(self, api_key: str, api_url: str) -> AsyncFirecrawlClient:
+        # AsyncFirecrawl 的 scrape 等方法直接转发给 v2 客户端，这里直接创建 v2 客户端
+        client = AsyncFirecrawlClient(api_key=api_key, api_url=api_url)
+        http = _PooledHttpClient(self, api_key, api_url, self.size())
+        client.async_http_client = http
+        self._clients[id(client)] = http
+        return client
+
+    def stats(self) -> dict:
+        """连接数上限、进行中与排队的请求数、累计请求数与新建连接数（所有实例合计）"""
+        return {
+            "size": self.size(),
+            "active": self.active,
+            "queued": self.queued,
+            "requests": self.requests,
+            "opened": self.opened,
+        }
+
+    async def release(self, client: AsyncFirecrawlClient) -> None:
+        """关闭该客户端的连接池"""
+        http = self._clients.pop(id(client), None)
+        if http is not None:
+            await http.close()
+
+
+_http_pool = FirecrawlHttpPool(HTTP_KEEPALIVE_EXPIRY, HTTP2)
+
+
+class _Endpoint:
+    """端点池中的一个实例：进行中请求数与被动健康状态"""
+
+    def __init__(self, config: EndpointConfig, client: AsyncFirecrawlClient):
+        self.url = config.url
+        self.weight = config.weight
+        self.client = client
+        self.outstanding = 0
+        self.failures = 0  # 连续失败次数
+        self.open_until = 0.0  # 熔断截止时间（monotonic），0 表示闭合
+        self.cooldown = CIRCUIT_COOLDOWN
+        self.probing = False  # 半开状态下是否已有探测请求
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        if self.open_until == 0:
+            return True
+        # 冷却结束后进入半开状态，只放行一个探测请求
+        return now >= self.open_until and not self.probing
+
+    def record_success(self):
+        if self.open_until and not GUI_MODE:
+            print(f"✓ Firecrawl 实例 {self.url} 已恢复")
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = CIRCUIT_COOLDOWN
+        self.probing = False
+
+    def record_failure(self):
+        self.errors += 1
+        self.failures += 1
+        if self.probing or self.failures >= CIRCUIT_FAILURES:
+            if self.probing:
+                self.cooldown = min(self.cooldown * 2, CIRCUIT_MAX_COOLDOWN)
+            self.open_until = time.monotonic() + self.cooldown
+            self.probing = False
+            if not GUI_MODE:
+                print(f"⚠️  Firecrawl 实例 {self.url} 连续失败，熔断 {self.cooldown:g}s")
+
+
+class FirecrawlPool:
+    """
+    多个 Firecrawl 实例组成的端点池，接口与 AsyncFirecrawl 中用到的部分一致
+
+    - 按 (进行中请求数 + 1) / 权重 最小选择实例（least-outstanding）
+    - 被动健康检查：超时、连接失败、429、5xx 计为失败，连续 CIRCUIT_FAILURES 次后熔断；
+      冷却结束后放行一个探测请求，成功则恢复，失败则冷却时间翻倍
+    - 所有实例都熔断时等待最早恢复的实例
+    - 批量任务记录所属实例，后续状态查询与取消路由到同一实例
+    """
+
+    def __init__(self, endpoints: List[EndpointConfig], api_key: str):
+        self._endpoints = [
+            _Endpoint(config, _http_pool.create(config.key or api_key, config.url))
+            for config in endpoints
+        ]
+        self._job_owner: Dict[str, _Endpoint] = {}  # 批量任务 ID -> 所属实例
+        self._job_load: Dict[str, int] = {}  # 未结束的批量任务 ID -> URL 数
+
+    async def _acquire(self, avoid: Optional[set] = None) -> _Endpoint:
+        while True:
+            now = time.monotonic()
+            candidates = [ep for ep in self._endpoints if ep.available(now)]
+            if avoid:
+                candidates = [ep for ep in candidates if ep.url not in avoid] or candidates
+            if candidates:
+                endpoint = min(candidates, key=lambda ep: (ep.outstanding + 1) / ep.weight)
+                if endpoint.open_until:
+                    endpoint.probing = True
+                return endpoint
+            # 所有实例都处于熔断中（或半开探测中）：等待最早恢复的实例
+            reopen = min(ep.open_until for ep in self._endpoints)
+            await asyncio.sleep(max(reopen - now, 0.1))
+
+    def _record(self, endpoint: _Endpoint, error: Optional[BaseException] = None):
+        if error is None or not _is_overload_error(error):
+            # 非过载错误（如目标页面无内容）说明实例本身正常
+            endpoint.record_success()
+        else:
+            endpoint.record_failure()
+
+    async def _call(self, endpoint: _Endpoint, weight: int, coro, timeout: Optional[float] = None):
+        endpoint.outstanding += weight
+        endpoint.requests += 1
+        started = time.monotonic()
+        try:
+            result = await coro
+        except asyncio.CancelledError:
+            # 外层 wait_for 超时表现为取消；已耗尽超时时间的请求按超时计入失败
+            if time.monotonic() - started >= (timeout or REQUEST_TIMEOUT) * 0.95:
+                endpoint.record_failure()
+            elif endpoint.probing:
+                endpoint.probing = False
+            raise
+        except Exception as e:
+            self._record(endpoint, e)
+            raise
+        finally:
+            endpoint.outstanding -= weight
+        self._record(endpoint)
+        return result
+
+    async def scrape(self, url: str, avoid: Optional[set] = None, **kwargs):
+        """
+        Args:
+            avoid: 对冲请求共享的已用实例集合；优先选择其中以外的实例，并登记本次选中的实例
+        """
+        endpoint = await self._acquire(avoid)
+        if avoid is not None:
+            avoid.add(endpoint.url)
+        timeout = kwargs.get("timeout")
+        return await self._call(endpoint, 1, endpoint.client.scrape(url, **kwargs), timeout / 1000 if timeout else None)
+
+    async def start_batch_scrape(self, urls: List[str], **kwargs):
+        endpoint = await self._acquire()
+        job = await self._call(endpoint, 0, endpoint.client.start_batch_scrape(urls, **kwargs))
+        # 批量任务的 URL 计入实例的进行中数量，直到任务结束
+        self._job_owner[job.id] = endpoint
+        self._job_load[job.id] = len(urls)
+        endpoint.outstanding += len(urls)
+        return job
+
+    def _finish_job(self, job_id: str):
+        load = self._job_load.pop(job_id, 0)
+        self._job_owner[job_id].outstanding -= load
+
+    async def get_batch_scrape_status(self, job_id: str, pagination_config=None):
+        endpoint = self._job_owner[job_id]
+        status = await self._call(endpoint, 0, endpoint.client.get_batch_scrape_status(job_id, pagination_config))
+        if status.status in ("completed", "failed", "cancelled"):
+            self._finish_job(job_id)
+        return status
+
+    async def get_batch_scrape_errors(self, job_id: str):
+        return await self._job_owner[job_id].client.get_batch_scrape_errors(job_id)
+
+    async def cancel_batch_scrape(self, job_id: str) -> bool:
+        endpoint = self._job_owner[job_id]
+        try:
+            return await endpoint.client.cancel_batch_scrape(job_id)
+        finally:
+            self._finish_job(job_id)
+
+    def stats(self) -> List[dict]:
+        """各实例的请求数、失败数与熔断状态"""
+        now = time.monotonic()
+        return [
+            {"url": ep.url, "requests": ep.requests, "errors": ep.errors, "open": ep.open_until > now}
+            for ep in self._endpoints
+        ]
+
+    async def close(self):
+        for endpoint in self._endpoints:
+            await _http_pool.release(endpoint.client)
+
+
+class HedgedClient:
+    """
+    对冲请求包装：scrape 超过近期延迟的 HEDGE_PERCENTILE 分位数仍未返回时，
+    再发出一个相同请求（端点池时优先发往另一个实例），取先成功的结果并取消另一个
+
+    对冲请求数不超过总请求数的 HEDGE_MAX_RATIO；其余方法原样转发给内部客户端。
+    """
+
+    def __init__(self, client: AsyncFirecrawlClient | FirecrawlPool):
+        self.client = client
+        self._latencies: deque = deque(maxlen=HEDGE_WINDOW)
+        self._threshold: Optional[float] = None
+        self._new_samples = 0
+        self.requests = 0
+        self.hedges = 0  # 已发出的对冲请求数
+        self.hedge_wins = 0  # 对冲请求先完成的次数
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _record(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._new_samples += 1
+        # 每积累一批新样本重新计算一次阈值，避免每个请求都排序
+        if len(self._latencies) >= HEDGE_MIN_SAMPLES and self._new_samples >= HEDGE_MIN_SAMPLES:
+            samples = sorted(self._latencies)
+            rank = min(int(len(samples) * HEDGE_PERCENTILE / 100), len(samples) - 1)
+            self._threshold = max(samples[rank], HEDGE_MIN_DELAY)
+            self._new_samples = 0
+
+    def _may_hedge(self) -> bool:
+        return self.hedges + 1 <= self.requests * HEDGE_MAX_RATIO
+
+    def _request(self, url: str, avoid: Optional[set], kwargs: dict):
+        if avoid is not None:
+            return self.client.scrape(url, avoid=avoid, **kwargs)
+        return self.client.scrape(url, **kwargs)
+
+    async def _timed(self, url: str, avoid: Optional[set], kwargs: dict):
+        started = time.monotonic()
+        doc = await self._request(url, avoid, kwargs)
+        self._record(time.monotonic() - started)
+        return doc
+
+    async def scrape(self, url: str, **kwargs):
+        self.requests += 1
+        avoid = set() if isinstance(self.client, FirecrawlPool) else None
+        primary = asyncio.create_task(self._timed(url, avoid, kwargs))
+        tasks = [primary]
+        try:
+            threshold = self._threshold
+            if threshold is None:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if done or not self._may_hedge():
+                return await primary
+
+            self.hedges += 1
+            tasks.append(asyncio.create_task(self._timed(url, avoid, kwargs)))
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            # 两个请求都失败时抛出先出现的错误
+            raise error
+        finally:
+            # 取消未完成的一方（包括外层超时取消整个调用的情况）
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def create_firecrawl_client(endpoints: List[EndpointConfig]) -> AsyncFirecrawlClient | FirecrawlPool | HedgedClient:
+    """单个实例直接使用 Firecrawl 客户端，多个实例使用端点池；开启 HEDGE 时再包装对冲请求"""
+    if len(endpoints) == 1:
+        client = _http_pool.create(endpoints[0].key or FIRECRAWL_API_KEY, endpoints[0].url)
+    else:
+        client = FirecrawlPool(endpoints, FIRECRAWL_API_KEY)
+    return HedgedClient(client) if HEDGE else client
+
+
+def _render_article(index: int, title: str, url: str, markdown: str, scraped_at: str) -> str:
+    """Markdown 文件内容：标题、URL、抓取时间头部 + 正文"""
+    return (
+        f"# {index}. {title}\n\n"
+        f"**URL:** {url}\n\n"
+        f"**抓取时间:** {scraped_at}\n\n"
+        "---\n\n"
+        f"{markdown}"
+    )
+
+
+def _article_filename(index: int, title: str) -> str:
+    """files 模式下的相对路径；设置 OUTPUT_SUBDIR_SIZE 时按索引放入子目录"""
+    # 创建安全的文件名（移除可能导致问题的字符）
+    safe_title = "".join(
+        c for c in title
+        if c.isalnum() or c in (' ', '-', '_', '，', '。', '？', '！', '&', ':')
+    ).rstrip()
+    safe_title = safe_title[:100]
+    filename = f"{index:03d}_{safe_title}.md"
+    if OUTPUT_SUBDIR_SIZE > 0:
+        return f"{index // OUTPUT_SUBDIR_SIZE:03d}/{filename}"
+    return filename
+
+
+_BOILERPLATE_LINE = re.compile(
+    r"cookie|subscribe to|sign up for|share (this|on)|skip to (main )?content|all rights reserved|privacy policy|^(©|copyright\b)"
+    r"|订阅|分享到|版权所有|隐私政策",
+    re.IGNORECASE,
+)
+_LINK_ONLY_LINE = re.compile(r"^(\s*[-*|•·]?\s*!?\[[^\]]*\]\([^)]*\)){2,}\s*[-*|•·]?\s*$")
+_MARKDOWN_LINK = re.compile(r"(?<!!)\[([^\]]*)\]\((\S+?)(?:\s+\"[^\"]*\")?\)")
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_CJK_CHAR = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+_LATIN_WORD = re.compile(r"[^\W\u3400-\u9fff\uf900-\ufaff]+")
+
+
+def _strip_boilerplate(markdown: str, artifacts: Dict[str, List[dict]]) -> str:
+    """删除样板行：只由多个链接组成的导航行，以及含 Cookie、订阅、分享、版权等字样的短行"""
+    lines = []
+    for line in markdown.split("\n"):
+        text = line.strip()
+        if text and (_LINK_ONLY_LINE.match(text) or (len(text) < 200 and _BOILERPLATE_LINE.search(text))):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _normalize_whitespace(markdown: str, artifacts: Dict[str, List[dict]]) -> str:
+    """统一换行符与不间断空格，去掉行尾空白，连续空行合并为一行"""
+    markdown = markdown.replace("\r\n", "\n").replace("\r", "\n").replace("\u00a0", " ").replace("\u200b", "")
+    markdown = re.sub(r"[ \t]+$", "", markdown, flags=re.MULTILINE)
+    markdown = re.sub(r"\n{3,}", "\n\n", markdown)
+    return markdown.strip() + "\n"
+
+
+def _extract_links(markdown: str, artifacts: Dict[str, List[dict]]) -> str:
+    """提取正文中的链接（不含图片），同一地址只记录一次"""
+    seen = set()
+    links = []
+    for text, href in _MARKDOWN_LINK.findall(markdown):
+        if href not in seen:
+            seen.add(href)
+            links.append({"text": text.strip(), "href": href})
+    artifacts["links"] = links
+    return markdown
+
+
+def _extract_metadata(markdown: str, artifacts: Dict[str, List[dict]]) -> str:
+    """统计字数与字符数，提取标题层级"""
+    artifacts["metadata"] = [{
+        "chars": len(markdown),
+        "words": len(_LATIN_WORD.findall(markdown)) + len(_CJK_CHAR.findall(markdown)),  # 中文按字计
+        "headings": [{"level": len(level), "text": text} for level, text in _MARKDOWN_HEADING.findall(markdown)],
+    }]
+    return markdown
+
+
+def _chunk_markdown(markdown: str, artifacts: Dict[str, List[dict]]) -> str:
+    """
+    切分为供向量化使用的文本块
+
+    按段落累积到约 CHUNK_SIZE 字符，相邻块重叠 CHUNK_OVERLAP 字符；遇到标题另起一块，
+    每块记录所属的标题。超长段落按固定长度切开。
+    """
+    overlap = min(max(CHUNK_OVERLAP, 0), max(CHUNK_SIZE, 2) // 2)
+    step = max(CHUNK_SIZE, 2) - overlap
+    chunks: List[tuple] = []
+    heading: Optional[str] = None
+    current = ""
+    for block in re.split(r"\n{2,}", markdown):
+        match = _MARKDOWN_HEADING.match(block)
+        if match:
+            if current.strip():
+                chunks.append((heading, current.strip()))
+            heading, current = match.group(2), ""
+        for start in range(0, len(block), step):
+            part = block[start:start + step]
+            if current and len(current) + 2 + len(part) > step + overlap:
+                chunks.append((heading, current.strip()))
+                current = current[-overlap:] if overlap else ""
+            current = f"{current}\n\n{part}" if current else part
+    if current.strip():
+        chunks.append((heading, current.strip()))
+    artifacts["chunks"] = [{"chunk": i, "heading": heading, "text": text} for i, (heading, text) in enumerate(chunks)]
+    return markdown
+
+
+# 内置后处理步骤：step(markdown, artifacts) -> markdown
+POSTPROCESSORS = {
+    "strip_boilerplate": _strip_boilerplate,
+    "normalize_whitespace": _normalize_whitespace,
+    "links": _extract_links,
+    "metadata": _extract_metadata,
+    "chunks": _chunk_markdown,
+}
+
+
+@lru_cache(maxsize=None)
+def _postprocess_steps(spec: str) -> tuple:
+    """
+    解析 POSTPROCESS：内置步骤名或 模块:函数（自定义步骤在后处理进程中导入）
+
+    Raises:
+        ValueError: 步骤不存在或无法导入
+    """
+    steps = []
+    for name in (part.strip() for part in spec.split(",")):
+        if not name:
+            continue
+        if name in POSTPROCESSORS:
+            steps.append(POSTPROCESSORS[name])
+        elif ":" in name:
+            module, _, attr = name.partition(":")
+            try:
+                steps.append(getattr(importlib.import_module(module), attr))
+            except (ImportError, AttributeError) as e:
+                raise ValueError(f"无法加载后处理步骤 {name}: {e}") from None
+        else:
+            raise ValueError(f"未知的后处理步骤: {name}（可选 {' / '.join(POSTPROCESSORS)}，或 模块:函数）")
+    return tuple(steps)
+
+
+def _run_postprocess(spec: str, markdown: str) -> tuple[Optional[str], Dict[str, List[dict]]]:
+    """
+    在后处理进程中依次执行各步骤
+
+    Returns:
+        (处理后的正文，未修改时为 None 以免把原文再传回主进程, 派生产物)
+    """
+    artifacts: Dict[str, List[dict]] = {}
+    processed = markdown
+    for step in _postprocess_steps(spec):
+        processed = step(processed, artifacts)
+    for name in artifacts:
+        if not re.fullmatch(r"[\w-]+", name):
+            raise ValueError(f"派生产物名称只能包含字母、数字、下划线和连字符: {name!r}")
+    return (None if processed == markdown else processed), artifacts
+
+
+class PostProcessor:
+    """
+    写出前的后处理阶段：按 POSTPROCESS 依次执行各步骤，CPU 密集的处理在进程池中进行，不阻塞事件循环
+
+    步骤签名为 step(markdown, artifacts) -> markdown：返回处理后的正文，派生产物以
+    artifacts[名称] = [记录, ...] 给出，与文章在同一批中追加写入 输出目录/derived/名称.jsonl。
+    步骤出错或进程池不可用时写出原文并提示，不影响文章本身的结果。
+    """
+
+    def __init__(self, spec: str, workers: int):
+        self.spec = spec
+        self._workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.spec.strip())
+
+    def validate(self) -> None:
+        """
+        在主进程中解析一次步骤配置，尽早发现拼写错误
+
+        Raises:
+            ValueError: 步骤不存在或无法导入
+        """
+        _postprocess_steps(self.spec)
+
+    async def run(self, markdown: str) -> tuple[str, Dict[str, List[dict]]]:
+        """
+        Returns:
+            (处理后的正文, 派生产物)
+        """
+        if self._pool is None:
+            # spawn：不复制事件循环与写入线程的状态，各平台行为一致
+            self._pool = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            processed, artifacts = await asyncio.get_running_loop().run_in_executor(
+                self._pool, _run_postprocess, self.spec, markdown
+            )
+        except BrokenProcessPool as e:
+            self._pool = None  # 进程异常退出，下次重新创建
+            return self._fallback(markdown, e)
+        except Exception as e:
+            return self._fallback(markdown, e)
+        return (markdown if processed is None else processed), artifacts
+
+    def _fallback(self, markdown: str, error: Exception) -> tuple[str, Dict[str, List[dict]]]:
+        self.failures += 1
+        if not GUI_MODE:
+            print(f"⚠️ 后处理失败，写出原文: {str(error)[:100] or type(error).__name__}")
+        return markdown, {}
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_postprocessor = PostProcessor(POSTPROCESS, POSTPROCESS_WORKERS)
+
+
+class _AppendSink:
+    """
+    追加写入的单文件输出，同时写出 .idx 偏移索引（每行 index / url / offset / length）
+
+    jsonl 每条记录一行；archive 每条记录单独压缩，前置 4 字节大端长度，可按偏移随机读取。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+        self._index = None
+
+    def write(self, record: dict) -> tuple[str, int]:
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._index = open(self.path.with_name(self.path.name + ".idx"), "a", encoding="utf-8")
+        payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        if self.path.suffix == ".jsonl":
+            data = payload + b"\n"
+        else:
+            body = _compress_record(self.path.suffix, payload)
+            data = len(body).to_bytes(4, "big") + body
+        offset = self._file.tell()
+        self._file.write(data)
+        self._index.write(json.dumps({"index": record["index"], "url": record["url"], "offset": offset, "length": len(data)}) + "\n")
+        return f"{self.path.name}@{offset}", len(data)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._index.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = self._index = None
+
+
+def _compress_record(suffix: str, payload: bytes) -> bytes:
+    if suffix == ".zst":
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return zlib.compress(payload, 6)
+
+
+def _decompress_record(suffix: str, body: bytes) -> bytes:
+    if suffix == ".zst":
+        if zstandard is None:
+            raise OSError("读取 .zst 归档需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(body)
+    return zlib.decompress(body)
+
+
+def _read_article(output_dir: Path, locator: str) -> str:
+    """
+    按定位符读取已写出文章的正文
+
+    Raises:
+        OSError: 文件不存在或内容无法解析
+    """
+    if "@" not in locator:
+        content = (output_dir / locator).read_text(encoding="utf-8")
+        _, sep, markdown = content.partition("\n---\n\n")
+        return markdown if sep else content
+
+    name, _, offset = locator.rpartition("@")
+    path = output_dir / name
+    try:
+        with open(path, "rb") as f:
+            f.seek(int(offset))
+            if path.suffix == ".jsonl":
+                payload = f.readline()
+            else:
+                length = int.from_bytes(f.read(4), "big")
+                payload = _decompress_record(path.suffix, f.read(length))
+        return json.loads(payload)["markdown"]
+    except (ValueError, KeyError, zlib.error) as e:
+        raise OSError(f"无法读取 {locator}: {e}")
+
+
+class ArticleWriter:
+    """
+    文章输出阶段：爬取协程把文章放入有界队列，由单独的写入协程按批交给线程执行，
+    每批只调度一次线程并只 flush 一次，文件 I/O 不再与网络请求争用事件循环
+
+    - files：每篇一个 Markdown 文件（OUTPUT_SUBDIR_SIZE 时分子目录）
+    - jsonl：追加写入 OUTPUT_DIR/articles.jsonl
+    - archive：追加写入 OUTPUT_DIR/articles.zst（未安装 zstandard 时为 articles.zlib）
+    jsonl / archive 返回 "文件名@偏移" 形式的定位符，记录在状态库的 filename 中。
+    后处理产生的派生产物在同一批中追加写入 输出目录/derived/名称.jsonl。
+    """
+
+    def __init__(self, sink: str, queue_size: int):
+        self.sink = sink
+        self._queue_size = max(queue_size, 1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._sinks: Dict[Path, _AppendSink] = {}
+        self._derived: Dict[Path, object] = {}  # 派生产物文件
+        self._dirs: set = set()
+        self.batches = 0
+
+    def sink_path(self, output_dir: Path) -> Path:
+        """jsonl / archive 模式下的输出文件路径"""
+        if self.sink == "jsonl":
+            return output_dir / "articles.jsonl"
+        return output_dir / ("articles.zst" if zstandard is not None else "articles.zlib")
+
+    async def write(
+        self, output_dir: Path, index: int, title: str, url: str, markdown: str,
+        artifacts: Optional[Dict[str, List[dict]]] = None
+    ) -> str:
+        """
+        写出一篇文章（及其派生产物），写入完成后返回文件名或定位符
+
+        Raises:
+            OSError: 写入失败
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue(self._queue_size)
+            self._task = asyncio.create_task(self._run())
+        record = {
+            "index": index, "title": title, "url": url,
+            "scraped_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "markdown": markdown,
+        }
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((Path(output_dir), record, artifacts, future))
+        return await future
+
+    async def read(self, output_dir: Path, locator: str) -> str:
+        """读取已写出文章的正文"""
+        return await asyncio.to_thread(_read_article, Path(output_dir), locator)
+
+    def exists(self, output_dir: Path, locator: str) -> bool:
+        """定位符指向的内容是否仍然存在"""
+        if "@" not in locator:
+            return (Path(output_dir) / locator).exists()
+        name, _, offset = locator.rpartition("@")
+        try:
+            return (Path(output_dir) / name).stat().st_size > int(offset)
+        except (OSError, ValueError):
+            return False
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE and not self._queue.empty() and batch[-1] is not None:
+                batch.append(self._queue.get_nowait())
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if batch:
+                outcomes = await asyncio.to_thread(self._write_batch, batch)
+                self.batches += 1
+                for (*_, future), outcome in zip(batch, outcomes):
+                    if future.done():
+                        continue  # 等待方已被取消
+                    if isinstance(outcome, Exception):
+                        future.set_exception(outcome)
+                    else:
+                        locator, size = outcome
+                        _telemetry.inc("scrape_bytes_out_total", size)
+                        future.set_result(locator)
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[tuple]) -> list:
+        """在写入线程中执行一批写入，逐条返回 (定位符, 字节数) 或异常"""
+        outcomes = []
+        used = []  # 每条记录写入的追加输出（含派生产物文件），flush 失败时对应条目一并失败
+        for output_dir, record, artifacts, _ in batch:
+            files = []
+            try:
+                if self.sink == "files":
+                    outcome = self._write_file(output_dir, record)
+                else:
+                    path = self.sink_path(output_dir)
+                    sink = self._sinks.get(path)
+                    if sink is None:
+                        sink = self._sinks[path] = _AppendSink(path)
+                    outcome = sink.write(record)
+                    files.append(sink)
+                if artifacts:
+                    files.extend(self._write_derived(output_dir, record, artifacts))
+            except Exception as e:
+                outcome = e
+            outcomes.append(outcome)
+            used.append(files)
+        for file in {file for files in used for file in files}:
+            try:
+                file.flush()
+            except OSError as e:
+                outcomes = [e if file in used[i] else outcome for i, outcome in enumerate(outcomes)]
+        return outcomes
+
+    def _write_derived(self, output_dir: Path, record: dict, artifacts: Dict[str, List[dict]]) -> list:
+        """追加写入派生产物：每条记录一行，附上文章的 index 与 url"""
+        files = []
+        for name, items in artifacts.items():
+            if not items:
+                continue
+            path = output_dir / "derived" / f"{name}.jsonl"
+            file = self._derived.get(path)
+            if file is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                file = self._derived[path] = open(path, "a", encoding="utf-8")
+            file.write("".join(
+                json.dumps({"index": record["index"], "url": record["url"], **item}, ensure_ascii=False) + "\n"
+                for item in items
+            ))
+            files.append(file)
+        return files
+
+    def _write_file(self, output_dir: Path, record: dict) -> tuple[str, int]:
+        filename = _article_filename(record["index"], record["title"])
+        path = output_dir / filename
+        if path.parent not in self._dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._dirs.add(path.parent)
+        data = _render_article(record["index"], record["title"], record["url"], record["markdown"], record["scraped_at"]).encode("utf-8")
+        path.write_bytes(data)
+        return filename, len(data)
+
+    def release(self, output_dir: Path) -> None:
+        """关闭某个输出目录的追加文件（守护模式下任务结束时调用，此时该目录的写入都已完成）"""
+        output_dir = Path(output_dir)
+        for path in [path for path in self._sinks if path.parent == output_dir]:
+            self._sinks.pop(path).close()
+        for path in [path for path in self._derived if path.parent.parent == output_dir]:
+            self._derived.pop(path).close()
+        self._dirs = {path for path in self._dirs if not path.is_relative_to(output_dir)}
+
+    async def close(self) -> None:
+        """写完队列中剩余的文章并关闭输出文件"""
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.put(None)
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._queue = None
+        for sink in self._sinks.values():
+            sink.close()
+        self._sinks.clear()
+        for file in self._derived.values():
+            file.close()
+        self._derived.clear()
+
+
+_article_writer = ArticleWriter(OUTPUT_SINK, WRITE_QUEUE_SIZE)
+
+
+async def _write_article(
+    index: int, title: str, url: str, markdown: str, output_dir: str, artifacts: Optional[Dict[str, List[dict]]] = None
+) -> str:
+    """
+    将文章（及后处理产生的派生产物）交给输出阶段写出
+
+    Returns:
+        写入的文件名（jsonl / archive 模式下为 文件名@偏移）
+    """
+    return await _article_writer.write(Path(output_dir), index, title, url, markdown, artifacts)
+
+
+async def _copy_article(source_filename: str, index: int, title: str, url: str, output_dir: str) -> tuple[str, str]:
+    """
+    复制已写出文章的正文到新的索引/标题下
+
+    Returns:
+        (写入的文件名, 正文 Markdown)
+
+    Raises:
+        OSError: 源文件无法读取
+    """
+    markdown = await _article_writer.read(Path(output_dir), source_filename)
+    filename = await _write_article(index, title, url, markdown, output_dir)
+    return filename, markdown
+
+
+async def _fan_out(primary: ScrapeResult | BaseException, alias: Article, output_dir: str) -> ScrapeResult:
+    """将主条目的结果分发给一个重复条目"""
+    result = ScrapeResult(index=alias.index, title=alias.title, url=alias.url, success=False)
+    start_time = time.time()
+
+    if isinstance(primary, ScrapeResult) and primary.success:
+        try:
+            result.filename, _ = await _copy_article(primary.filename, alias.index, alias.title, alias.url, output_dir)
+            result.success = True
+            result.content_hash = primary.content_hash
+        except OSError as e:
+            result.error = str(e)
+            result.error_class = "io"
+    elif isinstance(primary, ScrapeResult):
+        result.error = primary.error
+        result.error_class = primary.error_class
+        result.skipped = primary.skipped
+    else:
+        result.error = str(primary) or type(primary).__name__
+
+    result.elapsed = time.time() - start_time
+    if result.success:
+        if not GUI_MODE:
+            print(f"[{alias.index}] ✓ 重复 URL，复用结果: {result.filename}")
+        emit_task_update(alias.index, alias.url, alias.title, "success", 100, elapsed=result.elapsed)
+    else:
+        status = "skipped" if result.skipped else "failed"
+        emit_task_update(alias.index, alias.url, alias.title, status, 0, error=result.error, elapsed=result.elapsed)
+    return result
+
+
+async def _store_markdown(result: ScrapeResult, markdown: str, output_dir: str, previous: Optional[tuple]) -> None:
+    """
+    写出正文并设置 result.filename（result.content_hash 需已计算，按后处理前的原文比较）
+
+    previous 为到期刷新条目上次的 (内容哈希, 文件名)：内容哈希相同且原文件仍在、
+    文件名也未因索引或标题变化而改变时保留原文件，不再重写
+    """
+    if previous is not None:
+        content_hash, filename = previous
+        result.changed = not (
+            filename
+            and content_hash == result.content_hash
+            and ("@" in filename or filename == _article_filename(result.index, result.title))
+            and _article_writer.exists(Path(output_dir), filename)
+        )
+        if not result.changed:
+            result.filename = filename
+            return
+    artifacts = None
+    if _postprocessor.enabled:
+        with _telemetry.span("postprocess"):
+            markdown, artifacts = await _postprocessor.run(markdown)
+    result.filename = await _write_article(result.index, result.title, result.url, markdown, output_dir, artifacts)
+
+
+async def _finish_from_cache(
+    result: ScrapeResult, markdown: str, output_dir: str, start_time: float, tag: str, previous: Optional[tuple] = None
+) -> ScrapeResult:
+    """用缓存内容完成一篇文章"""
+    result.content_hash = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+    await _store_markdown(result, markdown, output_dir, previous)
+    result.success = True
+    result.cached = True
+    result.elapsed = time.time() - start_time
+    if not GUI_MODE:
+        print(f"{tag} ✓ 缓存命中{'（内容未变化）' if result.changed is False else ''}: {result.filename}")
+    emit_task_update(result.index, result.url, result.title, "success", 100, elapsed=result.elapsed)
+    return result
+
+
+async def _save_scraped(
+    result: ScrapeResult, markdown: str, output_dir: str, start_time: float, tag: str, previous: Optional[tuple] = None
+) -> ScrapeResult:
+    """保存上游返回的正文：写入缓存与 Markdown 文件并发送成功状态（内容未变化的刷新条目不重写）"""
+    with _telemetry.span("process"):
+        encoded = markdown.encode("utf-8")
+        result.content_hash = hashlib.sha256(encoded).hexdigest()
+    _telemetry.inc("scrape_bytes_in_total", len(encoded))
+
+    if _response_cache is not None:
+        with _telemetry.span("cache_write"):
+            await _response_cache.put(result.url, SCRAPE_OPTIONS, markdown)
+
+    with _telemetry.span("write"):
+        await _store_markdown(result, markdown, output_dir, previous)
+    result.success = True
+    result.elapsed = time.time() - start_time
+
+    if not GUI_MODE:
+        unchanged = "，内容未变化" if result.changed is False else ""
+        print(f"{tag} ✓ 成功 ({result.elapsed:.1f}s{unchanged}): {result.filename}")
+
+    # 发送任务成功状态
+    emit_task_update(result.index, result.url, result.title, "success", 100, elapsed=result.elapsed)
+    return result
+
+
+def _misses_deadline(deadline: Optional[float], expected: float) -> bool:
+    """再用 expected 秒是否会超过截止时间（没有截止时间时为 False）"""
+    return deadline is not None and time.time() + expected > deadline
+
+
+def _skip_result(index: int, title: str, url: str, retry: Optional[RetryState] = None, error: Optional[str] = None) -> ScrapeResult:
+    """预计赶不上截止时间而放弃的条目；error 为等待重试时上一次尝试的错误"""
+    result = ScrapeResult(index=index, title=title, url=url, success=False, skipped=True)
+    result.error = "预计无法在截止时间前完成" + (f"（上次错误: {error}）" if error else "")
+    if retry is not None:
+        result.attempts = retry.attempts
+        result.elapsed = time.time() - retry.started
+    if not GUI_MODE:
+        print(f"[{index}] ⏭ 跳过: {result.error[:100]}")
+    emit_task_update(index, url, title, "skipped", 0, error=result.error, elapsed=result.elapsed)
+    return result
+
+
+async def _scrape_local(
+    result: ScrapeResult, copy_from: Optional[str], output_dir: str, start_time: float, tag: str,
+    previous: Optional[tuple] = None
+) -> Optional[ScrapeResult]:
+    """
+    不经上游即可完成的条目：复制本轮已写出的重复 URL，或使用响应缓存
+
+    Returns:
+        已完成的结果；需要请求上游时返回 None
+    """
+    # 重复 URL 直接复制已有结果
+    if copy_from is not None:
+        try:
+            result.filename, markdown = await _copy_article(copy_from, result.index, result.title, result.url, output_dir)
+            result.success = True
+            result.elapsed = time.time() - start_time
+            result.content_hash = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+            if not GUI_MODE:
+                print(f"{tag} ✓ 重复 URL，复用结果: {result.filename}")
+            emit_task_update(result.index, result.url, result.title, "success", 100, elapsed=result.elapsed)
+            return result
+        except OSError:
+            pass  # 源文件不可用时正常爬取
+
+    # 缓存命中时直接落盘，不占用并发槽位；到期刷新的条目须请求上游，缓存副本只会得出“内容未变”
+    if _response_cache is not None and (_response_cache.mode == "only" or _response_cache.mode == "use" and previous is None):
+        markdown = await _response_cache.get(result.url, SCRAPE_OPTIONS, allow_stale=_response_cache.mode == "only")
+        if markdown is not None:
+            return await _finish_from_cache(result, markdown, output_dir, start_time, tag, previous)
+        if _response_cache.mode == "only":
+            result.error = "缓存未命中 (CACHE_MODE=only)"
+            emit_task_update(result.index, result.url, result.title, "failed", 0, error=result.error, elapsed=0)
+            return result
+
+    return None
+
+
+async def scrape_single_article(
+    limiter: AdaptiveLimiter,
+    client: AsyncFirecrawl,
+    index: int,
+    title: str,
+    url: str,
+    total: int,
+    output_dir: str,
+    copy_from: Optional[str] = None,
+    retry: Optional[RetryState] = None,
+    budget: Optional[RetryBudget] = None,
+    previous: Optional[tuple] = None,
+    timeout: Optional[float] = None,
+    deadline: Optional[float] = None
+) -> ScrapeResult:
+    """
+    异步爬取单篇文章（带超时，每次调用只尝试一次）
+
+    可重试的失败不在此处等待：返回 retry_in 非空的结果，
+    由调用方在退避结束后携带同一 retry 状态再次调用，等待期间不占用并发槽位。
+
+    Args:
+        limiter: 自适应并发限制器
+        client: 共享的 AsyncFirecrawl 客户端
+        index: 文章索引
+        title: 文章标题
+        url: 文章 URL
+        total: 总文章数（仅用于日志，未知时为 0）
+        output_dir: 输出目录
+        copy_from: 已抓取过的同一 URL 的输出文件名，给出时直接复制而不再请求
+        retry: 跨尝试的重试状态，首次调用时可省略
+        budget: 本轮重试预算，省略时不限制
+        previous: 到期刷新条目上次的 (内容哈希, 文件名)，内容未变化时不重写
+        timeout: 该 URL 的请求超时（秒），省略时为 REQUEST_TIMEOUT
+        deadline: 条目的截止时间戳，请求超时不超过剩余时间
+
+    Returns:
+        ScrapeResult: 爬取结果
+    """
+    global _stop_requested
+
+    result = ScrapeResult(
+        index=index,
+        title=title,
+        url=url,
+        success=False
+    )
+
+    state = retry or RetryState(started=time.time())
+    start_time = state.started
+    tag = f"[{index}/{total}]" if total > 0 else f"[{index}]"
+
+    # 检查是否收到停止请求
+    if _stop_requested:
+        result.error = "Stopped by user"
+        result.attempts = state.attempts
+        result.elapsed = time.time() - start_time
+        if state.attempts > 0:
+            emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
+        return result
+
+    if state.attempts == 0:
+        local = await _scrape_local(result, copy_from, output_dir, start_time, tag, previous)
+        if local is not None:
+            return local
+
+    with _telemetry.span("attempt", trace_id=state.trace_id, index=index, url=url, attempt=state.attempts + 1) as span:
+        wait_start = time.time()
+        async with limiter:
+            _telemetry.record("limiter_wait", wait_start)
+            try:
+                if state.attempts == 0:
+                    if not GUI_MODE:
+                        print(f"{tag} 开始爬取: {title[:60]}...")
+                    # 发送任务开始状态
+                    emit_task_update(index, url, title, "running", 10, elapsed=0)
+                    if budget is not None:
+                        budget.record_request()
+
+                # 更新进度：正在请求
+                state.attempts += 1
+                result.attempts = state.attempts
+                emit_task_update(index, url, title, "running", min(30 + (state.attempts - 1) * 20, 70), elapsed=time.time() - start_time)
+
+                # 超时同时交给 Firecrawl，由服务端在到期时停止渲染；本地多等一点余量，
+                # 正常情况下先收到服务端的超时错误，而不是留下仍在渲染的孤儿请求
+                seconds = _request_timeout(timeout, deadline)
+                request_start = time.monotonic()
+                _telemetry.inc("scrape_requests_total")
+                try:
+                    with _telemetry.span("request", timeout=seconds):
+                        doc = await asyncio.wait_for(
+                            client.scrape(url, **SCRAPE_OPTIONS, timeout=int(seconds * 1000)),
+                            timeout=seconds + REQUEST_TIMEOUT_GRACE
+                        )
+                except Exception as e:
+                    if _is_overload_error(e):
+                        limiter.record_overload()
+                    raise
+                limiter.record_success(time.monotonic() - request_start)
+
+                if not doc or not doc.markdown:
+                    raise EmptyContentError("无法获取内容")
+
+                # 更新进度：正在保存
+                emit_task_update(index, url, title, "running", 80, elapsed=time.time() - start_time)
+
+                span["outcome"] = "success"
+                return await _save_scraped(result, doc.markdown, output_dir, start_time, tag, previous)
+
+            except asyncio.CancelledError:
+                # 任务被取消（用户点击停止）
+                result.error = "Cancelled by user"
+                result.elapsed = time.time() - start_time
+                if not GUI_MODE:
+                    print(f"{tag} ⏹ 已取消: {title[:40]}...")
+                emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
+                raise  # 重新抛出以通知 gather
+
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                retryable, retry_after = classify_error(e)
+                span["error_class"] = _error_class(e)
+                _telemetry.inc("scrape_errors_total", error_class=span["error_class"])
+                if retryable and state.attempts < RETRY_COUNT and not _stop_requested:
+                    if budget is None or budget.try_acquire():
+                        # 去相关抖动退避，服务端给出 Retry-After 时至少等待该时长
+                        state.delay = _backoff_delay(state.delay)
+                        result.retry_in = state.delay
+                        if retry_after is not None:
+                            result.retry_in = max(result.retry_in, min(retry_after, RETRY_AFTER_MAX))
+                        result.error = error
+                        result.elapsed = time.time() - start_time
+                        if not GUI_MODE:
+                            print(f"{tag} 第{state.attempts}次尝试失败: {error[:100]}，{result.retry_in:.1f}秒后重试...")
+                        emit_task_update(index, url, title, "pending", 0, error=error, elapsed=result.elapsed)
+                        span["outcome"] = "retry"
+                        _telemetry.inc("scrape_retries_total")
+                        return result
+                    error = f"{error}（重试预算已用尽）"
+
+                # revalidate 模式下上游失败时回退到过期的缓存副本（本地写入失败除外）；
+                # 到期刷新的条目保留原文件，不用缓存副本冒充刷新成功
+                upstream = retryable or isinstance(e, EmptyContentError)
+                if upstream and previous is None and _response_cache is not None and _response_cache.mode == "revalidate":
+                    markdown = await _response_cache.get(url, SCRAPE_OPTIONS, allow_stale=True)
+                    if markdown is not None:
+                        return await _finish_from_cache(result, markdown, output_dir, start_time, tag, previous)
+
+                span["outcome"] = "failed"
+                result.error = error
+                result.error_class = span["error_class"]
+                result.elapsed = time.time() - start_time
+                if not GUI_MODE:
+                    print(f"{tag} ❌ 失败: {error[:100]}")
+                emit_task_update(index, url, title, "failed", 0, error=result.error, elapsed=result.elapsed)
+                return result
+
+
+@dataclass
+class HostPolicy:
+    """单个主机的礼貌访问策略"""
+    rate: float = 0.0  # 每秒允许发出的请求数，0 表示不限
+    burst: int = 1  # 令牌桶容量
+    max_in_flight: int = 0  # 同时进行中的请求上限，0 表示不限
+    timeout: float = 0.0  # 该主机的请求超时（秒），0 表示使用 REQUEST_TIMEOUT
+
+
+def load_host_policies() -> tuple[HostPolicy, Dict[str, HostPolicy]]:
+    """
+    读取默认主机策略与按域名覆盖的策略
+
+    HOST_LIMITS 为 JSON 对象，键为域名（同时匹配其子域名），例如::
+
+        {"www.cbre.com": {"rate": 2, "burst": 4, "max_in_flight": 4, "timeout": 120}}
+
+    Raises:
+        ValueError: HOST_LIMITS 格式不正确
+    """
+    default = HostPolicy(rate=HOST_RATE_LIMIT, burst=HOST_BURST, max_in_flight=HOST_MAX_IN_FLIGHT)
+    if not HOST_LIMITS:
+        return default, {}
+
+    try:
+        raw = json.loads(HOST_LIMITS)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"HOST_LIMITS 不是合法的 JSON: {e}")
+    if not isinstance(raw, dict):
+        raise ValueError("HOST_LIMITS 必须是以域名为键的 JSON 对象")
+
+    overrides: Dict[str, HostPolicy] = {}
+    for domain, options in raw.items():
+        if not isinstance(options, dict):
+            raise ValueError(f"HOST_LIMITS 中 {domain} 的配置必须是对象")
+        overrides[domain.lower().lstrip(".")] = HostPolicy(
+            rate=float(options.get("rate", default.rate)),
+            burst=int(options.get("burst", default.burst)),
+            max_in_flight=int(options.get("max_in_flight", default.max_in_flight)),
+            timeout=float(options.get("timeout", default.timeout)),
+        )
+    return default, overrides
+
+
+def _match_host_policy(host: str, default: HostPolicy, overrides: Dict[str, HostPolicy]) -> HostPolicy:
+    """按域名后缀匹配策略：a.b.example.com -> b.example.com -> example.com"""
+    parts = host.split(".")
+    for i in range(len(parts)):
+        policy = overrides.get(".".join(parts[i:]))
+        if policy is not None:
+            return policy
+    return default
+
+
+def _url_host(url: str) -> str:
+    """提取 URL 的主机名（小写），无法解析时返回空字符串"""
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+class _HostState:
+    """单个主机的排队与令牌桶状态"""
+
+    __slots__ = ("policy", "pending", "entry", "in_flight", "tokens", "updated")
+
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.pending: list = []  # (-优先级, 截止时间, 序号, 条目) 小顶堆
+        self.entry: Optional[tuple] = None  # 该主机在就绪堆中的有效条目
+        self.in_flight = 0
+        self.tokens = float(max(policy.burst, 1))
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if self.policy.rate > 0:
+            capacity = max(self.policy.burst, 1)
+            self.tokens = min(capacity, self.tokens + (now - self.updated) * self.policy.rate)
+        self.updated = now
+
+
+class HostScheduler:
+    """
+    按主机分组的公平调度队列，替代单一 FIFO 工作队列
+
+    - 条目按 (优先级降序, 截止时间升序, 入队顺序) 出队，主机内与主机间都使用堆
+    - 队首条目相同级别的主机之间轮询，单个域名的大量 URL 不会占满所有并发槽位
+    - 每个主机独立的令牌桶 (rate/burst) 与进行中请求上限 (max_in_flight)
+    - 总排队数量有上限，put 在队列满时等待
+    - defer 的条目在到期前不占用队列容量与并发槽位，到期后排在所属主机同级条目之前
+
+    出队的条目在爬取结束后必须调用 release() 归还主机槽位。
+    """
+
+    def __init__(self, maxsize: int, default_policy: HostPolicy, overrides: Dict[str, HostPolicy]):
+        self._maxsize = max(maxsize, 1)
+        self._default_policy = default_policy
+        self._overrides = overrides
+        self._hosts: Dict[str, _HostState] = {}
+        # 就绪主机堆 (-队首优先级, 队首截止时间, 轮询序号, 主机)；主机队首变化后旧条目失效，出堆时丢弃
+        self._ready: list = []
+        self._seq = 0
+        self._size = 0
+        self._deferred: list = []  # (到期时间, 序号, 主机, 条目) 小顶堆
+        self._deferred_seq = 0
+        self._closed = False
+        self._cond = asyncio.Condition()
+
+    def policy_for(self, host: str) -> HostPolicy:
+        return _match_host_policy(host, self._default_policy, self._overrides)
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.policy_for(host))
+        return state
+
+    def _push(self, host: str, state: _HostState, priority: float, deadline: Optional[float], seq: int, item) -> None:
+        """把条目放入主机堆；成为主机队首时更新该主机在就绪堆中的位置"""
+        key = (-priority, float("inf") if deadline is None else deadline)
+        heapq.heappush(state.pending, (*key, seq, item))
+        if state.pending[0][3] is item:
+            self._schedule(host, state)
+        self._size += 1
+
+    def _schedule(self, host: str, state: _HostState) -> None:
+        """按主机当前队首条目重新登记到就绪堆（旧条目随之失效）"""
+        self._seq += 1
+        state.entry = (*state.pending[0][:2], self._seq, host)
+        heapq.heappush(self._ready, state.entry)
+
+    async def put(self, url: str, item, priority: float = 0.0, deadline: Optional[float] = None) -> None:
+        """按 URL 所属主机入队；priority 越大、deadline 越早越先出队"""
+        host = _url_host(url)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._size < self._maxsize)
+            self._seq += 1
+            self._push(host, self._state(host), priority, deadline, self._seq, item)
+            self._cond.notify_all()
+
+    async def defer(self, url: str, item, delay: float, priority: float = 0.0, deadline: Optional[float] = None) -> None:
+        """延迟 delay 秒后重新入队，用于等待退避的重试条目"""
+        async with self._cond:
+            self._deferred_seq += 1
+            heapq.heappush(
+                self._deferred,
+                (time.monotonic() + delay, self._deferred_seq, _url_host(url), priority, deadline, item),
+            )
+            self._cond.notify_all()
+
+    def _promote(self, now: float) -> Optional[float]:
+        """把到期的延迟条目移回主机堆；返回距下一个条目到期的秒数"""
+        while self._deferred and self._deferred[0][0] <= now:
+            _, seq, host, priority, deadline, item = heapq.heappop(self._deferred)
+            # 负序号排在同级新条目之前，重试不会被后入队的条目无限推迟
+            self._push(host, self._state(host), priority, deadline, -seq, item)
+        return self._deferred[0][0] - now if self._deferred else None
+
+    def _take(self, now: float):
+        """按就绪堆顺序取出第一个满足并发与速率限制的条目；返回 (条目, 最短等待秒数)"""
+        wait: Optional[float] = None
+        blocked = []
+        item = None
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            host = entry[3]
+            state = self._hosts.get(host)
+            if state is None or state.entry is not entry:
+                continue  # 已失效的登记
+            policy = state.policy
+
+            if policy.max_in_flight > 0 and state.in_flight >= policy.max_in_flight:
+                blocked.append(entry)
+                continue
+
+            state.refill(now)
+            if policy.rate > 0 and state.tokens < 1:
+                delay = (1 - state.tokens) / policy.rate
+                wait = delay if wait is None else min(wait, delay)
+                blocked.append(entry)
+                continue
+
+            if policy.rate > 0:
+                state.tokens -= 1
+            state.in_flight += 1
+            item = heapq.heappop(state.pending)[3]
+            self._size -= 1
+            if state.pending:
+                self._schedule(host, state)
+            else:
+                state.entry = None
+            break
+        for entry in blocked:
+            heapq.heappush(self._ready, entry)
+        return item, None if item is not None else wait
+
+    async def get(self):
+        """
+        取出下一个可执行的条目
+
+        Returns:
+            条目；队列已关闭且全部取完时返回 None
+        """
+        async with self._cond:
+            while True:
+                now = time.monotonic()
+                # 收到停止请求后不再等待退避，立即放出延迟条目（爬取函数会直接返回停止结果）
+                deferred_wait = self._promote(float("inf") if _stop_requested else now)
+                item, wait = self._take(now)
+                if item is not None:
+                    self._cond.notify_all()
+                    return item
+                if self._closed and self._size == 0 and not self._deferred:
+                    return None
+                if deferred_wait is not None:
+                    # 最多等待 1 秒，以便及时响应停止请求
+                    deferred_wait = min(deferred_wait, 1.0)
+                    wait = deferred_wait if wait is None else min(wait, deferred_wait)
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, url: str) -> None:
+        """归还主机的进行中槽位"""
+        host = _url_host(url)
+        async with self._cond:
+            state = self._hosts.get(host)
+            if state is None:
+                return
+            state.in_flight -= 1
+            # 空闲且无需保留令牌状态的主机直接回收，避免海量域名时状态无限增长
+            if state.in_flight == 0 and not state.pending and state.policy.rate <= 0:
+                del self._hosts[host]
+            self._cond.notify_all()
+
+    async def close(self) -> None:
+        """标记不再有新条目，取完后 get() 返回 None"""
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+async def _scrape_worker(
+    work_queue: HostScheduler,
+    result_queue: asyncio.Queue,
+    limiter: AdaptiveLimiter,
+    client: AsyncFirecrawl,
+    total: int,
+    dedup: Optional[UrlDeduplicator] = None,
+    budget: Optional[RetryBudget] = None
+) -> None:
+    """
+    工作协程：持续从队列取出文章并爬取，完成一个立即取下一个
+
+    每篇文章包装为独立 Task 并登记到 _running_tasks，
+    以便停止信号能够取消正在进行的请求；主条目完成后把结果分发给重复条目。
+    需要重试的条目携带重试状态延迟放回队列，退避期间 worker 继续处理其他文章。
+    按近期请求耗时预计赶不上截止时间的条目（含等待重试的条目）直接以 skipped 结束。
+    """
+    global _running_tasks
+
+    while True:
+        item = await work_queue.get()
+        if item is None:
+            return
+
+        position, article = item[:2]
+        retry = item[2] if len(item) > 2 else RetryState(started=time.time())
+        priority, deadline = _article_schedule(article)
+        try:
+            if article.copy_from is None and _misses_deadline(deadline, limiter.p50 or 0.0):
+                result = _skip_result(article.index, article.title, article.url, retry)
+            else:
+                timeout = article.timeout or work_queue.policy_for(_url_host(article.url)).timeout
+                task = asyncio.create_task(
+                    scrape_single_article(
+                        limiter, client, article.index, article.title, article.url, total, _output_dir(), article.copy_from,
+                        retry, budget, article.previous, timeout, deadline
+                    )
+                )
+                _running_tasks.add(task)
+                try:
+                    result = await task
+                except asyncio.CancelledError as e:
+                    # 单个任务被停止信号取消时，作为结果返回（与 gather(return_exceptions=True) 行为一致）；
+                    # 若是 worker 自身被取消则继续向上传播
+                    if not task.cancelled():
+                        task.cancel()
+                        raise
+                    result = e
+                except Exception as e:
+                    result = e
+                finally:
+                    _running_tasks.discard(task)
+        finally:
+            await work_queue.release(article.url)
+
+        if isinstance(result, ScrapeResult) and result.retry_in is not None:
+            if _misses_deadline(deadline, result.retry_in + (limiter.p50 or 0.0)):
+                result = _skip_result(article.index, article.title, article.url, retry, result.error)
+            else:
+                await work_queue.defer(article.url, (position, article, retry), result.retry_in, priority, deadline)
+                continue
+
+        await result_queue.put((position, result))
+
+        if dedup is not None and article.copy_from is None:
+            for alias in dedup.complete(article.index, article.url, result):
+                await result_queue.put((position, await _fan_out(result, alias, _output_dir())))
+
+
+async def process_articles_streaming(
+    pending_articles: AsyncIterable[Article],
+    limiter: AdaptiveLimiter,
+    client: AsyncFirecrawl,
+    total: int,
+    dedup: Optional[UrlDeduplicator] = None
+) -> AsyncIterator[tuple[int, ScrapeResult | Exception]]:
+    """
+    基于有界队列的滑动窗口调度：任一并发槽位空出后立即补充下一篇文章，
+    不再等待整批完成，单个慢请求不会阻塞后续文章；
+    队列按主机轮询出队并执行各主机的限速策略
+
+    Args:
+        pending_articles: 待处理文章 Article 的异步迭代器，按需惰性读取
+        limiter: 自适应并发限制器
+        client: Firecrawl 客户端
+        total: 总文章数（仅用于日志，未知时为 0）
+        dedup: 去重器，pending_articles 需已经过其 filter()
+
+    Yields:
+        (待处理序列中的位置, 结果) 元组，按完成顺序返回
+
+    Raises:
+        ValueError: 读取待处理文章时出错（已开始的任务结果会先全部返回）
+    """
+    global _stop_requested
+
+    # 队列容量有限，生产者不会一次性把全部文章压入内存
+    # worker 数量取并发上限的最大值，实际并发由限制器控制
+    worker_count = limiter.max_limit
+    default_policy, host_overrides = load_host_policies()
+    # 优先级排序只在已入队的条目之间进行，预读窗口始终开启：高优先级条目与运行期间追加的条目
+    # 不必等前面的积压条目出队；主机被限速时也能越过其积压条目调度其他主机
+    capacity = max(BATCH_SIZE, worker_count, HOST_LOOKAHEAD)
+    work_queue = HostScheduler(capacity, default_policy, host_overrides)
+    result_queue: asyncio.Queue = asyncio.Queue()
+    budget = RetryBudget(RETRY_BUDGET, RETRY_BUDGET_MIN)
+
+    async def produce() -> None:
+        iterator = aiter(pending_articles)
+        try:
+            position = 0
+            async for article in iterator:
+                if _stop_requested or _misses_deadline(_run_deadline.get(), 0.0):
+                    break
+                await work_queue.put(article.url, (position, article), *_article_schedule(article))
+                position += 1
+        finally:
+            await work_queue.close()
+            # 提前停止时显式关闭输入迭代器，及时释放打开的文件
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    workers = [
+        asyncio.create_task(_scrape_worker(work_queue, result_queue, limiter, client, total, dedup, budget))
+        for _ in range(worker_count)
+    ]
+    producer = asyncio.create_task(produce())
+
+    async def finish() -> None:
+        # 所有 worker 退出后放入结束标记
+        await asyncio.gather(*workers, return_exceptions=True)
+        await result_queue.put(None)
+
+    finisher = asyncio.create_task(finish())
+
+    try:
+        while True:
+            item = await result_queue.get()
+            if item is None:
+                break
+            yield item
+
+        if budget.denied and not GUI_MODE:
+            print(f"⚠️ 重试预算已用尽，{budget.denied} 次重试被放弃（已重试 {budget.retries} 次）")
+        if not producer.cancelled() and producer.exception() is not None:
+            raise producer.exception()
+    finally:
+        # 调用方提前退出（如收到停止信号）时，回收生产者与所有 worker
+        for task in (producer, *workers, finisher):
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(producer, *workers, finisher, return_exceptions=True)
+
+
+class BatchScrapeEngine:
+    """
+    批量爬取引擎：把待爬取条目按 BATCH_SCRAPE_SIZE 分组提交为 Firecrawl 批量任务，
+    由服务端调度浏览器池；轮询任务状态，按 URL 把结果映射回 ScrapeResult
+
+    输出文件、缓存、去重分发与 GUI 事件与逐条爬取一致；结果同样由调用方写入状态库，
+    断点续传语义不变。任务内失败的 URL 会合并为新任务重试，最多 RETRY_COUNT 次。
+    主机限速不适用于此模式（由服务端调度）。
+    """
+
+    def __init__(self, client: AsyncFirecrawl, dedup: Optional[UrlDeduplicator] = None):
+        self._client = client
+        self._dedup = dedup
+        self._options = ScrapeOptions(**SCRAPE_OPTIONS)
+        self._policies = load_host_policies()  # 只使用其中的 timeout
+        self.in_flight = 0  # 已提交、尚未出结果的 URL 数
+        self.jobs = 0  # 已提交的批量任务数
+        self._job_seconds: Optional[float] = None  # 批量任务首轮耗时的滑动平均，用于预计能否赶上截止时间
+
+    async def stream(self, pending_articles: AsyncIterable[Article]) -> AsyncIterator[tuple[int, ScrapeResult | Exception]]:
+        """
+        与 process_articles_streaming 相同的输入与输出约定
+
+        Yields:
+            (待处理序列中的位置, 结果) 元组，按完成顺序返回
+
+        Raises:
+            ValueError: 读取待处理文章时出错（已开始的任务结果会先全部返回）
+        """
+        result_queue: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(BATCH_SCRAPE_JOBS)
+        jobs: set = set()
+
+        async def submit(chunk: List[tuple]) -> None:
+            await slots.acquire()
+            job = asyncio.create_task(self._run_job(chunk, result_queue))
+            job.add_done_callback(lambda _: slots.release())
+            jobs.add(job)
+            _running_tasks.add(job)
+            job.add_done_callback(_running_tasks.discard)
+
+        async def produce() -> None:
+            iterator = aiter(pending_articles)
+            chunk: List[tuple] = []
+            upcoming: Optional[asyncio.Future] = None
+            try:
+                position = 0
+                while True:
+                    if upcoming is None:
+                        upcoming = asyncio.ensure_future(anext(iterator, None))
+                    if chunk and not upcoming.done():
+                        # 下一篇迟迟未到（如等待追加文件）时先提交已攒下的条目
+                        await asyncio.wait({upcoming}, timeout=BATCH_POLL_INTERVAL)
+                        if not upcoming.done():
+                            await submit(chunk)
+                            chunk = []
+                            continue
+                    article = await upcoming
+                    upcoming = None
+                    if article is None or _stop_requested or _misses_deadline(_run_deadline.get(), 0.0):
+                        break
+                    _, deadline = _article_schedule(article)
+                    result = ScrapeResult(index=article.index, title=article.title, url=article.url, success=False)
+                    if article.copy_from is None and _misses_deadline(deadline, self._job_seconds or 0.0):
+                        local = _skip_result(article.index, article.title, article.url)
+                    else:
+                        local = await _scrape_local(
+                            result, article.copy_from, _output_dir(), time.time(), f"[{article.index}]", article.previous
+                        )
+                    if local is not None:
+                        await self._deliver(position, article, local, result_queue)
+                    else:
+                        chunk.append((position, article))
+                        if len(chunk) >= BATCH_SCRAPE_SIZE:
+                            await submit(chunk)
+                            chunk = []
+                    position += 1
+                if chunk and not _stop_requested:
+                    await submit(chunk)
+            finally:
+                if upcoming is not None and not upcoming.done():
+                    upcoming.cancel()
+                    await asyncio.gather(upcoming, return_exceptions=True)
+                # 提前停止时显式关闭输入迭代器，及时释放打开的文件
+                if hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+
+        producer = asyncio.create_task(produce())
+
+        async def finish() -> None:
+            # 生产者退出后不再有新任务，等待全部批量任务结束再放入结束标记
+            await asyncio.gather(producer, return_exceptions=True)
+            await asyncio.gather(*jobs, return_exceptions=True)
+            await result_queue.put(None)
+
+        finisher = asyncio.create_task(finish())
+
+        try:
+            while True:
+                item = await result_queue.get()
+                if item is None:
+                    break
+                yield item
+
+            if not producer.cancelled() and producer.exception() is not None:
+                raise producer.exception()
+        finally:
+            for task in (producer, *jobs, finisher):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(producer, *jobs, finisher, return_exceptions=True)
+
+    async def _deliver(self, position: int, article: Article, result: ScrapeResult, result_queue: asyncio.Queue) -> None:
+        """返回一条结果，并把主条目的结果分发给重复条目"""
+        await result_queue.put((position, result))
+        if self._dedup is not None and article.copy_from is None:
+            for alias in self._dedup.complete(result.index, result.url, result):
+                await result_queue.put((position, await _fan_out(result, alias, _output_dir())))
+
+    async def _fail(self, position: int, article: Article, result: ScrapeResult, error: str, start_time: float, result_queue: asyncio.Queue) -> None:
+        """以失败结束一条（revalidate 模式下先尝试过期缓存）"""
+        tag = f"[{result.index}]"
+        if (_response_cache is not None and _response_cache.mode == "revalidate" and article.previous is None
+                and error not in ("Stopped by user", "Cancelled by user")):
+            markdown = await _response_cache.get(result.url, SCRAPE_OPTIONS, allow_stale=True)
+            if markdown is not None:
+                finished = await _finish_from_cache(result, markdown, _output_dir(), start_time, tag)
+                await self._deliver(position, article, finished, result_queue)
+                return
+        result.error = error
+        result.elapsed = time.time() - start_time
+        if not GUI_MODE:
+            print(f"{tag} ❌ 失败: {error[:100]}")
+        emit_task_update(result.index, result.url, result.title, "failed", 0, error=result.error, elapsed=result.elapsed)
+        await self._deliver(position, article, result, result_queue)
+
+    async def _run_job(self, chunk: List[tuple], result_queue: asyncio.Queue) -> None:
+        """执行一组 URL：提交批量任务并轮询，失败的 URL 合并后重试"""
+        start_time = time.time()
+        # 规范化 URL -> [(位置, 条目, 结果)]；关闭去重时同一 URL 可能出现多次
+        pending: Dict[str, List[tuple]] = {}
+        for position, article in chunk:
+            result = ScrapeResult(index=article.index, title=article.title, url=article.url, success=False)
+            pending.setdefault(normalize_url(article.url), []).append((position, article, result))
+            emit_task_update(article.index, article.url, article.title, "running", 10, elapsed=0)
+        self.in_flight += len(chunk)
+
+        errors: Dict[str, str] = {}
+        delay = 0.0
+        try:
+            for attempt in range(RETRY_COUNT):
+                if _stop_requested:
+                    break
+                for entries in pending.values():
+                    for _, article, result in entries:
+                        result.attempts = attempt + 1
+                        emit_task_update(result.index, result.url, result.title, "running", 30 + attempt * 20, elapsed=time.time() - start_time)
+                errors = await self._run_attempt(pending, start_time, result_queue)
+                if attempt == 0:
+                    elapsed = time.time() - start_time
+                    self._job_seconds = elapsed if self._job_seconds is None else self._job_seconds * 0.8 + elapsed * 0.2
+                if not pending or _stop_requested or _misses_deadline(_run_deadline.get(), 0.0):
+                    break
+                if attempt < RETRY_COUNT - 1:
+                    delay = _backoff_delay(delay)
+                    if not GUI_MODE:
+                        print(f"批量任务中 {sum(map(len, pending.values()))} 个 URL 失败，{delay:.1f}秒后重新提交...")
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            for key, entries in list(pending.items()):
+                for position, article, result in entries:
+                    await self._fail(position, article, result, "Cancelled by user", start_time, result_queue)
+            pending.clear()
+            raise
+        finally:
+            # 时间预算用尽时未完成的条目按跳过处理，下次运行继续
+            out_of_time = not _stop_requested and _misses_deadline(_run_deadline.get(), 0.0)
+            for key, entries in pending.items():
+                error = "Stopped by user" if _stop_requested else errors.get(key, "批量任务未返回结果")
+                for position, article, result in entries:
+                    if out_of_time:
+                        await self._deliver(position, article, _skip_result(result.index, result.title, result.url), result_queue)
+                    else:
+                        await self._fail(position, article, result, error, start_time, result_queue)
+            self.in_flight -= len(chunk)
+
+    async def _run_attempt(self, pending: Dict[str, List[tuple]], start_time: float, result_queue: asyncio.Queue) -> Dict[str, str]:
+        """
+        提交一次批量任务并轮询到结束，成功的条目从 pending 中移除
+
+        Returns:
+            规范化 URL -> 错误信息（仍留在 pending 中的条目）
+        """
+        urls = [entries[0][1].url for entries in pending.values()]
+        # 同一批量任务只能使用一个超时：取各条目（按各自的覆盖值与截止时间）中最长的一个
+        timeout = max(
+            _request_timeout(
+                article.timeout or _match_host_policy(_url_host(article.url), *self._policies).timeout,
+                _article_schedule(article)[1]
+            )
+            for entries in pending.values() for _, article, _ in entries
+        )
+        options = self._options.model_copy(update={"timeout": int(timeout * 1000)})
+        _telemetry.inc("scrape_requests_total", len(urls))
+        try:
+            with _telemetry.span("batch_submit", urls=len(urls)):
+                job = await asyncio.wait_for(
+                    self._client.start_batch_scrape(urls, options=options, ignore_invalid_urls=True),
+                    timeout=REQUEST_TIMEOUT
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            _telemetry.inc("scrape_errors_total", error_class=_error_class(e))
+            return {key: error for key in pending}
+        self.jobs += 1
+
+        errors: Dict[str, str] = {}
+        for url in job.invalid_urls or []:
+            key = normalize_url(url)
+            if key in pending:
+                for position, article, result in pending.pop(key):
+                    await self._fail(position, article, result, "无效 URL", start_time, result_queue)
+
+        doc_errors: Dict[str, str] = {}
+        last_completed = 0
+        last_progress = time.monotonic()
+        try:
+            while pending and not _stop_requested:
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                try:
+                    with _telemetry.span("batch_poll"):
+                        status = await asyncio.wait_for(
+                            self._client.get_batch_scrape_status(job.id, PaginationConfig(auto_paginate=False)),
+                            timeout=REQUEST_TIMEOUT
+                        )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # 轮询失败不影响服务端任务，超过无进展时限才放弃
+                    status = None
+                    errors = {key: str(e) or type(e).__name__ for key in pending}
+
+                if status is not None:
+                    doc_errors.update(await self._collect(pending, status.data, start_time, result_queue))
+                    if status.completed > last_completed:
+                        last_completed = status.completed
+                        last_progress = time.monotonic()
+                    if status.status in ("completed", "failed", "cancelled"):
+                        if pending and status.next:
+                            # 结果分页时取回全部页面
+                            status = await asyncio.wait_for(
+                                self._client.get_batch_scrape_status(job.id),
+                                timeout=REQUEST_TIMEOUT
+                            )
+                            doc_errors.update(await self._collect(pending, status.data, start_time, result_queue))
+                        errors = {key: doc_errors.get(key, f"批量任务 {status.status}") for key in pending}
+                        if pending:
+                            errors.update(await self._job_errors(job.id, pending))
+                        return errors
+
+                if time.monotonic() - last_progress > max(REQUEST_TIMEOUT, timeout):
+                    errors = {key: "批量任务长时间无进展" for key in pending}
+                    await self._cancel_job(job.id)
+                    return errors
+                if _misses_deadline(_run_deadline.get(), 0.0):
+                    # 时间预算用尽：取消服务端任务，把仍在排队和渲染的页面让给其他任务
+                    errors = {key: "时间预算已用尽" for key in pending}
+                    await self._cancel_job(job.id)
+                    return errors
+            if _stop_requested:
+                await self._cancel_job(job.id)
+        except asyncio.CancelledError:
+            await self._cancel_job(job.id)
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            errors = {key: error for key in pending}
+        return errors
+
+    async def _collect(self, pending: Dict[str, List[tuple]], documents: list, start_time: float, result_queue: asyncio.Queue) -> Dict[str, str]:
+        """
+        把批量任务返回的文档映射回待完成条目
+
+        Returns:
+            没有正文的文档：规范化 URL -> 错误信息（条目留在 pending 中）
+        """
+        errors: Dict[str, str] = {}
+        for doc in documents:
+            metadata = doc.metadata_typed
+            source = metadata.source_url or metadata.url
+            key = normalize_url(source) if source else None
+            if key not in pending:
+                continue  # 已处理过的文档（轮询会重复返回首页）
+            if not doc.markdown:
+                errors[key] = metadata.error or "无法获取内容"
+                continue
+            for position, article, result in pending.pop(key):
+                tag = f"[{result.index}]"
+                emit_task_update(result.index, result.url, result.title, "running", 80, elapsed=time.time() - start_time)
+                try:
+                    await _save_scraped(result, doc.markdown, _output_dir(), start_time, tag, article.previous)
+                except OSError as e:
+                    await self._fail(position, article, result, str(e), start_time, result_queue)
+                    continue
+                await self._deliver(position, article, result, result_queue)
+        return errors
+
+    async def _job_errors(self, job_id: str, pending: Dict[str, List[tuple]]) -> Dict[str, str]:
+        """查询批量任务中各 URL 的失败原因"""
+        errors: Dict[str, str] = {}
+        try:
+            body = await asyncio.wait_for(self._client.get_batch_scrape_errors(job_id), timeout=REQUEST_TIMEOUT)
+        except Exception:
+            return errors
+        for item in body.get("errors") or []:
+            url = item.get("url")
+            if url and normalize_url(url) in pending:
+                errors[normalize_url(url)] = item.get("error") or "未知错误"
+        for url in body.get("robotsBlocked") or []:
+            if normalize_url(url) in pending:
+                errors[normalize_url(url)] = "被 robots.txt 禁止"
+        return errors
+
+    async def _cancel_job(self, job_id: str) -> None:
+        """尽力取消服务端任务"""
+        try:
+            await asyncio.wait_for(self._client.cancel_batch_scrape(job_id), timeout=5)
+        except Exception:
+            pass
+
+
+def _parse_address(address: str, default_host: str) -> tuple[str, int]:
+    """
+    解析 host:port
+
+    Raises:
+        ValueError: 格式错误
+    """
+    host, sep, port = address.strip().rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"地址格式应为 host:port: {address}")
+    return host or default_host, int(port)
+
+
+def _is_safe_filename(filename: str) -> bool:
+    """worker 回报的文件名必须是输出目录内的相对路径（可带 jsonl / archive 的 @偏移 后缀）"""
+    path = Path(filename.split("@", 1)[0])
+    return bool(filename) and not path.is_absolute() and not path.drive and ".." not in path.parts
+
+
+def _send_line(writer: asyncio.StreamWriter, message: dict):
+    """分片协议：每条消息为一行 JSON"""
+    writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class HashRing:
+    """一致性哈希环：增减节点时只有该节点相邻区间的键改变归属"""
+
+    def __init__(self, replicas: int = SHARD_REPLICAS):
+        self._replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, node: str):
+        for i in range(self._replicas):
+            point = self._hash(f"{node}#{i}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node: str):
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: self._owners[point] for point in self._points}
+
+    def lookup(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        i = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+
+class _ShardConnection:
+    """协调者一侧的一个 worker 连接"""
+
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.writer = writer
+        self.outstanding: Dict[int, tuple] = {}  # 文章索引 -> (位置, 条目)，已分配但未返回结果
+        self.last_seen = time.monotonic()
+        self.running = 0
+        self.done = False
+
+
+class ShardCoordinator:
+    """
+    分片执行的协调者：文章按规范化 URL 的一致性哈希分配给各 worker，
+    同一 URL 总是落在同一个 worker 上，由 worker 在进程内去重
+
+    - 本机 worker 由协调者启动（SHARDS），其他主机的 worker 通过 SHARD_LISTEN 连接
+    - 协议为 TCP 上的 JSON Lines：协调者下发 article / end / stop，
+      worker 回报 hello / result / events / heartbeat / done
+    - 状态库与 GUI 输出只在协调者进程中，结果与逐条爬取一样交给调用方记录，断点续传语义不变
+    - worker 断开或超过 SHARD_TIMEOUT 没有消息时从环上移除，未完成的条目重新分配
+    """
+
+    def __init__(self):
+        self._ring = HashRing()
+        self._workers: Dict[str, _ShardConnection] = {}
+        self._cond = asyncio.Condition()
+        self._results: asyncio.Queue = asyncio.Queue()
+        self._outstanding = 0  # 已分配给 worker、尚未返回结果的条目数
+        self._reassigning = 0
+        self._background: set = set()
+        self._procs: list = []
+        self._exited = 0  # 已退出的本机 worker 进程数
+        self._closing = False
+        # 未配置口令时（只有本机 worker）随机生成一个，交给本机 worker，其他本机进程无法冒充
+        self._token = SHARD_TOKEN or secrets.token_hex(16)
+        self.reassigned = 0
+
+    @property
+    def in_flight(self) -> int:
+        """各 worker 上报的进行中请求数之和"""
+        return sum(conn.running for conn in self._workers.values())
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    async def stream(self, pending_articles: AsyncIterable[Article]) -> AsyncIterator[tuple[int, ScrapeResult | Exception]]:
+        """
+        与 process_articles_streaming 相同的输入与输出约定
+
+        Raises:
+            ValueError: 读取待处理文章时出错（已开始的任务结果会先全部返回）
+            ConnectionError: 长时间没有可用的 worker
+        """
+        host, port = _parse_address(SHARD_LISTEN, "127.0.0.1") if SHARD_LISTEN else ("127.0.0.1", 0)
+        server = await asyncio.start_server(self._handle, host, port, limit=SHARD_LINE_LIMIT)
+        port = server.sockets[0].getsockname()[1]
+        if not GUI_MODE:
+            print(f"分片协调者监听 {host}:{port}，本机 worker: {SHARDS}")
+        for i in range(SHARDS):
+            self._procs.append(await self._spawn_local(port, i))
+        if SHARDS:
+            # 等本机 worker 全部连上（或已退出）再分配，避免环在分配途中变化导致同一 URL 落到不同 worker
+            async with self._cond:
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: len(self._workers) + self._exited >= SHARDS),
+                        timeout=SHARD_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+        watchdog = asyncio.create_task(self._watchdog())
+        producer = asyncio.create_task(self._produce(pending_articles))
+        finisher = asyncio.create_task(self._finish(producer))
+
+        try:
+            while True:
+                item = await self._results.get()
+                if item is None:
+                    break
+                yield item
+
+            if not producer.cancelled() and producer.exception() is not None:
+                raise producer.exception()
+        finally:
+            self._closing = True
+            server.close()
+            for conn in list(self._workers.values()):
+                try:
+                    _send_line(conn.writer, {"type": "end" if conn.done else "stop"})
+                    conn.writer.close()
+                except (ConnectionError, RuntimeError):
+                    pass
+            tasks = (watchdog, producer, finisher, *self._background)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._stop_local()
+
+    async def _spawn_local(self, port: int, number: int):
+        """启动一个本机 worker 进程"""
+        env = dict(os.environ)
+        env.update(SHARD_COORDINATOR=f"127.0.0.1:{port}", SHARD_NAME=f"local-{number}", SHARDS="0", SHARD_LISTEN="",
+                   SHARD_TOKEN=self._token)
+        env.pop("GUI_IPC_FD", None)
+        # 指标端口由协调者占用；各 worker 的追踪写入各自的文件
+        env.pop("METRICS_LISTEN", None)
+        if TRACE_FILE:
+            env["TRACE_FILE"] = f"{TRACE_FILE}.local-{number}"
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, str(Path(__file__).resolve()),
+            env=env,
+            # GUI 模式下 stdout 是事件通道，worker 的输出不能混入
+            stdout=asyncio.subprocess.DEVNULL if GUI_MODE else None
+        )
+
+        async def monitor():
+            await proc.wait()
+            self._exited += 1
+            async with self._cond:
+                self._cond.notify_all()
+
+        task = asyncio.create_task(monitor())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return proc
+
+    async def _stop_local(self):
+        for proc in self._procs:
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个 worker 连接"""
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), timeout=SHARD_TIMEOUT) or b"null")
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            hello = None
+        if (not isinstance(hello, dict) or hello.get("type") != "hello" or self._closing
+                or not hmac.compare_digest(str(hello.get("token", "")).encode(), self._token.encode())):
+            writer.close()
+            return
+
+        base = name = str(hello.get("name") or "worker")
+        suffix = 1
+        while name in self._workers:
+            name = f"{base}#{suffix}"
+            suffix += 1
+        conn = _ShardConnection(name, writer)
+        self._workers[name] = conn
+        self._ring.add(name)
+        async with self._cond:
+            self._cond.notify_all()
+        if not GUI_MODE:
+            print(f"分片 worker 已连接: {name}")
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                conn.last_seen = time.monotonic()
+                message = json.loads(line)
+                kind = message.get("type")
+                if kind == "result":
+                    await self._on_result(conn, ScrapeResult(**message["result"]))
+                elif kind == "events":
+                    for event in message["events"]:
+                        if event.get("type") == "task":
+                            emit_json(event)
+                elif kind == "heartbeat":
+                    conn.running = int(message.get("running") or 0)
+                elif kind == "done":
+                    conn.done = True
+                    conn.running = 0
+                    break
+        except (ConnectionError, ValueError, TypeError, KeyError):
+            pass
+        finally:
+            await self._on_disconnect(conn)
+
+    async def _on_result(self, conn: _ShardConnection, result: ScrapeResult):
+        entry = conn.outstanding.get(result.index)
+        if entry is None or entry[1].url != result.url:
+            return  # 已被重新分配的条目，或不是分给该 worker 的条目
+        del conn.outstanding[result.index]
+        if result.filename is not None and not _is_safe_filename(result.filename):
+            # 文件名会写入状态库并在之后按输出目录读取，不接受指向输出目录之外的路径
+            result.success = False
+            result.error = f"worker 返回了非法的文件名: {result.filename[:100]}"
+            result.error_class = "other"
+            result.filename = None
+        self._outstanding -= 1
+        await self._results.put((entry[0], result))
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def _on_disconnect(self, conn: _ShardConnection):
+        """worker 断开：从环上移除，并重新分配其未完成的条目"""
+        self._workers.pop(conn.name, None)
+        self._ring.remove(conn.name)
+        conn.writer.close()
+        orphans = list(conn.outstanding.values())
+        conn.outstanding.clear()
+        self._outstanding -= len(orphans)
+        if orphans and not self._closing:
+            if conn.done:
+                # worker 正常结束但缺少部分结果（如任务异常），记为失败
+                for position, article in orphans:
+                    await self._fail(position, article, "worker 未返回结果")
+            else:
+                if not GUI_MODE:
+                    print(f"⚠️  分片 worker {conn.name} 失联，重新分配 {len(orphans)} 篇文章")
+                self.reassigned += len(orphans)
+                self._reassigning += 1
+                task = asyncio.create_task(self._reassign(orphans))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def _reassign(self, orphans: List[tuple]):
+        try:
+            for position, article in orphans:
+                try:
+                    await self._dispatch(position, article)
+                except ConnectionError as e:
+                    await self._fail(position, article, str(e))
+        finally:
+            self._reassigning -= 1
+            async with self._cond:
+                self._cond.notify_all()
+
+    async def _fail(self, position: int, article: Article, error: str):
+        result = ScrapeResult(index=article.index, title=article.title, url=article.url, success=False, error=error)
+        emit_task_update(article.index, article.url, article.title, "failed", 0, error=error)
+        await self._results.put((position, result))
+
+    async def _dispatch(self, position: int, article: Article):
+        """把一篇文章发给其所属 worker（该 worker 的窗口已满时等待）"""
+        key = dedup_key(article.url)
+        async with self._cond:
+            while True:
+                name = self._ring.lookup(key)
+                conn = self._workers.get(name) if name else None
+                if conn is None:
+                    # 没有在线的 worker：等待新 worker 连接
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout=SHARD_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        raise ConnectionError("没有可用的分片 worker") from None
+                    continue
+                if len(conn.outstanding) < SHARD_WINDOW:
+                    break
+                await self._cond.wait()
+            conn.outstanding[article.index] = (position, article)
+            self._outstanding += 1
+        try:
+            message = {"type": "article", "index": article.index, "title": article.title, "url": article.url}
+            if article.previous is not None:
+                message["previous"] = article.previous
+            # 截止时间按协调者的时间预算折算为绝对时间戳，worker 无需知道本轮开始时间
+            priority, deadline = _article_schedule(article)
+            if priority or deadline is not None:
+                message["priority"], message["deadline"] = priority, deadline
+            if article.timeout is not None:
+                message["timeout"] = article.timeout
+            _send_line(conn.writer, message)
+            await conn.writer.drain()
+        except ConnectionError:
+            pass  # 连接断开后由 _on_disconnect 重新分配
+
+    async def _produce(self, pending_articles: AsyncIterable[Article]):
+        iterator = aiter(pending_articles)
+        try:
+            position = 0
+            async for article in iterator:
+                if _stop_requested or _misses_deadline(_run_deadline.get(), 0.0):
+                    break
+                await self._dispatch(position, article)
+                position += 1
+        finally:
+            # 提前停止时显式关闭输入迭代器，及时释放打开的文件
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    async def _finish(self, producer: asyncio.Task):
+        # 输入读完且所有已分配条目都有结果后，通知 worker 结束
+        await asyncio.gather(producer, return_exceptions=True)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._outstanding == 0 and self._reassigning == 0)
+        for conn in list(self._workers.values()):
+            try:
+                _send_line(conn.writer, {"type": "end"})
+            except (ConnectionError, RuntimeError):
+                pass
+        await self._results.put(None)
+
+    async def _watchdog(self):
+        while True:
+            await asyncio.sleep(SHARD_HEARTBEAT)
+            now = time.monotonic()
+            for conn in list(self._workers.values()):
+                if now - conn.last_seen > SHARD_TIMEOUT:
+                    # 关闭连接后读取端随之结束，由 _on_disconnect 重新分配
+                    conn.writer.close()
+
+
+async def run_shard_worker():
+    """以分片 worker 身份运行：从协调者接收文章，按本机配置爬取并回报结果"""
+    global _stop_requested, _response_cache
+
+    try:
+        setup_async_signal_handlers(asyncio.get_running_loop())
+    except Exception:
+        pass
+
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+    host, port = _parse_address(SHARD_COORDINATOR, "127.0.0.1")
+    # 协调者可能尚未开始监听：在 SHARD_TIMEOUT 内重试连接
+    deadline = time.monotonic() + SHARD_TIMEOUT
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port, limit=SHARD_LINE_LIMIT)
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(1)
+    name = SHARD_NAME or f"{socket.gethostname()}-{os.getpid()}"
+    _send_line(writer, {"type": "hello", "name": name, "token": SHARD_TOKEN})
+    if not GUI_MODE:
+        print(f"分片 worker {name} 已连接协调者 {host}:{port}")
+
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    async def receive():
+        global _stop_requested
+        ended = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message["type"] == "article":
+                    await inbox.put(Article(
+                        message["index"], message["title"], message["url"],
+                        previous=tuple(message["previous"]) if message.get("previous") else None,
+                        priority=message.get("priority", 0.0),
+                        deadline=message.get("deadline"),
+                        timeout=message.get("timeout"),
+                    ))
+                elif message["type"] == "end":
+                    ended = True
+                    break
+                elif message["type"] == "stop":
+                    break
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            if not ended:
+                # 协调者要求停止或连接中断（含口令错误被拒绝）：放弃剩余条目
+                _stop_requested = True
+                if not GUI_MODE:
+                    print("协调者已断开连接或要求停止")
+            await inbox.put(None)
+
+    async def articles() -> AsyncIterator[Article]:
+        while True:
+            item = await inbox.get()
+            if item is None:
+                return
+            yield item
+
+    # 任务事件经缓冲合并后转发给协调者
+    _gui_events.sink = lambda events: _send_line(writer, {"type": "events", "events": events})
+    _gui_events.start()
+
+    await _telemetry.start(METRICS_LISTEN, TRACE_FILE)
+    if CACHE_MODE != "off":
+        _response_cache = ScrapeCache(CACHE_DIR / "responses.db", CACHE_MODE, CACHE_TTL, int(CACHE_MAX_MB * 1024 * 1024))
+
+    client = create_firecrawl_client(load_endpoints())
+    limiter = create_limiter()
+    dedup = UrlDeduplicator(None) if DEDUP else None
+    pending = dedup.filter(articles()) if dedup else articles()
+    engine = BatchScrapeEngine(client, dedup) if SCRAPE_ENGINE == "batch" else None
+    stream = engine.stream(pending) if engine is not None else process_articles_streaming(pending, limiter, client, 0, dedup)
+    _telemetry.gauge("scrape_in_flight", lambda: engine.in_flight if engine is not None else limiter.in_flight,
+                     "Articles currently being scraped")
+
+    async def heartbeat():
+        while True:
+            running = engine.in_flight if engine is not None else limiter.in_flight
+            _send_line(writer, {"type": "heartbeat", "running": running})
+            await asyncio.sleep(SHARD_HEARTBEAT)
+
+    receiver = asyncio.create_task(receive())
+    beat = asyncio.create_task(heartbeat())
+    try:
+        async with aclosing(stream):
+            async for _, result in stream:
+                # 非 ScrapeResult 的结果（任务异常）由协调者在 done 后记为失败
+                if isinstance(result, ScrapeResult):
+                    _send_line(writer, {"type": "result", "result": asdict(result)})
+                    await writer.drain()
+        await _gui_events.stop()
+        _send_line(writer, {"type": "done"})
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        for task in (receiver, beat):
+            task.cancel()
+        await asyncio.gather(receiver, beat, return_exceptions=True)
+        await _gui_events.stop()
+        _gui_events.sink = None
+        await _article_writer.close()
+        _postprocessor.close()
+        await _telemetry.close()
+        await _cleanup_firecrawl_client(client)
+        if _response_cache is not None:
+            _response_cache.close()
+            _response_cache = None
+        writer.close()
+
+
+async def main_async():
+    """异步主函数"""
+    global _stop_requested, _response_cache
+
+    # 在事件循环中设置异步信号处理器
+    try:
+        loop = asyncio.get_running_loop()
+        setup_async_signal_handlers(loop)
+    except Exception:
+        pass  # 如果失败，使用传统信号处理器
+
+    start_time_total = time.time()
+
+    # 创建输出目录
+    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+
+    # 解析 Firecrawl 端点配置
+    try:
+        endpoints = load_endpoints()
+    except ValueError as e:
+        emit_error(str(e))
+        return
+
+    if not GUI_MODE:
+        print(f"输出目录: {OUTPUT_DIR}")
+        print(f"Firecrawl URL: {', '.join(ep.url for ep in endpoints)}")
+        print(f"最大并发数: {MAX_CONCURRENT}")
+        print(f"队列缓冲: {BATCH_SIZE}")
+        print(f"请求超时: {REQUEST_TIMEOUT}s")
         print("=" * 70)
 
-    if not pending_articles:
-        if GUI_MODE:
-            emit_complete(total, existing_count, 0, 0, [])
-        else:
+    # 检查 API Key 是否配置（多实例时可以为每个实例单独配置）
+    if not FIRECRAWL_API_KEY and not all(ep.key for ep in endpoints):
+        emit_error("未配置 Firecrawl API Key，请在设置中配置", "请设置环境变量 FIRECRAWL_API_KEY 或在 GUI 设置中配置")
+        return
+
+    # 检查文章列表文件是否存在（设置 DISCOVER 时由发现阶段产生文章）
+    if DISCOVER:
+        try:
+            parse_discover_sources(DISCOVER)
+        except ValueError as e:
+            emit_error(str(e))
+            return
+    elif not os.path.exists(ARTICLES_FILE):
+        emit_error(f"找不到文章列表文件 {ARTICLES_FILE}", "请先运行 playwright 脚本来提取文章列表")
+        return
+
+    if SHARD_LISTEN:
+        try:
+            _parse_address(SHARD_LISTEN, "127.0.0.1")
+            if not SHARD_TOKEN:
+                raise ValueError("设置 SHARD_LISTEN 时必须配置 SHARD_TOKEN，否则任何能连上该端口的主机都能领取文章")
+        except ValueError as e:
+            emit_error(str(e))
+            return
+
+    if OUTPUT_SINK not in ("files", "jsonl", "archive"):
+        emit_error(f"未知的 OUTPUT_SINK: {OUTPUT_SINK}（可选 files / jsonl / archive）")
+        return
+
+    if SCRAPE_ENGINE not in ("single", "batch"):
+        emit_error(f"未知的 SCRAPE_ENGINE: {SCRAPE_ENGINE}（可选 single / batch）")
+        return
+
+    try:
+        _postprocessor.validate()
+    except ValueError as e:
+        emit_error(str(e))
+        return
+
+    # 启动指标服务与追踪文件
+    try:
+        await _telemetry.start(METRICS_LISTEN, TRACE_FILE)
+    except (ValueError, OSError) as e:
+        await _telemetry.close()
+        emit_error(f"无法启动指标服务或追踪文件: {e}")
+        return
+    if METRICS_LISTEN and not GUI_MODE:
+        print(f"指标: http://{METRICS_LISTEN}/metrics")
+
+    # 打开响应缓存
+    if CACHE_MODE != "off":
+        try:
+            _response_cache = ScrapeCache(CACHE_DIR / "responses.db", CACHE_MODE, CACHE_TTL, int(CACHE_MAX_MB * 1024 * 1024))
+        except ValueError as e:
+            await _telemetry.close()
+            emit_error(str(e))
+            return
+
+    # 打开断点续传状态库；首次创建时从已有文件名迁移完成记录
+    store = RunStateStore(STATE_DB)
+    discard_store = False
+    if GUI_MODE:
+        _gui_events.start()
+    try:
+        # 旧版本的文件名序号只对应 ARTICLES_FILE 中的位置，发现模式不做迁移；
+        # 迁移失败时删除新建的状态库，修正文章列表后下次运行重新迁移
+        if store.created and not DISCOVER:
+            try:
+                migrated = await migrate_legacy_state(store)
+            except (ValueError, json.JSONDecodeError, UnicodeDecodeError) as e:
+                discard_store = True
+                emit_error(str(e))
+                return
+            if migrated and not GUI_MODE:
+                print(f"已按旧版本文件名迁移 {migrated} 篇文章的完成记录")
+        inbox = Path(ARTICLES_INBOX) if ARTICLES_INBOX else None
+        articles = discover_articles(DISCOVER) if DISCOVER else iter_articles_async()
+        await _run_scrape(store, start_time_total, articles, inbox)
+    finally:
+        await _article_writer.close()
+        _postprocessor.close()
+        await _gui_events.stop()
+        await _telemetry.close()
+        store.close()
+        if discard_store:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{STATE_DB}{suffix}").unlink(missing_ok=True)
+        if _response_cache is not None:
+            _response_cache.close()
+            _response_cache = None
+
+
+async def _run_scrape(
+    store: RunStateStore,
+    start_time_total: float,
+    articles: AsyncIterator[Dict[str, str]],
+    inbox: Optional[Path] = None,
+    client=None,
+    limiter: Optional[AdaptiveLimiter] = None,
+) -> None:
+    """
+    在已打开的状态库上执行一轮爬取
+
+    守护模式下传入常驻的客户端和该任务在全局并发上限中的份额，本轮结束时不关闭客户端
+    """
+    _run_deadline.set(start_time_total + RUN_TIME_BUDGET if RUN_TIME_BUDGET > 0 else None)
+
+    # 流式读取文章列表：预取第一个待爬取条目以尽早发现格式错误（同时校验主机限速配置）
+    job = _current_job.get()
+    source = ArticleSource(articles, store, inbox, job.appending if job is not None else None)
+    if job is not None:
+        job.source = source  # 守护模式据此判断任务是否还接受追加条目
+    source_iter = source.__aiter__()
+    try:
+        load_host_policies()
+        first_article = await anext(source_iter, None)
+    except (ValueError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        emit_error(str(e))
+        return
+
+    if first_article is None:
+        emit_complete(source.total, source.skipped, 0, 0, [])
+        if not GUI_MODE:
+            print(f"总共 {source.total} 篇文章")
             print("所有文章已存在，无需爬取！")
         return
 
-    # 发送初始进度
+    if not GUI_MODE:
+        if source.skipped > 0:
+            print(f"检测到已完成 {source.skipped}+ 篇文章，其余文章边读取边爬取")
+        if source.refreshed > 0:
+            print(f"已完成文章中 {source.refreshed}+ 篇超过 {REFRESH_AFTER:g} 秒未抓取，将重新抓取")
+        print("=" * 70)
+
+    async def pending_articles() -> AsyncIterator[Article]:
+        async with aclosing(source_iter):
+            yield first_article
+            async for article in source_iter:
+                yield article
+
+    owns_limiter = limiter is None
+    if owns_limiter:
+        limiter = create_limiter()
+
+    # 发送初始进度（总数随文章列表读取逐步确定）
     emit_progress(
-        total=len(pending_articles),
+        total=source.pending,
         completed=0,
         success=0,
         failed=0,
-        pending=len(pending_articles),
-        running=0
+        pending=source.pending,
+        running=0,
+        concurrency=limiter.limit,
+        pool=_http_pool.stats()
     )
 
-    # 创建信号量限制并发数
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
-
-    # 创建共享的 AsyncFirecrawl 客户端，使用 try/finally 确保资源释放
-    client = AsyncFirecrawl(
-        api_key=FIRECRAWL_API_KEY,
-        api_url=FIRECRAWL_URL
-    )
+    # 创建共享的 AsyncFirecrawl 客户端（多个实例时为端点池），使用 try/finally 确保资源释放
+    owns_client = client is None
+    if owns_client:
+        client = create_firecrawl_client(load_endpoints())
 
     try:
         # 统计信息
         success_count = 0
         failed_count = 0
-        results_for_report: List[ScrapeResult] = []
-        failed_tasks_for_gui: List[dict] = []
+        failures = FailureLog(_output_dir() / "failures.jsonl")
+        if job is not None:
+            job.failures = failures
+        changed_count = 0
+        unchanged_count = 0
+        changed_for_report: List[ScrapeResult] = []
+        skipped_count = 0
 
+        sharded = SHARDS > 0 or bool(SHARD_LISTEN)
         if not GUI_MODE:
-            print(f"\n开始异步并发爬取 (最大并发: {MAX_CONCURRENT}, 分批大小: {BATCH_SIZE})...\n")
+            if sharded:
+                print(f"\n开始分片爬取 (本机 worker: {SHARDS}{', 监听 ' + SHARD_LISTEN if SHARD_LISTEN else ''})...\n")
+            elif SCRAPE_ENGINE == "batch":
+                print(f"\n开始批量爬取 (每批 {BATCH_SCRAPE_SIZE} 个 URL, 同时 {BATCH_SCRAPE_JOBS} 个批量任务)...\n")
+            else:
+                mode = f"自适应 {limiter.min_limit}-{limiter.max_limit}" if limiter.adaptive else "固定"
+                print(f"\n开始异步并发爬取 (初始并发: {limiter.limit}, {mode}, 队列缓冲: {BATCH_SIZE})...\n")
 
-        # 分批处理文章
+        # 滑动窗口调度：结果按完成顺序返回
         processed = 0
-        async for idx, result in process_articles_in_batches(pending_articles, semaphore, client, total):
-            if _stop_requested:
-                break
+        # 分片模式下同一 URL 总是分给同一 worker，由 worker 在进程内去重
+        dedup = UrlDeduplicator(store) if DEDUP and not sharded else None
+        articles = dedup.filter(pending_articles()) if dedup else pending_articles()
+        if sharded:
+            engine = ShardCoordinator()
+        elif SCRAPE_ENGINE == "batch":
+            engine = BatchScrapeEngine(client, dedup)
+        else:
+            engine = None
+        if engine is not None:
+            stream = engine.stream(articles)
+        else:
+            stream = process_articles_streaming(articles, limiter, client, 0, dedup)
+        if owns_limiter:
+            _telemetry.gauge("scrape_in_flight", lambda: engine.in_flight if engine is not None else limiter.in_flight,
+                             "Articles currently being scraped")
+            _telemetry.gauge("scrape_concurrency_limit", lambda: limiter.limit, "Current adaptive concurrency limit")
+        try:
+            async with aclosing(stream):
+                async for idx, result in stream:
+                    if _stop_requested:
+                        break
 
-            processed += 1
+                    processed += 1
+                    source.completed = processed
 
-            if isinstance(result, asyncio.CancelledError):
-                # 任务被取消，标记为失败
-                failed_count += 1
-                if not GUI_MODE:
-                    print(f"[{idx + 1}] ⏹ 任务已取消")
-            elif isinstance(result, Exception):
-                failed_count += 1
-                if not GUI_MODE:
-                    print(f"[{idx + 1}] ❌ 异常: {str(result)[:100]}")
-            elif isinstance(result, ScrapeResult):
-                if result.success:
-                    success_count += 1
-                else:
-                    failed_count += 1
-                    results_for_report.append(result)
-                    failed_tasks_for_gui.append({
-                        "index": result.index,
-                        "url": result.url,
-                        "title": result.title,
-                        "error": result.error or "Unknown error"
-                    })
-            else:
-                failed_count += 1
-
-            # 计算预计剩余时间
-            elapsed_total = time.time() - start_time_total
-            remaining = len(pending_articles) - processed
-            eta = (elapsed_total / processed * remaining) if processed > 0 else None
-
-            # 发送进度更新
-            emit_progress(
-                total=len(pending_articles),
-                completed=processed,
-                success=success_count,
-                failed=failed_count,
-                pending=remaining,
-                running=min(MAX_CONCURRENT, remaining),
-                eta=eta
-            )
+                    if isinstance(result, asyncio.CancelledError):
+                        # 任务被取消，标记为失败
+                        failed_count += 1
+                        if not GUI_MODE:
+                            print(f"[{idx + 1}] ⏹ 任务已取消")
+                    elif isinstance(result, Exception):
+                        failed_count += 1
+                        if not GUI_MODE:
+                            print(f"[{idx + 1}] ❌ 异常: {str(result)[:100]}")
+                    elif isinstance(result, ScrapeResult) and result.skipped:
+                        # 赶不上截止时间而未爬取：不计入失败，状态库保持原样，下次运行继续
+                        skipped_count += 1
+                        _telemetry.inc("scrape_results_total", status="skipped")
+                    elif isinstance(result, ScrapeResult):
+                        await store.record(
+                            result.index, result.url, result.success, result.attempts,
+                            result.content_hash, result.filename, result.error
+                        )
+                        _telemetry.inc("scrape_results_total", status="cached" if result.cached else "success" if result.success else "failed")
+                        if result.success:
+                            success_count += 1
+                            if result.changed:
+                                changed_count += 1
+                                if len(changed_for_report) < REFRESH_REPORT_MAX:
+                                    changed_for_report.append(result)
+                            elif result.changed is False:
+                                unchanged_count += 1
+                        else:
+                            failed_count += 1
+                            await failures.add(result)
+                    else:
+                        failed_count += 1
 
-            # 显示进度（非 GUI 模式）
-            if not GUI_MODE and (processed % 5 == 0 or processed == len(pending_articles)):
-                print(f"\n{'=' * 70}")
-                print(f"进度: {processed}/{len(pending_articles)} ({processed/len(pending_articles)*100:.1f}%)")
-                print(f"本轮成功: {success_count} | 失败: {failed_count}")
-                if processed > 0:
-                    print(f"总用时: {elapsed_total:.1f}s | 预计总用时: {elapsed_total/processed*len(pending_articles):.1f}s")
-                print(f"{'=' * 70}\n")
+                    # 计算预计剩余时间（文章列表读取完毕后才有准确总数）
+                    elapsed_total = time.time() - start_time_total
+                    remaining = source.pending - processed
+                    eta = (elapsed_total / processed * remaining) if source.exhausted else None
+
+                    # 发送进度更新
+                    emit_progress(
+                        total=source.pending,
+                        completed=processed,
+                        success=success_count,
+                        failed=failed_count,
+                        pending=remaining,
+                        running=engine.in_flight if engine is not None else limiter.in_flight,
+                        eta=eta,
+                        concurrency=None if engine is not None else limiter.limit,
+                        pool=_http_pool.stats()
+                    )
+
+                    # 显示进度（非 GUI 模式）
+                    if not GUI_MODE and (processed % 5 == 0 or processed == source.pending):
+                        known = "" if source.exhausted else "+"
+                        print(f"\n{'=' * 70}")
+                        print(f"进度: {processed}/{source.pending}{known} ({processed/source.pending*100:.1f}%)")
+                        print(f"本轮成功: {success_count} | 失败: {failed_count}")
+                        if source.exhausted:
+                            print(f"总用时: {elapsed_total:.1f}s | 预计总用时: {elapsed_total/processed*source.pending:.1f}s")
+                        print(f"{'=' * 70}\n")
+        except (ValueError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            # 文章列表中途出现格式错误：已开始的任务照常统计，不再读取后续条目
+            emit_error(f"文章列表读取中断: {e}")
+        except ConnectionError as e:
+            # 分片模式下长时间没有可用的 worker：已返回的结果照常统计
+            emit_error(f"分片执行中断: {e}")
 
     finally:
-        # 确保客户端资源被释放（支持多种 Firecrawl SDK 版本）
-        await _cleanup_firecrawl_client(client)
+        await failures.close()
+        # 确保客户端的连接池被释放；守护模式的常驻客户端由守护进程关闭
+        if owns_client:
+            await _cleanup_firecrawl_client(client)
 
     # 最终统计
     total_time = time.time() - start_time_total
 
     # 发送完成通知
     emit_complete(
-        total=len(pending_articles),
+        total=source.pending,
         success=success_count,
         failed=failed_count,
         elapsed=total_time,
-        failedTasks=failed_tasks_for_gui
+        failed_tasks=failures.samples(),
+        failure_summary=failures.summary(),
+        failures_file=str(failures.path) if failures.count else None
     )
 
     if not GUI_MODE:
         print("\n" + "=" * 70)
         print("异步爬取完成！")
         print("=" * 70)
-        print(f"总文章数: {total}")
-        print(f"之前已成功: {existing_count}")
+        print(f"总文章数: {source.total}{'' if source.exhausted else '（读取未完成）'}")
+        print(f"之前已成功: {source.skipped}")
+        if source.refreshed:
+            print(f"到期刷新: {source.refreshed}（内容变化 {changed_count}，未变化 {unchanged_count}）")
         print(f"本轮成功: {success_count}")
         print(f"本轮失败: {failed_count}")
+        if skipped_count:
+            print(f"因时间预算跳过: {skipped_count}（下次运行继续）")
+        if _misses_deadline(_run_deadline.get(), 0.0) and not source.exhausted:
+            print("时间预算已用尽，文章列表未读完，其余文章留待下次运行")
+        if source.added:
+            print(f"运行中追加: {source.added}")
+        if dedup is not None and dedup.duplicates:
+            print(f"重复 URL: {dedup.duplicates}（已复用结果）")
+        if _response_cache is not None and _response_cache.hits:
+            print(f"缓存命中: {_response_cache.hits}")
+        if _postprocessor.failures:
+            print(f"后处理失败: {_postprocessor.failures}（已写出原文）")
         print(f"总用时: {total_time:.1f}秒")
-        print(f"平均用时: {total_time/max(len(pending_articles), 1):.2f}秒/篇")
+        print(f"平均用时: {total_time/max(processed, 1):.2f}秒/篇")
         print(f"最大并发数: {MAX_CONCURRENT}")
-        print(f"输出目录: {OUTPUT_DIR}")
+        if isinstance(engine, ShardCoordinator):
+            print(f"重新分配: {engine.reassigned} 篇")
+        elif isinstance(engine, BatchScrapeEngine):
+            print(f"批量任务数: {engine.jobs}")
+        elif limiter.adaptive:
+            print(f"结束时并发上限: {limiter.limit}")
+        http_stats = _http_pool.stats()
+        print(f"HTTP 连接: {http_stats['requests']} 次请求新建 {http_stats['opened']} 个连接（每个实例上限 {http_stats['size']}）")
+        if isinstance(client, HedgedClient):
+            print(f"对冲请求: {client.hedges} 次（先于原请求完成 {client.hedge_wins} 次）")
+        pool = client.client if isinstance(client, HedgedClient) else client
+        if isinstance(pool, FirecrawlPool):
+            for stat in pool.stats():
+                state = "（熔断中）" if stat["open"] else ""
+                print(f"  {stat['url']}: {stat['requests']} 次请求, {stat['errors']} 次失败{state}")
+        if OUTPUT_SINK == "files":
+            print(f"输出目录: {_output_dir()}")
+        else:
+            print(f"输出文件: {_article_writer.sink_path(_output_dir())}（{_article_writer.batches} 批写入）")
+        if _postprocessor.enabled:
+            print(f"派生产物: {_output_dir() / 'derived'}")
 
-        # 显示失败的文章
-        if results_for_report:
-            print(f"\n失败的链接 ({len(results_for_report)}):")
-            for item in results_for_report:
-                print(f"  [{item.index}] {item.title[:60]}...")
+        # 显示内容发生变化的刷新文章
+        if changed_for_report:
+            print(f"\n内容变化的文章 ({changed_count}):")
+            for item in changed_for_report:
+                print(f"  [{item.index}] {item.title[:60]}")
                 print(f"      {item.url}")
-                print(f"      错误: {item.error[:100] if item.error else '未知错误'}")
+            if changed_count > len(changed_for_report):
+                print(f"  ……其余 {changed_count - len(changed_for_report)} 篇见状态库 changed_at")
+
+        # 显示失败的文章：按错误分类汇总，逐条列出前 FAILURE_REPORT_MAX 篇
+        if failures.count:
+            print(f"\n失败的链接 ({failures.count}):")
+            for group in failures.summary():
+                print(f"  {group['errorClass']}: {group['count']}")
+            for item in await failures.page(0, FAILURE_REPORT_MAX):
+                print(f"  [{item['index']}] {item['title'][:60]}...")
+                print(f"      {item['url']}")
+                print(f"      错误: {item['error'][:100]}")
+            if failures.count > FAILURE_REPORT_MAX:
+                print(f"  ……其余 {failures.count - FAILURE_REPORT_MAX} 篇见 {failures.path}")
 
         print("\n✅ 异步爬取完成！")
 
 
+class DaemonJob:
+    """
+    守护模式下的一个爬取任务
+
+    任务的事件经独立的 GuiEventStream 缓冲合并后分发给所有订阅者，格式与 GUI 模式的 stdout 事件相同；
+    保留最新的 progress 与最终的 complete / error 事件，供之后订阅的客户端回放。
+    """
+
+    def __init__(self, job_id: str, output_dir: Path, articles: Optional[List[Dict[str, str]]], articles_file: Optional[Path],
+                 discover: Optional[str] = None):
+        self.id = job_id
+        self.output_dir = output_dir
+        self.articles = articles  # 请求中内联的文章列表
+        self.articles_file = articles_file
+        self.discover = discover  # 发现来源，同 DISCOVER
+        self.inbox = output_dir / f".inbox-{job_id}.jsonl"  # 运行中追加的文章
+        self.status = "queued"  # queued / running / completed / failed / cancelled
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.source: Optional[ArticleSource] = None
+        self.failures: Optional[FailureLog] = None
+        self.task: Optional[asyncio.Task] = None
+        self.events = GuiEventStream(EMIT_INTERVAL)
+        self.events.sink = self._publish
+        self._progress: Optional[dict] = None
+        self._final: List[dict] = []
+        self._subscribers: set = set()
+        self._appends = 0  # 进行中的追加写入数
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    @property
+    def accepting(self) -> bool:
+        """是否还能追加文章：任务未结束且尚未停止检查追加文件"""
+        return not self.finished and (self.source is None or not self.source.closed)
+
+    def appending(self) -> bool:
+        """是否有追加写入尚未完成；任务的 ArticleSource 在此期间不停止检查追加文件"""
+        return self._appends > 0
+
+    async def append(self, articles: List[Dict[str, str]]) -> None:
+        """在线程中把文章追加写入追加文件；调用前须确认 accepting"""
+        text = "".join(json.dumps(article, ensure_ascii=False) + "\n" for article in articles)
+
+        def write() -> None:
+            with open(self.inbox, "a", encoding="utf-8") as f:
+                f.write(text)
+
+        # 计数在让出事件循环之前增加，ArticleSource 看到写入完成前不会结束
+        self._appends += 1
+        try:
+            await asyncio.to_thread(write)
+        finally:
+            self._appends -= 1
+
+    def iter_articles(self) -> AsyncIterator[Dict[str, str]]:
+        if self.discover is not None:
+            return discover_articles(self.discover)
+        if self.articles_file is not None:
+            return iter_articles_async(self.articles_file)
+
+        async def inline():
+            for article in self.articles:
+                yield article
+        return inline()
+
+    def _publish(self, events: List[dict]) -> None:
+        for event in events:
+            if event.get("type") == "progress":
+                self._progress = event
+            elif event.get("type") in ("complete", "error"):
+                self._final.append(event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(events)
+            except asyncio.QueueFull:
+                # 消费过慢：断开该订阅者，重新订阅时从最新进度继续
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def close_subscribers(self) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(None)
+            except asyncio.QueueFull:
+                queue.get_nowait()
+                queue.put_nowait(None)
+        self._subscribers.clear()
+
+    async def subscribe(self) -> AsyncIterator[dict]:
+        """先回放最新进度与最终事件，再持续产出新事件，任务结束时返回"""
+        queue: asyncio.Queue = asyncio.Queue(DAEMON_EVENT_BUFFER)
+        replay = ([self._progress] if self._progress is not None else []) + self._final
+        if not self.finished:
+            self._subscribers.add(queue)
+        try:
+            for event in replay:
+                yield event
+            if self.finished:
+                return
+            while True:
+                events = await queue.get()
+                if events is None:
+                    return
+                for event in events:
+                    yield event
+        finally:
+            self._subscribers.discard(queue)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "outputDir": str(self.output_dir),
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "progress": self._progress["data"] if self._progress is not None else None,
+        }
+
+
+class ScrapeDaemon:
+    """
+    常驻爬取服务：所有任务共享一个 Firecrawl 客户端（连接池保持温热）与一个全局并发上限
+
+    接口（JSON）：
+    - POST /jobs 提交任务 {"articles": [...]}、{"articles_file": "..."} 或 {"discover": "sitemap:..."}，可选 "output_dir"
+    - GET /jobs、GET /jobs/{id} 查看任务
+    - GET /jobs/{id}/events 以 JSON Lines 流式返回任务事件
+    - GET /jobs/{id}/failures?offset=0&limit=100 分页返回失败记录与按错误分类的汇总
+    - POST /jobs/{id}/articles 向运行中的任务追加文章
+    - DELETE /jobs/{id} 取消任务
+    """
+
+    def __init__(self, client, limiter: AdaptiveLimiter):
+        self.client = client
+        self.limiter = limiter
+        self.fair = FairLimiter(limiter)
+        self.jobs: "OrderedDict[str, DaemonJob]" = OrderedDict()
+        self._slots = asyncio.Semaphore(max(DAEMON_MAX_JOBS, 1))
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, listen: str) -> None:
+        """
+        开始监听
+
+        Raises:
+            ValueError: DAEMON_LISTEN 格式不正确
+            OSError: 端口被占用或套接字无法创建
+        """
+        app = web.Application(middlewares=[self._auth], client_max_size=MAX_ARTICLE_BYTES)
+        app.router.add_post("/jobs", self._submit)
+        app.router.add_get("/jobs", self._list)
+        app.router.add_get("/jobs/{id}", self._get)
+        app.router.add_delete("/jobs/{id}", self._cancel)
+        app.router.add_get("/jobs/{id}/events", self._events)
+        app.router.add_get("/jobs/{id}/failures", self._failures)
+        app.router.add_post("/jobs/{id}/articles", self._append)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        if listen.startswith("unix:"):
+            await web.UnixSite(self._runner, listen[len("unix:"):]).start()
+        else:
+            host, port = _parse_address(listen, "127.0.0.1")
+            await web.TCPSite(self._runner, host, port).start()
+
+    async def close(self) -> None:
+        """取消未结束的任务并停止监听"""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def wait(self) -> None:
+        """等待所有已提交的任务结束"""
+        tasks = [job.task for job in self.jobs.values() if job.task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @web.middleware
+    async def _auth(self, request: web.Request, handler):
+        if DAEMON_TOKEN:
+            expected = f"Bearer {DAEMON_TOKEN}"
+            if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+                return web.json_response({"error": "unauthorized"}, status=401)
+        # 浏览器跨站提交的简单请求无法携带 application/json，据此拦截网页发起的跨站请求
+        if request.method == "POST" and request.content_type != "application/json":
+            return web.json_response({"error": "Content-Type 必须为 application/json"}, status=415)
+        return await handler(request)
+
+    @staticmethod
+    def _confine(value, name: str) -> Path:
+        """
+        把请求中的路径解析到 OUTPUT_DIR 之内（相对路径相对 OUTPUT_DIR）
+
+        Raises:
+            ValueError: 路径位于 OUTPUT_DIR 之外
+        """
+        root = Path(OUTPUT_DIR).resolve()
+        path = (root / str(value)).resolve()
+        if not path.is_relative_to(root):
+            raise ValueError(f"{name} 必须位于 OUTPUT_DIR（{root}）之内")
+        return path
+
+    def _job(self, request: web.Request) -> DaemonJob:
+        job = self.jobs.get(request.match_info["id"])
+        if job is None:
+            raise web.HTTPNotFound(text=json.dumps({"error": "job not found"}), content_type="application/json")
+        return job
+
+    @staticmethod
+    def _bad_request(message: str) -> web.Response:
+        return web.json_response({"error": message}, status=400)
+
+    async def _submit(self, request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+        except ValueError:
+            return self._bad_request("请求体不是有效的 JSON")
+        if not isinstance(body, dict):
+            return self._bad_request("请求体必须是 JSON 对象")
+        articles, articles_file, discover = body.get("articles"), body.get("articles_file"), body.get("discover")
+        if sum(value is not None for value in (articles, articles_file, discover)) != 1:
+            return self._bad_request("须提供 articles、articles_file 或 discover 之一")
+        try:
+            output_dir = self._confine(body.get("output_dir") or ".", "output_dir")
+            if articles_file is not None:
+                articles_file = self._confine(articles_file, "articles_file")
+        except ValueError as e:
+            return self._bad_request(str(e))
+        if discover is not None:
+            if isinstance(discover, list):
+                discover = ",".join(map(str, discover))
+            try:
+                parse_discover_sources(str(discover))
+            except ValueError as e:
+                return self._bad_request(str(e))
+        elif articles is not None:
+            if not isinstance(articles, list):
+                return self._bad_request("articles 必须是数组")
+            try:
+                for i, article in enumerate(articles, 1):
+                    _parse_schedule(i, _validate_article(i, article), time.time())
+            except ValueError as e:
+                return self._bad_request(str(e))
+        else:
+            if not articles_file.is_file():
+                return self._bad_request(f"找不到文章列表文件 {articles_file}")
+
+        # 同一输出目录共用状态库与输出文件，不能同时运行两个任务
+        if any(job.output_dir == output_dir and not job.finished for job in self.jobs.values()):
+            return web.json_response({"error": f"输出目录 {output_dir} 已有未结束的任务"}, status=409)
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            return self._bad_request(f"无法创建输出目录: {e}")
+
+        job = DaemonJob(uuid.uuid4().hex[:12], output_dir, articles, articles_file, discover)
+        job.inbox.unlink(missing_ok=True)
+        self.jobs[job.id] = job
+        self._prune()
+        job.task = asyncio.create_task(self._run_job(job))
+        return web.json_response(job.summary(), status=201)
+
+    def _prune(self) -> None:
+        """只保留最近 DAEMON_JOB_HISTORY 个已结束的任务"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - DAEMON_JOB_HISTORY, 0)]:
+            del self.jobs[job_id]
+
+    async def _list(self, request: web.Request) -> web.Response:
+        return web.json_response([job.summary() for job in self.jobs.values()])
+
+    async def _get(self, request: web.Request) -> web.Response:
+        return web.json_response(self._job(request).summary())
+
+    async def _cancel(self, request: web.Request) -> web.Response:
+        job = self._job(request)
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+        return web.json_response(job.summary())
+
+    async def _append(self, request: web.Request) -> web.Response:
+        """追加文章：请求体为单篇文章对象或数组，写入任务的追加文件，由任务按 INBOX_POLL_INTERVAL 读取"""
+        job = self._job(request)
+        try:
+            body = await request.json()
+        except ValueError:
+            return self._bad_request("请求体不是有效的 JSON")
+        articles = body if isinstance(body, list) else [body]
+        try:
+            for i, article in enumerate(articles, 1):
+                _parse_schedule(i, _validate_article(i, article), time.time())
+        except ValueError as e:
+            return self._bad_request(str(e))
+        # 检查与登记写入之间不让出事件循环：任务停止读取追加文件后不会再有条目被写入而丢失
+        if not job.accepting:
+            return web.json_response({"error": f"任务已{'结束' if job.finished else '停止接收追加条目'}"}, status=409)
+        await job.append(articles)
+        return web.json_response({"accepted": len(articles)}, status=202)
+
+    async def _events(self, request: web.Request) -> web.StreamResponse:
+        job = self._job(request)
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        try:
+            async with aclosing(job.subscribe()) as events:
+                async for event in events:
+                    await response.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+        except ConnectionError:
+            pass  # 客户端断开
+        return response
+
+    async def _failures(self, request: web.Request) -> web.Response:
+        job = self._job(request)
+        try:
+            offset = max(int(request.query.get("offset", "0")), 0)
+            limit = min(max(int(request.query.get("limit", "100")), 1), DAEMON_FAILURE_PAGE_MAX)
+        except ValueError:
+            return self._bad_request("offset 与 limit 必须为整数")
+        if job.failures is None:
+            return web.json_response({"total": 0, "summary": [], "failures": []})
+        records = await job.failures.page(offset, limit)
+        return web.json_response({"total": job.failures.count, "summary": job.failures.summary(), "failures": records})
+
+    async def _run_job(self, job: DaemonJob) -> None:
+        _current_job.set(job)  # 本协程及其创建的所有任务都属于该任务
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                job.events.start()
+                store = RunStateStore(job.output_dir / ".scrape_state.db")
+                try:
+                    await _run_scrape(store, job.started_at, job.iter_articles(), job.inbox,
+                                      self.client, self.fair.share(job.id))
+                finally:
+                    await asyncio.to_thread(store.close)  # 最后一次提交不占用其他任务的事件循环
+                    _article_writer.release(job.output_dir)
+            job.status = "failed" if job._final and job._final[-1]["type"] == "error" else "completed"
+            if job.status == "failed":
+                job.error = job._final[-1]["message"]
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            job.error = "Cancelled"
+            job.events.emit({"type": "error", "message": "任务已取消"})
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.events.emit({"type": "error", "message": f"任务异常: {e}"})
+        finally:
+            job.finished_at = time.time()
+            await job.events.stop()
+            job.close_subscribers()
+            job.inbox.unlink(missing_ok=True)
+            if not GUI_MODE:
+                print(f"任务 {job.id} {job.status}（{job.finished_at - job.created_at:.1f}s）")
+
+
+async def run_daemon():
+    """以守护模式运行：保持 Firecrawl 客户端与并发上限常驻，通过 DAEMON_LISTEN 接收任务，收到停止信号后退出"""
+    global _response_cache
+
+    try:
+        setup_async_signal_handlers(asyncio.get_running_loop())
+    except Exception:
+        pass
+
+    try:
+        endpoints = load_endpoints()
+        if SHARDS > 0 or SHARD_LISTEN:
+            raise ValueError("守护模式不支持分片执行（SHARDS / SHARD_LISTEN）")
+        if not FIRECRAWL_API_KEY and not all(ep.key for ep in endpoints):
+            raise ValueError("未配置 Firecrawl API Key")
+        if OUTPUT_SINK not in ("files", "jsonl", "archive"):
+            raise ValueError(f"未知的 OUTPUT_SINK: {OUTPUT_SINK}（可选 files / jsonl / archive）")
+        if SCRAPE_ENGINE not in ("single", "batch"):
+            raise ValueError(f"未知的 SCRAPE_ENGINE: {SCRAPE_ENGINE}（可选 single / batch）")
+        _postprocessor.validate()
+        load_host_policies()
+        await _telemetry.start(METRICS_LISTEN, TRACE_FILE)
+        if CACHE_MODE != "off":
+            _response_cache = ScrapeCache(CACHE_DIR / "responses.db", CACHE_MODE, CACHE_TTL, int(CACHE_MAX_MB * 1024 * 1024))
+    except (ValueError, OSError) as e:
+        await _telemetry.close()
+        print(f"❌ 错误: {e}")
+        return
+
+    client = create_firecrawl_client(endpoints)
+    limiter = create_limiter()
+    daemon = ScrapeDaemon(client, limiter)
+    _telemetry.gauge("scrape_in_flight", lambda: limiter.in_flight, "Articles currently being scraped")
+    _telemetry.gauge("scrape_concurrency_limit", lambda: limiter.limit, "Current adaptive concurrency limit")
+    _telemetry.gauge("daemon_jobs_running", lambda: sum(job.status == "running" for job in daemon.jobs.values()),
+                     "Daemon jobs currently running")
+    try:
+        await daemon.start(DAEMON_LISTEN)
+        print(f"守护模式已启动，监听 {DAEMON_LISTEN}（同时运行 {DAEMON_MAX_JOBS} 个任务）")
+        while not _stop_requested:
+            await asyncio.sleep(0.5)
+        print("收到停止信号，正在取消未结束的任务...")
+    except (ValueError, OSError) as e:
+        print(f"❌ 错误: 无法启动守护模式: {e}")
+    finally:
+        await daemon.close()
+        await _article_writer.close()
+        _postprocessor.close()
+        await _telemetry.close()
+        await _cleanup_firecrawl_client(client)
+        if _response_cache is not None:
+            _response_cache.close()
+            _response_cache = None
+        if DAEMON_LISTEN.startswith("unix:"):
+            Path(DAEMON_LISTEN[len("unix:"):]).unlink(missing_ok=True)
+
+
 def main():
     """主函数 - asyncio版本"""
     # 设置信号处理器
@@ -675,13 +5445,37 @@ def main():
     if not GUI_MODE:
         print(f"⚙️  配置:")
         print(f"  • 最大并发数: {MAX_CONCURRENT}")
-        print(f"  • 批次大小: {BATCH_SIZE}")
+        if ADAPTIVE_CONCURRENCY:
+            print(f"  • 自适应并发: {ADAPTIVE_MIN_CONCURRENT}-{ADAPTIVE_MAX_CONCURRENT}")
+        print(f"  • 队列缓冲: {BATCH_SIZE}")
+        if SCRAPE_ENGINE == "batch":
+            print(f"  • 批量模式: 每批 {BATCH_SCRAPE_SIZE} 个 URL, 同时 {BATCH_SCRAPE_JOBS} 个任务")
         print(f"  • 重试次数: {RETRY_COUNT}")
+        if REFRESH_AFTER > 0:
+            print(f"  • 刷新期限: {REFRESH_AFTER:g}s")
+        if RUN_TIME_BUDGET > 0:
+            print(f"  • 时间预算: {RUN_TIME_BUDGET:g}s")
+        if ARTICLES_INBOX:
+            print(f"  • 追加文件: {ARTICLES_INBOX}")
+        if DISCOVER:
+            print(f"  • 发现来源: {DISCOVER}{'（过滤: ' + DISCOVER_INCLUDE + '）' if DISCOVER_INCLUDE else ''}")
         print(f"  • 请求超时: {REQUEST_TIMEOUT}s")
+        print(f"  • HTTP 连接池: 每个实例 {_http_pool.size()} 个连接, 空闲保留 {HTTP_KEEPALIVE_EXPIRY:g}s{', HTTP/2' if _http_pool.http2 else ''}")
+        if HTTP2 and not _http_pool.http2:
+            print("  ⚠️ 未安装 h2，HTTP2 已回退到 HTTP/1.1（pip install h2）")
         print(f"  • 输出目录: {OUTPUT_DIR}")
+        if _postprocessor.enabled:
+            print(f"  • 后处理: {POSTPROCESS}")
+        if DAEMON_LISTEN:
+            print(f"  • 守护模式: {DAEMON_LISTEN}（同时运行 {DAEMON_MAX_JOBS} 个任务）")
 
-    # 运行异步主函数
-    asyncio.run(main_async())
+    # 运行异步主函数（设置 SHARD_COORDINATOR 时作为分片 worker 运行，设置 DAEMON_LISTEN 时常驻接收任务）
+    if SHARD_COORDINATOR:
+        asyncio.run(run_shard_worker())
+    elif DAEMON_LISTEN:
+        asyncio.run(run_daemon())
+    else:
+        asyncio.run(main_async())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,9 @@
+import pytest
+
+import scrape_asyncio as s
+
+
+@pytest.fixture(autouse=True)
+def fresh_article_writer(monkeypatch):
+    """每个测试使用新的 ArticleWriter：写入协程绑定在首次写入时的事件循环上"""
+    monkeypatch.setattr(s, "_article_writer", s.ArticleWriter("files", s.WRITE_QUEUE_SIZE))
@@ -0,0 +1,113 @@
+"""BatchScrapeEngine：批量任务提交、轮询取回、失败 URL 合并重试与无效 URL"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import scrape_asyncio as s
+
+
+def document(url, markdown, error=None):
+    return SimpleNamespace(
+        markdown=markdown,
+        metadata_typed=SimpleNamespace(source_url=url, url=url, error=error),
+    )
+
+
+class FakeBatchClient:
+    """按提交次数返回结果的批量接口：fail_first 中的 URL 在第一次提交时没有正文"""
+
+    def __init__(self, fail_first=(), invalid=()):
+        self.fail_first = set(fail_first)
+        self.invalid = set(invalid)
+        self.submitted = []
+        self.cancelled = []
+        self._jobs = {}
+
+    async def start_batch_scrape(self, urls, **kwargs):
+        job_id = f"job-{len(self.submitted)}"
+        self.submitted.append(list(urls))
+        first = len(self.submitted) == 1
+        docs = []
+        for url in urls:
+            if url in self.invalid:
+                continue
+            if first and url in self.fail_first:
+                docs.append(document(url, None, error="upstream 502"))
+            else:
+                docs.append(document(url, f"# {url}"))
+        self._jobs[job_id] = docs
+        return SimpleNamespace(id=job_id, invalid_urls=[url for url in urls if url in self.invalid])
+
+    async def get_batch_scrape_status(self, job_id, *args, **kwargs):
+        docs = self._jobs[job_id]
+        return SimpleNamespace(status="completed", completed=len(docs), data=docs, next=None)
+
+    async def get_batch_scrape_errors(self, job_id, **kwargs):
+        return {"errors": [], "robotsBlocked": []}
+
+    async def cancel_batch_scrape(self, job_id, **kwargs):
+        self.cancelled.append(job_id)
+
+
+@pytest.fixture(autouse=True)
+def fast_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(s, "BATCH_POLL_INTERVAL", 0)
+    monkeypatch.setattr(s, "RETRY_DELAY_BASE", 0)
+    monkeypatch.setattr(s, "BATCH_SCRAPE_SIZE", 2)
+    monkeypatch.setattr(s, "_response_cache", None)
+
+
+def run_engine(client, articles):
+    async def main():
+        engine = s.BatchScrapeEngine(client)
+
+        async def source():
+            for article in articles:
+                yield article
+
+        results = {}
+        async for position, result in engine.stream(source()):
+            results[position] = result
+        return engine, results
+
+    return asyncio.run(main())
+
+
+def test_all_urls_succeed_in_chunks(tmp_path):
+    articles = [s.Article(i, f"t{i}", f"https://example.com/{i}") for i in range(1, 6)]
+    client = FakeBatchClient()
+    engine, results = run_engine(client, articles)
+    assert [len(urls) for urls in client.submitted] == [2, 2, 1]
+    assert sorted(results) == list(range(5))
+    assert all(result.success for result in results.values())
+    assert engine.jobs == 3 and engine.in_flight == 0
+    assert (tmp_path / results[0].filename).read_text(encoding="utf-8").endswith("# https://example.com/1")
+
+
+def test_failed_urls_are_resubmitted_together():
+    articles = [s.Article(i, f"t{i}", f"https://example.com/{i}") for i in range(1, 3)]
+    client = FakeBatchClient(fail_first={"https://example.com/2"})
+    _, results = run_engine(client, articles)
+    assert client.submitted == [["https://example.com/1", "https://example.com/2"], ["https://example.com/2"]]
+    assert results[1].success and results[1].attempts == 2
+
+
+def test_invalid_urls_fail_without_retry():
+    articles = [s.Article(1, "ok", "https://example.com/1"), s.Article(2, "bad", "not a url")]
+    client = FakeBatchClient(invalid={"not a url"})
+    _, results = run_engine(client, articles)
+    assert len(client.submitted) == 1
+    assert results[0].success
+    assert (results[1].success, results[1].error) == (False, "无效 URL")
+
+
+def test_same_url_in_one_chunk_is_requested_once():
+    articles = [s.Article(1, "a", "https://example.com/a"), s.Article(2, "a", "https://example.com/a")]
+    client = FakeBatchClient()
+    _, results = run_engine(client, articles)
+    assert client.submitted == [["https://example.com/a"]]
+    assert results[0].success and results[1].success
+    assert results[0].filename != results[1].filename
@@ -0,0 +1,83 @@
+"""ScrapeCache：键的规范化、TTL 过期、LRU 淘汰与关闭后持久化"""
+
+import asyncio
+
+import pytest
+
+import scrape_asyncio as s
+
+OPTIONS = {"formats": ["markdown"]}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_round_trip_and_url_normalization(tmp_path):
+    async def main():
+        cache = s.ScrapeCache(tmp_path / "responses.db", "use", 60, 1 << 20)
+        await cache.put("https://Example.com:443/a#frag", OPTIONS, "# 正文")
+        hit = await cache.get("https://example.com/a", OPTIONS)
+        other_options = await cache.get("https://example.com/a", {"formats": ["html"]})
+        cache.close()
+        return hit, other_options, cache.hits, cache.misses
+
+    assert run(main()) == ("# 正文", None, 1, 1)
+
+
+def test_expired_entries_only_served_when_stale_allowed(tmp_path):
+    async def main():
+        cache = s.ScrapeCache(tmp_path / "responses.db", "revalidate", 0, 1 << 20)
+        await cache.put("https://example.com/a", OPTIONS, "old")
+        await asyncio.sleep(0.01)
+        fresh = await cache.get("https://example.com/a", OPTIONS)
+        stale = await cache.get("https://example.com/a", OPTIONS, allow_stale=True)
+        cache.close()
+        return fresh, stale
+
+    assert run(main()) == (None, "old")
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    body = "".join(chr(0x4E00 + i % 2000) for i in range(4000))  # 压缩后约 8KB
+
+    async def main():
+        cache = s.ScrapeCache(tmp_path / "responses.db", "use", 60, 1)
+        cache.max_bytes = 10**9
+        for i in range(3):
+            await cache.put(f"https://example.com/{i}", OPTIONS, body + str(i))
+            await asyncio.sleep(0.01)
+        await cache.get("https://example.com/0", OPTIONS)  # 0 成为最近访问
+        cache.max_bytes = int(cache._size * 0.8)
+        await cache.put("https://example.com/3", OPTIONS, body + "3")
+        kept = [await cache.get(f"https://example.com/{i}", OPTIONS) is not None for i in range(4)]
+        cache.close()
+        return kept, cache._size <= cache.max_bytes
+
+    kept, within_limit = run(main())
+    assert kept[0] and kept[3] and not kept[1]
+    assert within_limit
+
+
+def test_entries_survive_reopen(tmp_path):
+    path = tmp_path / "responses.db"
+
+    async def write():
+        cache = s.ScrapeCache(path, "use", 60, 1 << 20)
+        await cache.put("https://example.com/a", OPTIONS, "body")
+        cache.close()
+
+    async def read():
+        cache = s.ScrapeCache(path, "use", 60, 1 << 20)
+        try:
+            return await cache.get("https://example.com/a", OPTIONS), cache._size > 0
+        finally:
+            cache.close()
+
+    run(write())
+    assert run(read()) == ("body", True)
+
+
+def test_unknown_mode_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        s.ScrapeCache(tmp_path / "responses.db", "sometimes", 60, 1 << 20)
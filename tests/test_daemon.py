@@ -0,0 +1,175 @@
+"""守护模式：任务间公平分配并发、鉴权与请求校验、任务执行、事件回放与追加文章"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+import scrape_asyncio as s
+
+TOKEN = "secret"
+HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+
+class FakeClient:
+    def __init__(self):
+        self.urls = []
+
+    async def scrape(self, url, **kwargs):
+        self.urls.append(url)
+        return SimpleNamespace(markdown=f"# {url}")
+
+
+@pytest.fixture(autouse=True)
+def daemon_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(s, "DAEMON_TOKEN", TOKEN)
+    monkeypatch.setattr(s, "_response_cache", None)
+    monkeypatch.setattr(s, "EMIT_INTERVAL", 0)
+
+
+def run_daemon(scenario):
+    """启动守护服务，执行 scenario(session, base_url, daemon) 后关闭"""
+    async def main():
+        client = FakeClient()
+        daemon = s.ScrapeDaemon(client, s.AdaptiveLimiter(2, 2, 2))
+        await daemon.start("127.0.0.1:0")
+        host, port = daemon._runner.addresses[0][:2]
+        try:
+            async with aiohttp.ClientSession() as session:
+                return await scenario(session, f"http://{host}:{port}", daemon), client
+        finally:
+            await daemon.close()
+
+    return asyncio.run(main())
+
+
+def test_fair_limiter_hands_slots_round_robin():
+    async def main():
+        fair = s.FairLimiter(s.AdaptiveLimiter(1, 1, 1))
+        gate = asyncio.Event()
+        order = []
+
+        async def worker(job, n):
+            async with fair.share(job):
+                order.append(f"{job}{n}")
+                await gate.wait()
+
+        # 大任务占住唯一的槽位并排满等待队列，小任务随后提交
+        tasks = [asyncio.create_task(worker("a", i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(worker("b", 0)))
+        await asyncio.sleep(0.01)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return order, fair.limiter.in_flight
+
+    assert asyncio.run(main()) == (["a0", "a1", "b0", "a2"], 0)
+
+
+def test_requests_need_token_and_json():
+    async def scenario(session, base, daemon):
+        async with session.get(f"{base}/jobs") as response:
+            unauthorized = response.status
+        async with session.post(f"{base}/jobs", headers=HEADERS, data="articles=1") as response:
+            not_json = response.status
+        async with session.get(f"{base}/jobs", headers=HEADERS) as response:
+            return unauthorized, not_json, response.status, await response.json()
+
+    assert run_daemon(scenario)[0] == (401, 415, 200, [])
+
+
+@pytest.mark.parametrize("body, message", [
+    ({}, "之一"),
+    ({"articles": [{"title": "a"}]}, "缺少"),
+    ({"articles": [], "output_dir": "../outside"}, "output_dir"),
+    ({"articles_file": "/etc/passwd"}, "articles_file"),
+    ({"discover": "crawl:https://example.com"}, "未知的发现来源"),
+    ({"discover": "sitemap:https://example.com", "articles": []}, "之一"),
+])
+def test_submit_validation(body, message):
+    async def scenario(session, base, daemon):
+        async with session.post(f"{base}/jobs", headers=HEADERS, json=body) as response:
+            return response.status, (await response.json())["error"]
+
+    (status, error), _ = run_daemon(scenario)
+    assert status == 400 and message in error
+
+
+def test_job_runs_and_replays_final_events(tmp_path):
+    articles = [{"title": f"t{i}", "url": f"https://example.com/{i}"} for i in range(1, 4)]
+
+    async def scenario(session, base, daemon):
+        body = {"articles": articles, "output_dir": "news"}
+        async with session.post(f"{base}/jobs", headers=HEADERS, json=body) as response:
+            assert response.status == 201
+            job_id = (await response.json())["id"]
+        await daemon.wait()
+        async with session.get(f"{base}/jobs/{job_id}", headers=HEADERS) as response:
+            summary = await response.json()
+        async with session.get(f"{base}/jobs/{job_id}/events", headers=HEADERS) as response:
+            events = [json.loads(line) for line in (await response.text()).splitlines()]
+        async with session.post(f"{base}/jobs/{job_id}/articles", headers=HEADERS, json=articles[0]) as response:
+            late = response.status
+        return summary, events, late
+
+    (summary, events, late), client = run_daemon(scenario)
+    assert summary["status"] == "completed"
+    assert sorted(client.urls) == [article["url"] for article in articles]
+    assert sorted(path.name for path in (tmp_path / "news").glob("*.md")) == ["001_t1.md", "002_t2.md", "003_t3.md"]
+    assert events[-1]["type"] == "complete"
+    assert late == 409
+
+
+def test_append_in_flight_keeps_inbox_open(tmp_path):
+    """追加写入在线程中进行时，列表已处理完的任务仍等待写入完成并读取追加的条目"""
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    job = s.DaemonJob("job", tmp_path, [], None)
+
+    async def main():
+        source = s.ArticleSource(job.iter_articles(), store, job.inbox, job.appending)
+        writing = asyncio.create_task(job.append([{"title": "late", "url": "https://example.com/late"}]))
+        await asyncio.sleep(0)  # 写入已登记，线程尚未写完
+        assert job.appending()
+        seen = []
+        async for article in source:
+            seen.append(article)
+            source.completed += 1
+        await writing
+        return seen, job.appending()
+
+    seen, appending = asyncio.run(main())
+    store.close()
+    assert [article.url for article in seen] == ["https://example.com/late"]
+    assert not appending
+
+
+def test_append_to_running_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "INBOX_POLL_INTERVAL", 0.01)
+    appended = {}
+    scrape = FakeClient.scrape
+
+    async def held_scrape(self, url, **kwargs):
+        await appended["event"].wait()  # 追加请求返回前任务不会结束
+        return await scrape(self, url, **kwargs)
+
+    monkeypatch.setattr(FakeClient, "scrape", held_scrape)
+
+    async def scenario(session, base, daemon):
+        appended["event"] = asyncio.Event()
+        body = {"articles": [{"title": "t1", "url": "https://example.com/1"}], "output_dir": "news"}
+        async with session.post(f"{base}/jobs", headers=HEADERS, json=body) as response:
+            job_id = (await response.json())["id"]
+        added = [{"title": "t2", "url": "https://example.com/2"}, {"title": "t3", "url": "https://example.com/3"}]
+        async with session.post(f"{base}/jobs/{job_id}/articles", headers=HEADERS, json=added) as response:
+            accepted = response.status, await response.json()
+        appended["event"].set()
+        await daemon.wait()
+        return accepted, daemon.jobs[job_id].status
+
+    (accepted, status), client = run_daemon(scenario)
+    assert accepted == (202, {"accepted": 2})
+    assert status == "completed"
+    assert sorted(client.urls) == [f"https://example.com/{i}" for i in (1, 2, 3)]
@@ -0,0 +1,108 @@
+"""normalize_url / dedup_key / UrlDeduplicator：URL 规范化与运行内去重"""
+
+import asyncio
+
+import pytest
+
+import scrape_asyncio as s
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Example.COM:443/a/b/#top", "https://example.com/a/b"),
+    ("http://example.com:80", "http://example.com/"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("https://example.com/a?b=2&utm_source=x&a=1&fbclid=y", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?UTM_Medium=x", "https://example.com/a"),
+    ("https://[::1/", "https://[::1/"),
+])
+def test_normalize_url(url, expected):
+    assert s.normalize_url(url) == expected
+
+
+def test_dedup_key_ignores_scheme_but_not_path():
+    assert s.dedup_key("http://example.com/a/") == s.dedup_key("https://EXAMPLE.com/a?utm_campaign=z")
+    assert s.dedup_key("https://example.com/a") != s.dedup_key("https://example.com/b")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = s.BloomFilter(1 << 16)
+    keys = [s.dedup_key(f"https://example.com/{i}") for i in range(500)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    others = [s.dedup_key(f"https://other.example.com/{i}") for i in range(500)]
+    assert sum(key in bloom for key in others) < 10
+
+
+async def collect(dedup, articles):
+    async def source():
+        for article in articles:
+            yield article
+
+    return [article async for article in dedup.filter(source())]
+
+
+def test_pending_duplicates_become_aliases(tmp_path):
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    dedup = s.UrlDeduplicator(store)
+    articles = [
+        s.Article(1, "a", "https://example.com/a"),
+        s.Article(2, "a again", "http://Example.com/a/#x"),
+        s.Article(3, "b", "https://example.com/b"),
+    ]
+    out = asyncio.run(collect(dedup, articles))
+    assert [article.index for article in out] == [1, 3]
+    assert dedup.duplicates == 1
+    failed = s.ScrapeResult(index=1, title="a", url=articles[0].url, success=False, error="boom")
+    assert dedup.complete(1, articles[0].url, failed) == [articles[1]]
+    assert dedup.complete(1, articles[0].url, failed) == []
+    store.close()
+
+
+def test_completed_duplicate_is_copied_from_recent_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "OUTPUT_DIR", tmp_path)
+    (tmp_path / "001_a.md").write_text("body", encoding="utf-8")
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    dedup = s.UrlDeduplicator(store)
+    url = "https://example.com/a"
+    first = asyncio.run(collect(dedup, [s.Article(1, "a", url)]))
+    done = s.ScrapeResult(index=1, title="a", url=url, success=True, filename="001_a.md")
+    dedup.complete(1, url, done)
+    later = asyncio.run(collect(dedup, [s.Article(7, "a", url + "?utm_source=feed")]))
+    assert first == [s.Article(1, "a", url)]
+    assert later == [s.Article(7, "a", url + "?utm_source=feed", copy_from="001_a.md")]
+    store.close()
+
+
+def test_duplicate_of_earlier_run_is_copied_from_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(s, "STATE_KEYS_BATCH", 2)  # 多批次预热
+    (tmp_path / "003_a.md").write_text("body", encoding="utf-8")
+    url = "https://example.com/a"
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    for index in (1, 2):
+        asyncio.run(store.record(index, f"https://example.com/{index}", True, filename=f"00{index}.md"))
+    asyncio.run(store.record(3, url, True, content_hash="h", filename="003_a.md"))
+    store.close()
+
+    # 新一轮运行：状态库重新打开，本进程内从未见过这个去重键
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    variant = s.Article(9, "a", "http://example.com/a/?utm_source=feed")
+    due = s.Article(3, "a", url, previous=("h", "003_a.md"))
+    out = asyncio.run(collect(s.UrlDeduplicator(store), [variant, due]))
+    store.close()
+    assert out == [variant._replace(copy_from="003_a.md"), due]  # 到期条目照常重新抓取
+
+
+def test_fan_out_copies_primary_result(tmp_path):
+    async def main():
+        (tmp_path / "001_a.md").write_text("# 1. a\n\n**URL:** u\n\n---\n\nbody", encoding="utf-8")
+        primary = s.ScrapeResult(index=1, title="a", url="u", success=True, filename="001_a.md", content_hash="h")
+        copied = await s._fan_out(primary, s.Article(2, "b", "u2"), str(tmp_path))
+        failed = await s._fan_out(RuntimeError("boom"), s.Article(3, "c", "u3"), str(tmp_path))
+        return copied, failed
+
+    copied, failed = asyncio.run(main())
+    assert (copied.success, copied.content_hash) == (True, "h")
+    assert (tmp_path / copied.filename).read_text(encoding="utf-8").endswith("\n---\n\nbody")
+    assert (failed.success, failed.error) == (False, "boom")
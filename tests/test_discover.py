@@ -0,0 +1,127 @@
+"""发现阶段：来源解析、robots.txt 与 sitemap 索引展开、gzip、去重过滤与数量上限"""
+
+import asyncio
+import gzip
+
+import pytest
+from aiohttp import web
+
+import scrape_asyncio as s
+
+URLSET = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+    ' xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">{}</urlset>'
+)
+
+
+def urlset(*entries):
+    items = []
+    for url, title in entries:
+        news = f"<news:news><news:title>{title}</news:title></news:news>" if title else ""
+        items.append(f"<url><loc>{url}</loc>{news}</url>")
+    return URLSET.format("".join(items))
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(s, "GUI_MODE", True)
+    monkeypatch.setattr(s, "DISCOVER_INCLUDE", "")
+    monkeypatch.setattr(s, "DISCOVER_LIMIT", 0)
+
+
+def test_parse_discover_sources():
+    assert s.parse_discover_sources(" sitemap:https://a.example , MAP:http://b.example/ ,") == [
+        ("sitemap", "https://a.example"),
+        ("map", "http://b.example/"),
+    ]
+    for spec, message in (("crawl:https://a.example", "未知"), ("sitemap:a.example", "http"), (" , ", "未配置")):
+        with pytest.raises(ValueError, match=message):
+            s.parse_discover_sources(spec)
+
+
+def test_title_from_url():
+    assert s._title_from_url("https://example.com/news/%E6%96%B0%E9%97%BB/") == "新闻"
+    assert s._title_from_url("https://example.com/") == "example.com"
+
+
+def discover(routes):
+    """在本地服务上运行发现阶段，返回产出的条目（含表示暂无新条目的 None）"""
+    async def main():
+        app = web.Application()
+        for path, handler in routes.items():
+            app.router.add_get(path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host, port = runner.addresses[0][:2]
+        try:
+            return [entry async for entry in s.discover_articles(f"sitemap:http://{host}:{port}/")]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def site_routes(hits):
+    async def robots(request):
+        return web.Response(text=f"User-agent: *\nSitemap: {request.scheme}://{request.host}/index.xml\n")
+
+    async def index(request):
+        base = f"{request.scheme}://{request.host}"
+        return web.Response(
+            text=(
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<sitemap><loc>{base}/news.xml.gz</loc></sitemap>"
+                "<sitemap><loc>/broken.xml</loc></sitemap>"
+                f"<sitemap><loc>{base}/pages.xml</loc></sitemap>"
+                "</sitemapindex>"
+            ),
+            content_type="application/xml",
+        )
+
+    async def news(request):
+        hits.append("news")
+        body = urlset(("https://example.com/a", "标题 A"), ("https://example.com/b?utm_source=x", None))
+        return web.Response(body=gzip.compress(body.encode()), content_type="application/gzip")
+
+    async def broken(request):
+        return web.Response(text="<urlset><url><loc>", content_type="application/xml")
+
+    async def pages(request):
+        hits.append("pages")
+        return web.Response(
+            text=urlset(("https://example.com/b", None), ("https://example.com/c/", None), ("https://example.com/a#top", None)),
+            content_type="application/xml",
+        )
+
+    return {"/robots.txt": robots, "/index.xml": index, "/news.xml.gz": news, "/broken.xml": broken, "/pages.xml": pages}
+
+
+def test_sitemaps_from_robots_are_expanded_and_deduplicated():
+    hits = []
+    entries = discover(site_routes(hits))
+    articles = [entry for entry in entries if entry is not None]
+    assert articles == [
+        {"title": "标题 A", "url": "https://example.com/a"},
+        {"title": "b", "url": "https://example.com/b?utm_source=x"},
+        {"title": "c", "url": "https://example.com/c/"},
+    ]
+    assert hits == ["news", "pages"]  # 损坏的子 sitemap 只提示，不影响其他 sitemap
+
+
+def test_include_filter_and_limit(monkeypatch):
+    monkeypatch.setattr(s, "DISCOVER_INCLUDE", r"/[bc]")
+    monkeypatch.setattr(s, "DISCOVER_LIMIT", 1)
+    entries = discover(site_routes([]))
+    assert [entry["url"] for entry in entries if entry is not None] == ["https://example.com/b?utm_source=x"]
+
+
+def test_bad_include_pattern(monkeypatch):
+    monkeypatch.setattr(s, "DISCOVER_INCLUDE", "([")
+
+    async def main():
+        return [entry async for entry in s.discover_articles("sitemap:https://example.com/sitemap.xml")]
+
+    with pytest.raises(ValueError, match="DISCOVER_INCLUDE"):
+        asyncio.run(main())
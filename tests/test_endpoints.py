@@ -0,0 +1,149 @@
+"""load_endpoints / FirecrawlPool：端点配置解析、按权重选择实例、熔断与半开探测、批量任务路由"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import scrape_asyncio as s
+
+
+class Overloaded(Exception):
+    status_code = 503
+
+
+class FakeClient:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = []
+
+    async def scrape(self, url, **kwargs):
+        self.calls.append(url)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise Overloaded(self.name)
+        return SimpleNamespace(markdown=self.name)
+
+    async def start_batch_scrape(self, urls, **kwargs):
+        self.calls.append(("start", tuple(urls)))
+        return SimpleNamespace(id=f"{self.name}-job")
+
+    async def get_batch_scrape_status(self, job_id, *args, **kwargs):
+        self.calls.append(("status", job_id))
+        return SimpleNamespace(status="completed")
+
+    async def get_batch_scrape_errors(self, job_id, **kwargs):
+        self.calls.append(("errors", job_id))
+        return {}
+
+    async def cancel_batch_scrape(self, job_id, **kwargs):
+        self.calls.append(("cancel", job_id))
+        return True
+
+
+def make_pool(*clients, weights=None):
+    configs = [s.EndpointConfig(f"http://{c.name}", (weights or {}).get(c.name, 1.0)) for c in clients]
+    pool = s.FirecrawlPool(configs, "key")
+    for endpoint, client in zip(pool._endpoints, clients):
+        endpoint.client = client
+    return pool
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("http://a/, http://b", [("http://a", 1.0, ""), ("http://b", 1.0, "")]),
+    ('[{"url": "http://a", "weight": 3, "key": "k"}, "http://b"]', [("http://a", 3.0, "k"), ("http://b", 1.0, "")]),
+])
+def test_load_endpoints(monkeypatch, raw, expected):
+    monkeypatch.setattr(s, "FIRECRAWL_URL", raw)
+    assert [(e.url, e.weight, e.key) for e in s.load_endpoints()] == expected
+
+
+@pytest.mark.parametrize("raw", ["", "[", '[{"url": "http://a", "weight": 0}]', '[{"weight": 1}]'])
+def test_load_endpoints_rejects_bad_config(monkeypatch, raw):
+    monkeypatch.setattr(s, "FIRECRAWL_URL", raw)
+    with pytest.raises(ValueError):
+        s.load_endpoints()
+
+
+def test_least_outstanding_respects_weights():
+    a, b = FakeClient("a"), FakeClient("b")
+    pool = make_pool(a, b, weights={"a": 3.0})
+
+    async def main():
+        picked = []
+        for _ in range(4):
+            endpoint = await pool._acquire()
+            endpoint.outstanding += 1
+            picked.append(endpoint.client.name)
+        return picked
+
+    # (进行中 + 1) / 权重：a 依次为 1/3、2/3、1（与 b 相同时取前者）、4/3
+    assert asyncio.run(main()) == ["a", "a", "a", "b"]
+
+
+def test_circuit_opens_after_consecutive_failures(monkeypatch):
+    monkeypatch.setattr(s, "CIRCUIT_FAILURES", 2)
+    bad, good = FakeClient("bad", fail=True), FakeClient("good")
+    pool = make_pool(bad, good)
+
+    async def main():
+        for _ in range(6):
+            try:
+                await pool.scrape("https://example.com/")
+            except Overloaded:
+                pass
+        return pool.stats()
+
+    stats = asyncio.run(main())
+    assert len(bad.calls) == 2
+    assert stats[0]["open"] and not stats[1]["open"]
+    assert stats[0]["errors"] == 2
+
+
+def test_half_open_probe_failure_doubles_cooldown(monkeypatch):
+    monkeypatch.setattr(s, "CIRCUIT_FAILURES", 1)
+    endpoint = s._Endpoint(s.EndpointConfig("http://a"), FakeClient("a"))
+    endpoint.record_failure()
+    first = endpoint.cooldown
+    assert not endpoint.available(endpoint.open_until - 1)
+    assert endpoint.available(endpoint.open_until)
+    endpoint.probing = True
+    endpoint.record_failure()
+    assert endpoint.cooldown == min(first * 2, s.CIRCUIT_MAX_COOLDOWN)
+    endpoint.record_success()
+    assert (endpoint.open_until, endpoint.cooldown, endpoint.failures) == (0.0, s.CIRCUIT_COOLDOWN, 0)
+
+
+def test_non_overload_errors_do_not_trip_circuit(monkeypatch):
+    monkeypatch.setattr(s, "CIRCUIT_FAILURES", 1)
+
+    class Empty(FakeClient):
+        async def scrape(self, url, **kwargs):
+            raise ValueError("no content")
+
+    pool = make_pool(Empty("a"))
+
+    async def main():
+        with pytest.raises(ValueError):
+            await pool.scrape("https://example.com/")
+        return pool.stats()
+
+    assert asyncio.run(main())[0]["open"] is False
+
+
+def test_batch_job_calls_route_to_owner():
+    a, b = FakeClient("a"), FakeClient("b")
+    pool = make_pool(a, b)
+
+    async def main():
+        pool._endpoints[0].outstanding = 5  # 让任务分到 b
+        job = await pool.start_batch_scrape(["u1", "u2"])
+        loaded = pool._endpoints[1].outstanding
+        await pool.get_batch_scrape_status(job.id)
+        await pool.get_batch_scrape_errors(job.id)
+        return job.id, loaded, pool._endpoints[1].outstanding
+
+    assert asyncio.run(main()) == ("b-job", 2, 0)
+    assert a.calls == []
+    assert [call[0] for call in b.calls] == ["start", "status", "errors"]
@@ -0,0 +1,89 @@
+"""FailureLog：失败记录缓冲后写入 failures.jsonl、按错误分类汇总与样例、分页读取"""
+
+import asyncio
+import json
+import threading
+
+import scrape_asyncio as s
+
+
+def failed(index, error_class=None, error="boom"):
+    return s.ScrapeResult(
+        index=index, title=f"t{index}", url=f"https://example.com/{index}", success=False,
+        error=error, error_class=error_class, attempts=2,
+    )
+
+
+def test_failures_are_streamed_and_summarized(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "FAILURE_SAMPLES", 2)
+    log = s.FailureLog(tmp_path / "failures.jsonl")
+
+    async def main():
+        for index in range(1, 5):
+            await log.add(failed(index, "timeout"))
+        await log.add(failed(5, error="Stopped by user"))
+        await log.add(failed(6))
+        await log.close()
+
+    asyncio.run(main())
+    lines = [json.loads(line) for line in log.path.read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == [1, 2, 3, 4, 5, 6]
+    assert lines[0] == {
+        "index": 1, "url": "https://example.com/1", "title": "t1",
+        "error": "boom", "errorClass": "timeout", "attempts": 2,
+    }
+    summary = log.summary()
+    assert [(group["errorClass"], group["count"]) for group in summary] == [("timeout", 4), ("cancelled", 1), ("other", 1)]
+    assert [record["index"] for record in summary[0]["samples"]] == [1, 2]  # 每类只保留前 FAILURE_SAMPLES 条
+    assert [record["index"] for record in log.samples()] == [1, 2, 5, 6]
+    assert log.count == 6
+
+
+def test_records_are_buffered_and_written_off_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "FAILURE_FLUSH_BATCH", 3)
+    log = s.FailureLog(tmp_path / "failures.jsonl")
+    writers = []
+    write = log._write
+
+    def recording_write(text):
+        writers.append((threading.current_thread() is threading.main_thread(), text.count("\n")))
+        write(text)
+
+    log._write = recording_write
+
+    async def main():
+        for index in range(1, 3):
+            await log.add(failed(index))
+        buffered = log.path.exists()
+        for index in range(3, 6):
+            await log.add(failed(index))
+        await log.close()
+        return buffered
+
+    assert asyncio.run(main()) is False  # 未满一批时不写文件
+    assert writers == [(False, 3), (False, 2)]
+    assert len(log.path.read_text(encoding="utf-8").splitlines()) == 5
+
+
+def test_page_reads_records_in_completion_order(tmp_path):
+    log = s.FailureLog(tmp_path / "failures.jsonl")
+
+    async def main():
+        empty = await log.page(0, 10)
+        for index in (3, 1, 2):
+            await log.add(failed(index))
+        running = await log.page(1, 5)  # 写入中途也能读到已记录（仍在缓冲中）的条目
+        await log.close()
+        return empty, running, await log.page(0, 2)
+
+    empty, running, closed = asyncio.run(main())
+    assert empty == []
+    assert [record["index"] for record in running] == [1, 2]
+    assert [record["index"] for record in closed] == [3, 1]
+
+
+def test_run_without_failures_removes_previous_file(tmp_path):
+    path = tmp_path / "failures.jsonl"
+    path.write_text('{"index": 1}\n', encoding="utf-8")
+    asyncio.run(s.FailureLog(path).close())
+    assert not path.exists()
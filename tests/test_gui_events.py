@@ -0,0 +1,124 @@
+"""GuiEventStream：task 事件按 ID 合并、progress 只保留最新、其他事件立即刷出，以及 IPC 管道的长度前缀帧"""
+
+import asyncio
+import json
+import os
+
+import scrape_asyncio as s
+
+
+def task_event(task_id, status, progress=0):
+    return {"type": "task", "data": {"id": task_id, "status": status, "progress": progress}}
+
+
+def progress_event(completed):
+    return {"type": "progress", "data": {"completed": completed}}
+
+
+def lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_without_ticker_every_event_is_written(capsys):
+    stream = s.GuiEventStream(0.1)
+    stream.emit(task_event("1", "running"))
+    stream.emit(progress_event(1))
+    assert [event["type"] for event in lines(capsys)] == ["task", "progress"]
+
+
+def test_coalesces_tasks_and_progress_per_tick(capsys):
+    async def main():
+        stream = s.GuiEventStream(60)
+        stream.start()
+        stream.emit(task_event("1", "running", 10))
+        stream.emit(task_event("2", "running", 10))
+        stream.emit(progress_event(1))
+        stream.emit(task_event("1", "success", 100))
+        stream.emit(progress_event(2))
+        buffered = capsys.readouterr().out
+        await stream.stop()
+        return buffered
+
+    assert asyncio.run(main()) == ""
+    events = lines(capsys)
+    assert [(e["type"], e["data"].get("id")) for e in events] == [("task", "2"), ("task", "1"), ("progress", None)]
+    assert events[1]["data"]["status"] == "success"
+    assert events[2]["data"]["completed"] == 2
+
+
+def test_other_events_flush_buffer_first(capsys):
+    async def main():
+        stream = s.GuiEventStream(60)
+        stream.start()
+        stream.emit(task_event("1", "failed"))
+        stream.emit({"type": "complete", "data": {}})
+        written = lines(capsys)
+        await stream.stop()
+        return written
+
+    assert [event["type"] for event in asyncio.run(main())] == ["task", "complete"]
+    assert lines(capsys) == []
+
+
+def test_ticker_flushes_periodically(capsys):
+    async def main():
+        stream = s.GuiEventStream(0.01)
+        stream.start()
+        stream.emit(task_event("1", "running"))
+        await asyncio.sleep(0.05)
+        written = lines(capsys)
+        await stream.stop()
+        return written
+
+    assert [event["data"]["id"] for event in asyncio.run(main())] == ["1"]
+
+
+def read_frames(fd):
+    data = b""
+    while chunk := os.read(fd, 65536):
+        data += chunk
+    frames = []
+    while data:
+        length = int.from_bytes(data[:4], "big")
+        frames.append(json.loads(data[4:4 + length].decode("utf-8")))
+        data = data[4 + length:]
+    return frames
+
+
+def test_ipc_pipe_gets_one_length_prefixed_frame_per_flush(capsys):
+    read_fd, write_fd = os.pipe()
+
+    async def main():
+        stream = s.GuiEventStream(60, str(write_fd))
+        stream.start()
+        stream.emit(task_event("1", "running"))
+        stream.emit(progress_event(1))
+        stream.emit({"type": "error", "message": "换行\n与 \u2028 不影响分帧"})
+        await stream.stop()
+        stream._ipc.close()
+
+    asyncio.run(main())
+    frames = read_frames(read_fd)
+    os.close(read_fd)
+    assert [[event["type"] for event in frame] for frame in frames] == [["task", "progress", "error"]]
+    assert frames[0][2]["message"] == "换行\n与 \u2028 不影响分帧"
+    assert capsys.readouterr().out == ""
+
+
+def test_ipc_falls_back_to_stdout_when_pipe_unusable(capsys):
+    stream = s.GuiEventStream(0, "not-a-fd")
+    stream.emit(task_event("1", "running"))
+    stream.emit(task_event("1", "success"))
+    assert [event["data"]["status"] for event in lines(capsys)] == ["running", "success"]
+    assert stream._ipc_fd == ""
+
+
+def test_emit_error_prints_in_cli_and_sends_event_in_gui(capsys, monkeypatch):
+    monkeypatch.setattr(s, "GUI_MODE", False)
+    s.emit_error("找不到文章列表文件 a.json", "请先运行 playwright 脚本来提取文章列表")
+    assert capsys.readouterr().out == "❌ 错误: 找不到文章列表文件 a.json\n请先运行 playwright 脚本来提取文章列表\n"
+
+    monkeypatch.setattr(s, "GUI_MODE", True)
+    monkeypatch.setattr(s, "_gui_events", s.GuiEventStream(0.1))
+    s.emit_error("未知的 OUTPUT_SINK: x", "不会打印")
+    assert lines(capsys) == [{"type": "error", "message": "未知的 OUTPUT_SINK: x"}]
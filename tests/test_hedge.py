@@ -0,0 +1,91 @@
+"""HedgedClient：延迟分位数阈值、对冲请求比例上限与取消落后的一方"""
+
+import asyncio
+
+import pytest
+
+import scrape_asyncio as s
+
+
+class FakeClient:
+    """按调用顺序使用预设的 (延迟, 结果或异常) 应答"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def scrape(self, url, **kwargs):
+        delay, reply = self.replies[self.calls]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+
+@pytest.fixture(autouse=True)
+def hedge_settings(monkeypatch):
+    monkeypatch.setattr(s, "HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(s, "HEDGE_MIN_DELAY", 0.02)
+    monkeypatch.setattr(s, "HEDGE_MAX_RATIO", 1.0)
+
+
+def primed(client):
+    hedged = s.HedgedClient(client)
+    for _ in range(3):
+        hedged._record(0.001)
+    return hedged
+
+
+def test_threshold_uses_percentile_and_min_delay(monkeypatch):
+    hedged = s.HedgedClient(FakeClient())
+    for latency in (0.001, 0.002):
+        hedged._record(latency)
+    assert hedged._threshold is None  # 样本不足
+    hedged._record(0.003)
+    assert hedged._threshold == 0.02
+    monkeypatch.setattr(s, "HEDGE_MIN_DELAY", 0.0)
+    for latency in (0.5, 0.1, 0.3):
+        hedged._record(latency)
+    assert hedged._threshold == 0.5
+
+
+def test_no_hedge_before_threshold_is_known():
+    client = FakeClient((0.05, "primary"))
+    hedged = s.HedgedClient(client)
+    assert asyncio.run(hedged.scrape("https://example.com/")) == "primary"
+    assert (client.calls, hedged.hedges) == (1, 0)
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    client = FakeClient((5, "primary"), (0, "hedge"))
+    hedged = primed(client)
+    assert asyncio.run(asyncio.wait_for(hedged.scrape("https://example.com/"), 2)) == "hedge"
+    assert (hedged.hedges, hedged.hedge_wins, client.cancelled) == (1, 1, 1)
+
+
+def test_hedge_ratio_cap(monkeypatch):
+    monkeypatch.setattr(s, "HEDGE_MAX_RATIO", 0.05)
+    client = FakeClient((0.05, "primary"))
+    hedged = primed(client)
+    assert asyncio.run(hedged.scrape("https://example.com/")) == "primary"
+    assert (client.calls, hedged.hedges) == (1, 0)
+
+
+def test_failed_hedge_waits_for_primary():
+    client = FakeClient((0.1, "primary"), (0, ConnectionError("hedge down")))
+    hedged = primed(client)
+    assert asyncio.run(hedged.scrape("https://example.com/")) == "primary"
+    assert (hedged.hedges, hedged.hedge_wins) == (1, 0)
+
+
+def test_both_failing_raises_first_error():
+    client = FakeClient((0.1, TimeoutError("slow")), (0, ConnectionError("hedge down")))
+    hedged = primed(client)
+    with pytest.raises(ConnectionError):
+        asyncio.run(hedged.scrape("https://example.com/"))
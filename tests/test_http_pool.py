@@ -0,0 +1,109 @@
+"""FirecrawlHttpPool：连接数上限、对本地 Firecrawl 模拟服务的连接复用、排队统计与关闭"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+import scrape_asyncio as s
+
+
+@pytest.mark.parametrize("settings, expected", [
+    ({"HTTP_MAX_CONNECTIONS": 7}, 7),
+    ({"ADAPTIVE_CONCURRENCY": False, "MAX_CONCURRENT": 10}, 10),
+    ({"ADAPTIVE_CONCURRENCY": True, "ADAPTIVE_MAX_CONCURRENT": 40}, 40),
+    ({"ADAPTIVE_CONCURRENCY": False, "MAX_CONCURRENT": 10, "HEDGE": True, "HEDGE_MAX_RATIO": 0.2}, 13),
+])
+def test_size_follows_concurrency_ceiling(monkeypatch, settings, expected):
+    monkeypatch.setattr(s, "HTTP_MAX_CONNECTIONS", 0)
+    monkeypatch.setattr(s, "HEDGE", False)
+    for name, value in settings.items():
+        monkeypatch.setattr(s, name, value)
+    assert s.FirecrawlHttpPool.size() == expected
+
+
+def serve(scenario, scrape):
+    """在本地 Firecrawl 模拟服务上运行 scenario(pool, client)，结束后关闭客户端与服务"""
+    async def main():
+        app = web.Application()
+        app.router.add_post("/v2/scrape", scrape)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host, port = runner.addresses[0][:2]
+        pool = s.FirecrawlHttpPool(30, False)
+        client = pool.create("key", f"http://{host}:{port}")
+        try:
+            return await scenario(pool, client)
+        finally:
+            await pool.release(client)
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_requests_reuse_connections():
+    received = []
+
+    async def scrape(request):
+        body = await request.json()
+        received.append((request.headers["Authorization"], body["origin"]))
+        return web.json_response({"success": True, "data": {"markdown": f"# {body['url']}"}})
+
+    async def scenario(pool, client):
+        assert isinstance(client.async_http_client, s._PooledHttpClient)
+        documents = [await client.scrape(f"https://example.com/{i}") for i in range(5)]
+        return [document.markdown for document in documents], pool.stats()
+
+    markdowns, stats = serve(scenario, scrape)
+    assert markdowns == [f"# https://example.com/{i}" for i in range(5)]
+    assert (stats["requests"], stats["opened"], stats["active"], stats["queued"]) == (5, 1, 0, 0)
+    assert set(received) == {("Bearer key", f"python-sdk@{s.firecrawl.__version__}")}
+
+
+def test_requests_over_limit_wait_for_idle_connection(monkeypatch):
+    monkeypatch.setattr(s, "HTTP_MAX_CONNECTIONS", 2)
+    gate = {}
+
+    async def scrape(request):
+        await gate["release"].wait()
+        return web.json_response({"success": True, "data": {"markdown": "# ok"}})
+
+    async def scenario(pool, client):
+        gate["release"] = asyncio.Event()
+        tasks = [asyncio.create_task(client.scrape(f"https://example.com/{i}")) for i in range(5)]
+        while pool.stats()["opened"] < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        busy = pool.stats()
+        gate["release"].set()
+        await asyncio.gather(*tasks)
+        return busy, pool.stats()
+
+    busy, done = serve(scenario, scrape)
+    assert (busy["active"], busy["queued"], busy["opened"]) == (5, 3, 2)
+    assert (done["requests"], done["active"], done["queued"], done["opened"]) == (5, 0, 0, 2)
+
+
+def test_large_limit_is_split_across_small_pools(monkeypatch):
+    monkeypatch.setattr(s, "HTTP_MAX_CONNECTIONS", 20)
+    gate = {}
+
+    async def scrape(request):
+        await gate["release"].wait()
+        return web.json_response({"success": True, "data": {"markdown": "# ok"}})
+
+    async def scenario(pool, client):
+        gate["release"] = asyncio.Event()
+        http = client.async_http_client
+        tasks = [asyncio.create_task(client.scrape(f"https://example.com/{i}")) for i in range(5)]
+        while pool.stats()["opened"] < 5:
+            await asyncio.sleep(0.01)
+        busy = list(http._active), pool.stats()["queued"]
+        gate["release"].set()
+        await asyncio.gather(*tasks)
+        return len(http._shards), busy
+
+    shards, (active, queued) = serve(scenario, scrape)
+    assert shards == 3  # 每个连接池至多 HTTP_POOL_SHARD 个连接
+    assert (sorted(active), queued) == ([1, 2, 2], 0)  # 请求交给进行中请求最少的连接池
@@ -0,0 +1,107 @@
+"""AdaptiveLimiter：AIMD 加性增长、乘性回退、冷却期与固定并发退化"""
+
+import asyncio
+
+import pytest
+
+import scrape_asyncio as s
+
+
+def saturate(limiter):
+    """模拟并发已被用满"""
+    limiter.in_flight = limiter.limit
+
+
+def test_initial_limit_is_clamped():
+    assert s.AdaptiveLimiter(100, 2, 8).limit == 8
+    assert s.AdaptiveLimiter(0, 2, 8).limit == 2
+    limiter = s.AdaptiveLimiter(5, 0, 0)
+    assert (limiter.min_limit, limiter.max_limit, limiter.limit) == (1, 1, 1)
+
+
+def test_fixed_limit_ignores_signals():
+    limiter = s.AdaptiveLimiter(4, 4, 4)
+    assert not limiter.adaptive
+    for _ in range(50):
+        limiter.record_success(0.1)
+    limiter.record_overload()
+    assert limiter.limit == 4
+    # 固定并发时仍保留延迟样本，供截止时间预估使用
+    assert limiter.p50 == 0.1
+
+
+def test_additive_increase_when_saturated_and_latency_flat():
+    limiter = s.AdaptiveLimiter(4, 2, 20)
+    saturate(limiter)
+    for _ in range(s.ADAPTIVE_MIN_SAMPLES):
+        limiter.record_success(0.2)
+    assert limiter.limit == 5
+    saturate(limiter)
+    for _ in range(s.ADAPTIVE_MIN_SAMPLES):
+        limiter.record_success(0.2)
+    assert limiter.limit == 6
+
+
+def test_no_increase_when_not_saturated():
+    limiter = s.AdaptiveLimiter(4, 2, 20)
+    for _ in range(s.ADAPTIVE_MIN_SAMPLES * 3):
+        limiter.record_success(0.2)
+    assert limiter.limit == 4
+
+
+def test_latency_rise_backs_off_gently():
+    limiter = s.AdaptiveLimiter(10, 2, 20)
+    for _ in range(s.ADAPTIVE_MIN_SAMPLES):
+        limiter.record_success(0.1)
+    limiter._latencies.clear()
+    for _ in range(s.ADAPTIVE_MIN_SAMPLES):
+        limiter.record_success(1.0)
+    assert limiter.limit == 9
+
+
+def test_overload_multiplicative_decrease_once_per_cooldown():
+    limiter = s.AdaptiveLimiter(10, 2, 20)
+    limiter.record_overload()
+    assert limiter.limit == int(10 * s.ADAPTIVE_BACKOFF_RATIO)
+    limiter.record_overload()  # 仍在冷却期内（无样本时为 1 秒）
+    assert limiter.limit == int(10 * s.ADAPTIVE_BACKOFF_RATIO)
+    limiter._last_backoff -= 2
+    limiter.record_overload()
+    assert limiter.limit == max(int(10 * s.ADAPTIVE_BACKOFF_RATIO ** 2), 2)
+
+
+def test_overload_never_goes_below_min():
+    limiter = s.AdaptiveLimiter(3, 2, 20)
+    for _ in range(5):
+        limiter._last_backoff = 0.0
+        limiter.record_overload()
+    assert limiter.limit == 2
+
+
+def test_context_manager_enforces_limit():
+    async def main():
+        limiter = s.AdaptiveLimiter(2, 2, 2)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(task() for _ in range(6)))
+        return peak, limiter.in_flight
+
+    assert asyncio.run(main()) == (2, 0)
+
+
+@pytest.mark.parametrize("error, overload", [
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (type("E", (Exception,), {"status_code": 429})(), True),
+    (type("E", (Exception,), {"status_code": 502})(), True),
+    (type("E", (Exception,), {"status_code": 404})(), False),
+    (ValueError("bad"), False),
+])
+def test_is_overload_error(error, overload):
+    assert s._is_overload_error(error) is overload
@@ -0,0 +1,112 @@
+"""后处理：步骤解析、内置步骤、进程池执行与失败回退、派生产物写出"""
+
+import asyncio
+import json
+
+import pytest
+
+import scrape_asyncio as s
+
+
+def shout(markdown, artifacts):
+    """自定义步骤：正文转大写并记录长度"""
+    artifacts["lengths"] = [{"chars": len(markdown)}]
+    return markdown.upper()
+
+
+def bad_name(markdown, artifacts):
+    artifacts["../escape"] = [{}]
+    return markdown
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(s, "GUI_MODE", True)
+
+
+def test_steps_spec_parsing():
+    assert s._postprocess_steps(" links, ,metadata ") == (s._extract_links, s._extract_metadata)
+    assert s._postprocess_steps("test_postprocess:shout") == (shout,)
+    with pytest.raises(ValueError, match="未知的后处理步骤"):
+        s._postprocess_steps("links,typo")
+    with pytest.raises(ValueError, match="无法加载"):
+        s._postprocess_steps("no_such_module:step")
+
+
+def test_strip_boilerplate_and_normalize_whitespace():
+    markdown = "# 标题\r\n\r\n[首页](/) | [新闻](/news)\n正文 内容  \n\n\n\n订阅我们的新闻\n结尾"
+    cleaned = s._normalize_whitespace(s._strip_boilerplate(markdown, {}), {})
+    assert cleaned == "# 标题\n\n正文 内容\n\n结尾\n"
+
+
+def test_links_and_metadata():
+    artifacts = {}
+    markdown = "# Title\n\n## 小节\n\n中文 words here [a](https://a.example) ![img](/x.png) [again](https://a.example)"
+    assert s._extract_metadata(s._extract_links(markdown, artifacts), artifacts) == markdown
+    assert artifacts["links"] == [{"text": "a", "href": "https://a.example"}]
+    metadata = artifacts["metadata"][0]
+    assert metadata["headings"] == [{"level": 1, "text": "Title"}, {"level": 2, "text": "小节"}]
+    assert metadata["chars"] == len(markdown)
+
+
+def test_chunks_split_at_headings_with_overlap(monkeypatch):
+    monkeypatch.setattr(s, "CHUNK_SIZE", 40)
+    monkeypatch.setattr(s, "CHUNK_OVERLAP", 10)
+    artifacts = {}
+    s._chunk_markdown("# A\n\n" + "x" * 70 + "\n\n# B\n\nshort", artifacts)
+    chunks = artifacts["chunks"]
+    assert [chunk["chunk"] for chunk in chunks] == list(range(len(chunks)))
+    assert [chunk["heading"] for chunk in chunks] == ["A", "A", "A", "B"]
+    assert all(len(chunk["text"]) <= 40 + 2 for chunk in chunks)  # 重叠部分与新段落之间的空行
+    assert chunks[1]["text"].startswith(chunks[0]["text"][-10:])
+    assert chunks[-1]["text"] == "# B\n\nshort"
+
+
+def test_run_postprocess_returns_none_for_unchanged_text():
+    assert s._run_postprocess("links", "[a](https://a.example)") == (None, {"links": [{"text": "a", "href": "https://a.example"}]})
+    assert s._run_postprocess("test_postprocess:shout", "abc") == ("ABC", {"lengths": [{"chars": 3}]})
+    with pytest.raises(ValueError, match="派生产物名称"):
+        s._run_postprocess("test_postprocess:bad_name", "abc")
+
+
+def test_processor_runs_steps_in_process_pool():
+    async def main():
+        processor = s.PostProcessor("normalize_whitespace,metadata", 1)
+        try:
+            return await processor.run("a  \n\n\n\nb"), processor.failures
+        finally:
+            processor.close()
+
+    (markdown, artifacts), failures = asyncio.run(main())
+    assert markdown == "a\n\nb\n"
+    assert artifacts["metadata"][0]["words"] == 2
+    assert failures == 0
+
+
+def test_failing_step_falls_back_to_original_text():
+    async def main():
+        processor = s.PostProcessor("test_postprocess:bad_name", 1)
+        try:
+            return await processor.run("body"), processor.failures
+        finally:
+            processor.close()
+
+    assert asyncio.run(main()) == (("body", {}), 1)
+
+
+def test_artifacts_are_appended_to_derived_files(tmp_path):
+    async def main():
+        writer = s.ArticleWriter("files", 4)
+        await writer.write(tmp_path, 1, "t1", "https://example.com/1", "body", {"links": [{"href": "a"}, {"href": "b"}]})
+        await writer.write(tmp_path, 2, "t2", "https://example.com/2", "body", {"links": [], "metadata": [{"chars": 4}]})
+        await writer.close()
+
+    asyncio.run(main())
+    links = [json.loads(line) for line in (tmp_path / "derived" / "links.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert links == [
+        {"index": 1, "url": "https://example.com/1", "href": "a"},
+        {"index": 1, "url": "https://example.com/1", "href": "b"},
+    ]
+    assert json.loads((tmp_path / "derived" / "metadata.jsonl").read_text(encoding="utf-8")) == {
+        "index": 2, "url": "https://example.com/2", "chars": 4,
+    }
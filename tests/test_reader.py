@@ -0,0 +1,176 @@
+"""文章列表流式读取：JSON（对象或数组）、JSON Lines、CSV，以及跨块边界的解析"""
+
+import asyncio
+import io
+import json
+import time
+
+import pytest
+
+import scrape_asyncio as s
+
+ARTICLES = [
+    {"title": "第一篇", "url": "https://example.com/1"},
+    {"title": "含 分隔符与 \"引号\"", "url": "https://example.com/2", "priority": 5},
+    {"title": "Third", "url": "https://example.com/3", "deadline": 12.5},
+]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """用很小的块读取，让每个值都跨越块边界"""
+    monkeypatch.setattr(s, "READ_CHUNK_SIZE", 7)
+    monkeypatch.setattr(s, "ARTICLES_FORMAT", "")
+
+
+class AsyncText:
+    """提供 async read(n) 的内存文本文件"""
+
+    def __init__(self, text):
+        self._f = io.StringIO(text)
+
+    async def read(self, n):
+        return self._f.read(n)
+
+
+def read_all(path):
+    async def main():
+        return [article async for article in s.iter_articles_async(path)]
+
+    return asyncio.run(main())
+
+
+def test_stream_reader_values_across_chunks():
+    async def main():
+        reader = s._JsonStreamReader(AsyncText('  [12345678901, "abc", {"k": [1, 2]}, true]'))
+        await reader.expect("[")
+        values = [await reader.value()]
+        while await reader.peek() == ",":
+            await reader.expect(",")
+            values.append(await reader.value())
+        await reader.expect("]")
+        return values, await reader.peek()
+
+    assert asyncio.run(main()) == ([12345678901, "abc", {"k": [1, 2]}, True], "")
+
+
+def test_stream_reader_expect_mismatch():
+    async def main():
+        reader = s._JsonStreamReader(AsyncText("{}"))
+        await reader.expect("[")
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_stream_reader_rejects_oversized_value(monkeypatch):
+    monkeypatch.setattr(s, "MAX_ARTICLE_BYTES", 20)
+
+    async def main():
+        reader = s._JsonStreamReader(AsyncText('["' + "x" * 100 + '"]'))
+        await reader.expect("[")
+        await reader.value()
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+
+
+def test_json_object_skips_keys_before_articles(tmp_path):
+    path = tmp_path / "articles.json"
+    data = {"meta": {"nested": ["articles", 1]}, "total": 3, "articles": ARTICLES}
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    assert read_all(path) == ARTICLES
+
+
+def test_json_top_level_array_and_empty(tmp_path):
+    path = tmp_path / "articles.json"
+    path.write_text(json.dumps(ARTICLES, indent=2), encoding="utf-8")
+    assert read_all(path) == ARTICLES
+    path.write_text('{"articles": [ ]}', encoding="utf-8")
+    assert read_all(path) == []
+
+
+@pytest.mark.parametrize("text, message", [
+    ('{"other": []}', "articles"),
+    ('"articles"', "顶层"),
+    ('[{"title": "a"}]', "缺少"),
+])
+def test_json_errors(tmp_path, text, message):
+    path = tmp_path / "articles.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        read_all(path)
+
+
+def test_jsonl_ignores_blank_lines_and_keeps_line_separators(tmp_path):
+    path = tmp_path / "articles.jsonl"
+    articles = ARTICLES + [{"title": "行分隔符 与\x85不切分", "url": "https://example.com/4"}]
+    lines = [json.dumps(article, ensure_ascii=False) for article in articles]
+    path.write_bytes(("\n\n" + "\r\n".join(lines) + "\n   \n").encode("utf-8"))
+    assert read_all(path) == articles
+
+
+def test_jsonl_without_trailing_newline(tmp_path):
+    path = tmp_path / "articles.ndjson"
+    path.write_text("\n".join(json.dumps(article) for article in ARTICLES), encoding="utf-8")
+    assert read_all(path) == ARTICLES
+
+
+def test_jsonl_rejects_oversized_line(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "MAX_ARTICLE_BYTES", 20)
+    path = tmp_path / "articles.jsonl"
+    path.write_text(json.dumps({"title": "x" * 100, "url": "u"}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_all(path)
+
+
+def test_csv_quoted_fields_with_newlines(tmp_path):
+    path = tmp_path / "articles.csv"
+    path.write_bytes(
+        'title,url,priority\r\n'
+        '"多行\r\n标题, 含逗号",https://example.com/1,3\r\n'
+        '"He said ""hi""",https://example.com/2,\r\n'
+        '\r\n'
+        'plain,https://example.com/3,1'.encode("utf-8")
+    )
+    assert read_all(path) == [
+        {"title": "多行\r\n标题, 含逗号", "url": "https://example.com/1", "priority": "3"},
+        {"title": 'He said "hi"', "url": "https://example.com/2", "priority": ""},
+        {"title": "plain", "url": "https://example.com/3", "priority": "1"},
+    ]
+
+
+def test_csv_requires_title_and_url_columns(tmp_path):
+    path = tmp_path / "articles.csv"
+    path.write_text("name,link\na,b\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="表头"):
+        read_all(path)
+
+
+def test_articles_format_overrides_extension(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "ARTICLES_FORMAT", "jsonl")
+    path = tmp_path / "articles.txt"
+    path.write_text("\n".join(json.dumps(article) for article in ARTICLES), encoding="utf-8")
+    assert read_all(path) == ARTICLES
+    monkeypatch.setattr(s, "ARTICLES_FORMAT", "xml")
+    with pytest.raises(ValueError):
+        s._detect_articles_format(path)
+
+
+def test_article_source_skips_completed_urls(tmp_path):
+    path = tmp_path / "articles.jsonl"
+    path.write_text("\n".join(json.dumps(article) for article in ARTICLES), encoding="utf-8")
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    asyncio.run(store.record(2, "https://example.com/2", True))
+
+    async def main():
+        source = s.ArticleSource(s.iter_articles_async(path), store)
+        pending = [article async for article in source]
+        return pending, source.total, source.pending, source.skipped, source.exhausted
+
+    pending, *counts = asyncio.run(main())
+    store.close()
+    assert [(article.index, article.title, article.url) for article in pending] == [(1, "第一篇", "https://example.com/1"), (3, "Third", "https://example.com/3")]
+    assert pending[0].deadline is None
+    assert pending[1].deadline == pytest.approx(time.time() + 12.5, abs=5)
+    assert counts == [3, 2, 1, True]
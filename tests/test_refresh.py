@@ -0,0 +1,87 @@
+"""增量刷新：到期条目重新产出、内容未变化时保留原文件、到期条目不使用缓存副本"""
+
+import asyncio
+import hashlib
+import json
+
+import pytest
+
+import scrape_asyncio as s
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(s, "GUI_MODE", True)
+    monkeypatch.setattr(s, "OUTPUT_SINK", "files")
+    monkeypatch.setattr(s, "_response_cache", None)
+
+
+def digest(markdown):
+    return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+
+def test_article_source_requeues_entries_due_for_refresh(tmp_path, monkeypatch):
+    articles = [{"title": f"t{i}", "url": f"https://example.com/{i}"} for i in range(1, 4)]
+    path = tmp_path / "articles.jsonl"
+    path.write_text("\n".join(json.dumps(article) for article in articles), encoding="utf-8")
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    asyncio.run(store.record(1, articles[0]["url"], True, content_hash="h1", filename="001_t1.md"))
+    asyncio.run(store.record(2, articles[1]["url"], True, content_hash="h2", filename="002_t2.md"))
+    store._conn.execute("UPDATE articles SET fetched_at = 0 WHERE url_hash = ?", (store.url_hash(articles[1]["url"]),))
+    monkeypatch.setattr(s, "REFRESH_AFTER", 3600)
+
+    async def main():
+        source = s.ArticleSource(s.iter_articles_async(path), store)
+        return [article async for article in source], source.skipped, source.refreshed
+
+    pending, skipped, refreshed = asyncio.run(main())
+    store.close()
+    assert pending == [
+        s.Article(2, "t2", "https://example.com/2", previous=("h2", "002_t2.md")),
+        s.Article(3, "t3", "https://example.com/3"),
+    ]
+    assert (skipped, refreshed) == (1, 1)
+
+
+def test_unchanged_content_keeps_original_file(tmp_path):
+    original = tmp_path / "001_t1.md"
+    original.write_text("old render", encoding="utf-8")
+    result = s.ScrapeResult(index=1, title="t1", url="https://example.com/1", success=False)
+
+    finished = asyncio.run(s._save_scraped(result, "same", tmp_path, 0, "[1]", (digest("same"), "001_t1.md")))
+    assert (finished.success, finished.changed, finished.filename) == (True, False, "001_t1.md")
+    assert original.read_text(encoding="utf-8") == "old render"
+
+
+@pytest.mark.parametrize("previous", [
+    (digest("old"), "001_t1.md"),  # 内容变化
+    (digest("same"), "001_renamed.md"),  # 文件名变化
+    (digest("same"), "missing.md"),  # 原文件不存在
+])
+def test_changed_content_or_file_is_rewritten(tmp_path, previous):
+    (tmp_path / "001_t1.md").write_text("old render", encoding="utf-8")
+    result = s.ScrapeResult(index=1, title="t1", url="https://example.com/1", success=False)
+
+    finished = asyncio.run(s._save_scraped(result, "same", tmp_path, 0, "[1]", previous))
+    assert (finished.changed, finished.filename) == (True, "001_t1.md")
+    assert (tmp_path / "001_t1.md").read_text(encoding="utf-8").endswith("same")
+
+
+def test_due_entries_skip_cache_hits(tmp_path, monkeypatch):
+    async def main():
+        cache = s.ScrapeCache(tmp_path / "responses.db", "use", 60, 1 << 20)
+        monkeypatch.setattr(s, "_response_cache", cache)
+        await cache.put("https://example.com/1", s.SCRAPE_OPTIONS, "cached")
+        try:
+            due = s.ScrapeResult(index=1, title="t1", url="https://example.com/1", success=False)
+            fresh = s.ScrapeResult(index=1, title="t1", url="https://example.com/1", success=False)
+            return (
+                await s._scrape_local(due, None, tmp_path, 0, "[1]", (digest("cached"), "001_t1.md")),
+                await s._scrape_local(fresh, None, tmp_path, 0, "[1]"),
+            )
+        finally:
+            cache.close()
+
+    due, fresh = asyncio.run(main())
+    assert due is None
+    assert (fresh.success, fresh.cached) == (True, True)
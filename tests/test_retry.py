@@ -0,0 +1,88 @@
+"""classify_error / RetryBudget：错误分类、Retry-After 与重试预算"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from aiohttp import ClientConnectionError
+
+import scrape_asyncio as s
+
+
+class StatusError(Exception):
+    """模拟 Firecrawl SDK 带 status_code 与响应头的异常"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.mark.parametrize("error", [
+    asyncio.TimeoutError(),
+    TimeoutError(),
+    ConnectionResetError(),
+    ClientConnectionError(),
+    httpx.ConnectError("refused"),
+])
+def test_transient_errors_are_retryable(error):
+    assert s.classify_error(error) == (True, None)
+
+
+@pytest.mark.parametrize("error", [
+    s.EmptyContentError("empty"),
+    PermissionError("read-only"),
+    StatusError(404),
+    StatusError(403, {"retry-after": "5"}),
+])
+def test_permanent_errors_fail_immediately(error):
+    assert s.classify_error(error) == (False, None)
+
+
+@pytest.mark.parametrize("status_code", [408, 425, 429, 500, 503, 504, 599])
+def test_retryable_status_codes(status_code):
+    assert s.classify_error(StatusError(status_code)) == (True, None)
+
+
+def test_unknown_errors_are_retried():
+    assert s.classify_error(RuntimeError("success=false")) == (True, None)
+
+
+def test_retry_after_seconds():
+    assert s.classify_error(StatusError(429, {"retry-after": "7"})) == (True, 7.0)
+    assert s.classify_error(StatusError(503, {"retry-after": "-3"})) == (True, 0.0)
+    assert s.classify_error(StatusError(503, {"retry-after": "soon"})) == (True, None)
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    retryable, delay = s.classify_error(StatusError(503, {"retry-after": format_datetime(when, usegmt=True)}))
+    assert retryable and 25 <= delay <= 30
+    past = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert s.classify_error(StatusError(503, {"retry-after": format_datetime(past, usegmt=True)})) == (True, 0.0)
+
+
+def test_transport_error_without_response():
+    request = httpx.Request("GET", "https://example.com/")
+    error = httpx.ReadTimeout("timed out", request=request)
+    assert s.classify_error(error) == (True, None)
+
+
+def test_retry_budget_minimum_then_ratio():
+    budget = s.RetryBudget(0.5, 2)
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+    for _ in range(4):
+        budget.record_request()
+    # 2 + 0.5 × 4 = 4 次
+    assert [budget.try_acquire() for _ in range(3)] == [True, True, False]
+    assert (budget.retries, budget.denied) == (4, 2)
+
+
+def test_retry_budget_zero_disables_retries():
+    budget = s.RetryBudget(0.0, 0)
+    budget.record_request()
+    assert not budget.try_acquire()
+    assert budget.denied == 1
@@ -0,0 +1,113 @@
+"""优先级与截止时间：条目解析、本轮时间预算、预计超时跳过与运行期间追加的文章"""
+
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import scrape_asyncio as s
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(s, "GUI_MODE", True)
+
+
+def test_parse_schedule():
+    assert s._parse_schedule(1, {"priority": "3", "deadline": 30}, 1000.0) == (3.0, 1030.0, None)
+    assert s._parse_schedule(1, {"priority": "", "deadline": ""}, 1000.0) == (0.0, None, None)
+    when = datetime(2030, 1, 2, 3, 4, 5)
+    assert s._parse_schedule(1, {"deadline": when.isoformat()}, 0.0) == (0.0, when.timestamp(), None)
+
+
+@pytest.mark.parametrize("article, message", [
+    ({"priority": "high"}, "priority"),
+    ({"deadline": "tomorrow"}, "deadline"),
+])
+def test_parse_schedule_rejects_bad_values(article, message):
+    with pytest.raises(ValueError, match=message):
+        s._parse_schedule(7, article, 0.0)
+
+
+def test_run_deadline_caps_article_deadline():
+    article = s.Article(1, "t", "https://example.com/", priority=2, deadline=500.0)
+    assert s._article_schedule(article) == (2, 500.0)
+    token = s._run_deadline.set(300.0)
+    try:
+        assert s._article_schedule(article) == (2, 300.0)
+        assert s._article_schedule(s.Article(2, "t", "https://example.com/")) == (0.0, 300.0)
+    finally:
+        s._run_deadline.reset(token)
+
+
+def test_misses_deadline_and_skip_result(monkeypatch):
+    monkeypatch.setattr(s.time, "time", lambda: 100.0)
+    assert not s._misses_deadline(None, 1e9)
+    assert not s._misses_deadline(110.0, 10.0)
+    assert s._misses_deadline(110.0, 10.5)
+    retry = s.RetryState(started=90.0, attempts=2)
+    result = s._skip_result(1, "t", "https://example.com/", retry, "HTTP 503")
+    assert (result.success, result.skipped, result.attempts, result.elapsed) == (False, True, 2, 10.0)
+    assert "HTTP 503" in result.error
+
+
+def test_inbox_entries_are_numbered_after_list(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "INBOX_POLL_INTERVAL", 0.01)
+    articles = tmp_path / "articles.jsonl"
+    articles.write_text("\n".join(json.dumps({"title": f"t{i}", "url": f"https://example.com/{i}"}) for i in (1, 2)), encoding="utf-8")
+    inbox = tmp_path / "inbox.jsonl"
+    inbox.write_text(
+        json.dumps({"title": "added", "url": "https://example.com/added", "priority": 9}) + "\n"
+        + '{"title": "no url"}\n'
+        + '{"title": "unfinished", "url": "https://example.com/later"',
+        encoding="utf-8",
+    )
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+
+    async def main():
+        source = s.ArticleSource(s.iter_articles_async(articles), store, inbox)
+        seen = []
+        async for article in source:
+            seen.append(article)
+            source.completed += 1  # 模拟每个条目立即出结果
+        return seen, source
+
+    seen, source = asyncio.run(main())
+    store.close()
+    assert [(article.index, article.url, article.priority) for article in seen] == [
+        (1, "https://example.com/1", 0.0),
+        (2, "https://example.com/2", 0.0),
+        (s.INBOX_INDEX_START + 1, "https://example.com/added", 9.0),
+    ]
+    # 未写完的行留到下次读取
+    assert (source.total, source.added, source.pending, source._inbox_offset) == (3, 1, 3, inbox.read_bytes().rfind(b"\n") + 1)
+
+
+def test_priority_entries_overtake_backlog_without_limits(tmp_path, monkeypatch):
+    """未启用主机限速与时间预算时，预读窗口同样生效，列表末尾的高优先级条目先于积压条目出队"""
+    monkeypatch.setattr(s, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(s, "_response_cache", None)
+    monkeypatch.setattr(s, "BATCH_SIZE", 1)
+    monkeypatch.setattr(s, "RUN_TIME_BUDGET", 0)
+    scraped = []
+
+    class Client:
+        async def scrape(self, url, **kwargs):
+            scraped.append(url)
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(markdown=f"# {url}")
+
+    async def articles():
+        for i in range(1, 6):
+            yield s.Article(i, f"t{i}", f"https://example.com/{i}")
+        yield s.Article(6, "urgent", "https://example.com/urgent", priority=9)
+
+    async def main():
+        stream = s.process_articles_streaming(articles(), s.AdaptiveLimiter(1, 1, 1), Client(), 6)
+        return [result async for _, result in stream]
+
+    results = asyncio.run(main())
+    assert all(result.success for result in results)
+    assert scraped.index("https://example.com/urgent") <= 1
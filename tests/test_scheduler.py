@@ -0,0 +1,174 @@
+"""HostScheduler：出队顺序、主机间轮询、进行中上限、令牌桶、按域名覆盖的策略与延迟重试"""
+
+import asyncio
+import time
+
+import pytest
+
+import scrape_asyncio as s
+
+
+def make_scheduler(overrides=None, maxsize=100):
+    return s.HostScheduler(maxsize, s.HostPolicy(), overrides or {})
+
+
+async def drain(scheduler):
+    """关闭队列并取出全部条目（每取一条立即归还主机槽位）"""
+    await scheduler.close()
+    items = []
+    while True:
+        item = await asyncio.wait_for(scheduler.get(), timeout=2)
+        if item is None:
+            return items
+        items.append(item)
+        await scheduler.release(item[1])
+
+
+def test_orders_by_priority_then_deadline_then_fifo():
+    async def main():
+        scheduler = make_scheduler()
+        url = "https://a.example.com/"
+        await scheduler.put(url, ("plain-1", url))
+        await scheduler.put(url, ("late", url), priority=5, deadline=200.0)
+        await scheduler.put(url, ("urgent", url), priority=5, deadline=100.0)
+        await scheduler.put(url, ("plain-2", url))
+        await scheduler.put(url, ("high", url), priority=10)
+        return [item[0] for item in await drain(scheduler)]
+
+    assert asyncio.run(main()) == ["high", "urgent", "late", "plain-1", "plain-2"]
+
+
+def test_round_robin_between_hosts_at_same_level():
+    async def main():
+        scheduler = make_scheduler()
+        for i in range(4):
+            url = f"https://a.example.com/{i}"
+            await scheduler.put(url, (f"a{i}", url))
+        for i in range(2):
+            url = f"https://b.example.com/{i}"
+            await scheduler.put(url, (f"b{i}", url))
+        return [item[0] for item in await drain(scheduler)]
+
+    assert asyncio.run(main()) == ["a0", "b0", "a1", "b1", "a2", "a3"]
+
+
+def test_new_head_invalidates_stale_ready_entry():
+    """主机队首被更高优先级的条目替换后，就绪堆中的旧登记出堆时被丢弃，不会重复出队"""
+    async def main():
+        scheduler = make_scheduler()
+        a, b = "https://a.example.com/", "https://b.example.com/"
+        await scheduler.put(a, ("a-low", a), priority=0)
+        stale = scheduler._hosts["a.example.com"].entry
+        await scheduler.put(b, ("b-mid", b), priority=5)
+        await scheduler.put(a, ("a-high", a), priority=10)
+        assert scheduler._hosts["a.example.com"].entry is not stale
+        assert stale in scheduler._ready
+        return [item[0] for item in await drain(scheduler)]
+
+    assert asyncio.run(main()) == ["a-high", "b-mid", "a-low"]
+
+
+def test_max_in_flight_blocks_host_until_release():
+    async def main():
+        policy = s.HostPolicy(max_in_flight=1)
+        scheduler = make_scheduler({"a.example.com": policy})
+        a, b = "https://a.example.com/", "https://b.example.com/"
+        await scheduler.put(a, ("a0", a))
+        await scheduler.put(a, ("a1", a))
+        await scheduler.put(b, ("b0", b))
+        first = await scheduler.get()
+        second = await scheduler.get()
+        # a 的槽位被占用时 b 可以出队
+        third = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0.05)
+        blocked = not third.done()
+        await scheduler.release(a)
+        return first[0], second[0], blocked, (await asyncio.wait_for(third, timeout=2))[0]
+
+    assert asyncio.run(main()) == ("a0", "b0", True, "a1")
+
+
+def test_rate_limited_host_is_skipped():
+    async def main():
+        policy = s.HostPolicy(rate=20.0, burst=1)
+        scheduler = make_scheduler({"a.example.com": policy})
+        a, b = "https://a.example.com/", "https://b.example.com/"
+        await scheduler.put(a, ("a0", a))
+        await scheduler.put(a, ("a1", a))
+        await scheduler.put(b, ("b0", b))
+        order = []
+        for _ in range(3):
+            item = await asyncio.wait_for(scheduler.get(), timeout=2)
+            order.append(item[0])
+            await scheduler.release(item[1])
+        return order, scheduler._size
+
+    # a 的令牌用完后 b 先出队；a1 在令牌补充（约 50ms）后出队
+    assert asyncio.run(main()) == (["a0", "b0", "a1"], 0)
+
+
+def test_put_waits_when_full():
+    async def main():
+        scheduler = make_scheduler(maxsize=1)
+        url = "https://a.example.com/"
+        await scheduler.put(url, ("first", url))
+        second = asyncio.create_task(scheduler.put(url, ("second", url)))
+        await asyncio.sleep(0.02)
+        blocked = not second.done()
+        item = await scheduler.get()
+        await asyncio.wait_for(second, timeout=2)
+        await scheduler.release(url)
+        return blocked, item[0], [item[0] for item in await drain(scheduler)]
+
+    assert asyncio.run(main()) == (True, "first", ["second"])
+
+
+def test_deferred_item_comes_back_ahead_of_same_level_items():
+    """延迟条目到期前不占队列容量，到期后以负序号回到主机堆，排在同级的新条目之前"""
+    async def main():
+        scheduler = make_scheduler()
+        url = "https://a.example.com/"
+        await scheduler.put(url, ("first", url))
+        await scheduler.put(url, ("second", url))
+        first = await scheduler.get()
+        await scheduler.release(url)
+        await scheduler.defer(url, ("retry", url), 0.05)
+        await scheduler.put(url, ("third", url))
+        size = scheduler._size
+        await asyncio.sleep(0.06)
+        scheduler._promote(time.monotonic())
+        head = scheduler._hosts["a.example.com"].pending[0]
+        return first[0], size, head, [item[0] for item in await drain(scheduler)]
+
+    first, size, head, rest = asyncio.run(main())
+    assert (first, size) == ("first", 2)
+    assert head[2] < 0 and head[3][0] == "retry"
+    assert rest == ["retry", "second", "third"]
+
+
+def test_get_waits_for_deferred_item_before_returning_none():
+    async def main():
+        scheduler = make_scheduler()
+        url = "https://a.example.com/"
+        await scheduler.defer(url, ("later", url), 0.05)
+        return [item[0] for item in await drain(scheduler)]
+
+    assert asyncio.run(main()) == ["later"]
+
+
+def test_policy_matches_domain_suffix():
+    override = s.HostPolicy(rate=2)
+    scheduler = make_scheduler({"example.com": override})
+    assert scheduler.policy_for("a.b.example.com") is override
+    assert scheduler.policy_for("example.com") is override
+    assert scheduler.policy_for("notexample.com") is scheduler._default_policy
+
+
+def test_load_host_policies(monkeypatch):
+    monkeypatch.setattr(s, "HOST_RATE_LIMIT", 1.0)
+    monkeypatch.setattr(s, "HOST_LIMITS", '{".Example.com": {"burst": 3}}')
+    default, overrides = s.load_host_policies()
+    assert overrides == {"example.com": s.HostPolicy(rate=1.0, burst=3, max_in_flight=default.max_in_flight)}
+    monkeypatch.setattr(s, "HOST_LIMITS", '["example.com"]')
+    with pytest.raises(ValueError):
+        s.load_host_policies()
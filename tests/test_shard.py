@@ -0,0 +1,153 @@
+"""HashRing / ShardCoordinator：一致性哈希分配、worker 口令、结果校验与失联后的重新分配"""
+
+import asyncio
+import json
+import socket
+from collections import Counter
+
+import pytest
+
+import scrape_asyncio as s
+
+TOKEN = "secret"
+
+
+def test_hash_ring_is_stable_and_balanced():
+    ring = s.HashRing()
+    for name in ("w1", "w2", "w3"):
+        ring.add(name)
+    keys = [s.dedup_key(f"https://example.com/{i}") for i in range(3000)]
+    owners = {key: ring.lookup(key) for key in keys}
+    counts = Counter(owners.values())
+    assert set(counts) == {"w1", "w2", "w3"}
+    assert min(counts.values()) > 600
+
+    # 移除一个节点只影响其名下的键
+    ring.remove("w2")
+    moved = [key for key in keys if owners[key] != "w2" and ring.lookup(key) != owners[key]]
+    assert moved == []
+    assert s.HashRing().lookup("x") is None
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("example.com:9000", ("example.com", 9000)),
+    (":9000", ("127.0.0.1", 9000)),
+])
+def test_parse_address(address, expected):
+    assert s._parse_address(address, "127.0.0.1") == expected
+
+
+@pytest.mark.parametrize("address", ["example.com", "host:port"])
+def test_parse_address_rejects_bad_input(address):
+    with pytest.raises(ValueError):
+        s._parse_address(address, "127.0.0.1")
+
+
+@pytest.mark.parametrize("filename, safe", [
+    ("001_a.md", True),
+    ("articles.jsonl@120", True),
+    ("../escape.md", False),
+    ("/etc/passwd", False),
+    ("", False),
+])
+def test_is_safe_filename(filename, safe):
+    assert s._is_safe_filename(filename) is safe
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def coordinator_port(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(s, "SHARDS", 0)
+    monkeypatch.setattr(s, "SHARD_LISTEN", f"127.0.0.1:{port}")
+    monkeypatch.setattr(s, "SHARD_TOKEN", TOKEN)
+    monkeypatch.setattr(s, "SHARD_TIMEOUT", 5)
+    return port
+
+
+async def fake_worker(port, name, token=TOKEN, filename=None, drop_after=None):
+    """按协议回报成功结果；drop_after 条文章后不回报直接断开"""
+    for _ in range(100):
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            break
+        except OSError:
+            await asyncio.sleep(0.02)
+    s._send_line(writer, {"type": "hello", "name": name, "token": token})
+    received = []
+    while line := await reader.readline():
+        message = json.loads(line)
+        if message["type"] == "article":
+            received.append(message["url"])
+            if drop_after is not None and len(received) >= drop_after:
+                break
+            result = {"index": message["index"], "title": message["title"], "url": message["url"], "success": True,
+                      "filename": filename or f"{message['index']}.md"}
+            s._send_line(writer, {"type": "result", "result": result})
+        elif message["type"] == "end":
+            s._send_line(writer, {"type": "done"})
+            break
+        else:
+            break
+    writer.close()
+    return received
+
+
+def run_coordinator(articles, *workers):
+    async def main():
+        coordinator = s.ShardCoordinator()
+
+        async def source():
+            for article in articles:
+                yield article
+
+        async def consume():
+            return {position: result async for position, result in coordinator.stream(source())}
+
+        consumer = asyncio.create_task(consume())
+        received = []
+        for worker in workers:
+            received.append(await worker)
+        return coordinator, await asyncio.wait_for(consumer, timeout=10), received
+
+    return asyncio.run(main())
+
+
+ARTICLES = [s.Article(i, f"t{i}", f"https://example.com/{i}") for i in range(1, 6)]
+
+
+def test_results_come_back_through_worker(coordinator_port):
+    _, results, received = run_coordinator(ARTICLES, fake_worker(coordinator_port, "w1"))
+    assert sorted(results) == list(range(5))
+    assert all(result.success for result in results.values())
+    assert received[0] == [article.url for article in ARTICLES]
+
+
+def test_unsafe_filename_from_worker_is_rejected(coordinator_port):
+    _, results, _ = run_coordinator(ARTICLES[:1], fake_worker(coordinator_port, "w1", filename="../../x.md"))
+    assert results[0].success is False and results[0].filename is None
+    assert "非法的文件名" in results[0].error
+
+
+def test_orphans_are_reassigned_after_disconnect(coordinator_port):
+    async def later_worker():
+        await asyncio.sleep(0.3)
+        return await fake_worker(coordinator_port, "w2")
+
+    coordinator, results, received = run_coordinator(
+        ARTICLES, fake_worker(coordinator_port, "w1", drop_after=1), later_worker()
+    )
+    assert all(result.success for result in results.values())
+    assert coordinator.reassigned == len(ARTICLES)
+    assert sorted(received[1]) == sorted(article.url for article in ARTICLES)
+
+
+def test_wrong_token_is_refused(coordinator_port, monkeypatch):
+    monkeypatch.setattr(s, "SHARD_TIMEOUT", 0.5)
+    with pytest.raises(ConnectionError, match="没有可用的分片 worker"):
+        run_coordinator(ARTICLES[:1], fake_worker(coordinator_port, "evil", token="guess"))
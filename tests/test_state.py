@@ -0,0 +1,149 @@
+"""RunStateStore：成功状态保留、尝试次数累加、内容变化时间、批量查询、后台线程读写与分批提交、旧版本完成记录迁移"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+
+import scrape_asyncio as s
+
+
+def row(store, url, *columns):
+    return store._conn.execute(
+        f"SELECT {', '.join(columns)} FROM articles WHERE url_hash = ?", (store.url_hash(url),)
+    ).fetchone()
+
+
+def test_created_flag(tmp_path):
+    path = tmp_path / "state.sqlite"
+    store = s.RunStateStore(path)
+    assert store.created
+    store.close()
+    store = s.RunStateStore(path)
+    assert not store.created
+    store.close()
+
+
+def test_failure_then_success_accumulates_attempts(tmp_path):
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    url = "https://example.com/a"
+    asyncio.run(store.record(1, url, False, attempts=3, error="timeout"))
+    assert asyncio.run(store.completed([url])) == {}
+    asyncio.run(store.record(1, url, True, attempts=1, content_hash="h1", filename="001_a.md"))
+    assert row(store, url, "status", "attempts", "error", "filename") == ("success", 4, None, "001_a.md")
+    fetched_at, content_hash, filename = asyncio.run(store.completed([url]))[store.url_hash(url)]
+    assert fetched_at is not None and (content_hash, filename) == ("h1", "001_a.md")
+    store.close()
+
+
+def test_failed_refresh_keeps_success_and_original_file(tmp_path):
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    url = "https://example.com/a"
+    asyncio.run(store.record(1, url, True, attempts=1, content_hash="h1", filename="001_a.md"))
+    before = asyncio.run(store.completed([url]))[store.url_hash(url)]
+    asyncio.run(store.record(1, url, False, attempts=2, error="HTTP 503"))
+    assert row(store, url, "status", "attempts", "error") == ("success", 3, "HTTP 503")
+    assert asyncio.run(store.completed([url]))[store.url_hash(url)] == before
+    store.close()
+
+
+def test_changed_at_only_moves_when_content_hash_differs(tmp_path):
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    url = "https://example.com/a"
+    asyncio.run(store.record(1, url, True, content_hash="h1", filename="001_a.md"))
+    (first,) = row(store, url, "changed_at")
+    asyncio.run(store.record(1, url, True, content_hash="h1"))
+    assert row(store, url, "changed_at") == (first,)
+    asyncio.run(store.record(1, url, True, content_hash="h2"))
+    (changed,) = row(store, url, "changed_at")
+    assert changed > first
+    assert row(store, url, "content_hash", "filename") == ("h2", "001_a.md")
+    store.close()
+
+
+def test_completed_queries_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "STATE_LOOKUP_BATCH", 3)
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    urls = [f"https://example.com/{i}" for i in range(10)]
+    for i, url in enumerate(urls):
+        asyncio.run(store.record(i, url, i % 2 == 0, filename=f"{i}.md" if i % 2 == 0 else None))
+    done = asyncio.run(store.completed(urls + ["https://example.com/missing"]))
+    assert set(done) == {store.url_hash(url) for url in urls[::2]}
+    store.close()
+
+
+def test_find_completed_by_dedup_key(tmp_path):
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    asyncio.run(store.record(1, "https://Example.com/a/?utm_source=x", True, filename="001_a.md"))
+    asyncio.run(store.record(2, "https://example.com/b", False))
+    assert asyncio.run(store.find_completed(s.dedup_key("https://example.com/a"))) == "001_a.md"
+    assert asyncio.run(store.find_completed(s.dedup_key("https://example.com/b"))) is None
+    store.close()
+
+
+def test_close_commits_pending_writes(tmp_path):
+    path = tmp_path / "state.sqlite"
+    store = s.RunStateStore(path)
+    asyncio.run(store.record(1, "https://example.com/a", True, filename="001_a.md"))
+    store.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone() == (1,)
+
+
+def test_migrate_legacy_state_reads_whole_list(tmp_path, monkeypatch):
+    articles = [{"title": f"t{i}", "url": f"https://example.com/{i}"} for i in range(1, 6)]
+    path = tmp_path / "articles.json"
+    path.write_text(json.dumps({"articles": articles}), encoding="utf-8")
+    for name in ("001_t1.md", "004_t4.md", "notes.md"):
+        (tmp_path / name).write_text("x", encoding="utf-8")
+    monkeypatch.setattr(s, "ARTICLES_FILE", str(path))
+    monkeypatch.setattr(s, "OUTPUT_DIR", tmp_path)
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    assert asyncio.run(s.migrate_legacy_state(store)) == 2
+    urls = [article["url"] for article in articles]
+    assert set(asyncio.run(store.completed(urls))) == {store.url_hash(urls[0]), store.url_hash(urls[3])}
+    store.close()
+
+
+def test_queries_and_writes_run_off_the_event_loop(tmp_path, monkeypatch):
+    store = s.RunStateStore(tmp_path / "state.sqlite")
+    threads = []
+    execute = store._record
+
+    def record(*args):
+        threads.append(threading.current_thread().name)
+        execute(*args)
+
+    monkeypatch.setattr(store, "_record", record)
+
+    async def main():
+        await store.record(1, "https://example.com/a", True)
+        return threading.current_thread().name, await store.completed(["https://example.com/a"])
+
+    loop_thread, done = asyncio.run(main())
+    store.close()
+    assert threads[0].startswith("scrape-state") and threads[0] != loop_thread
+    assert list(done) == [store.url_hash("https://example.com/a")]
+
+
+def test_writes_are_committed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "STATE_COMMIT_BATCH", 3)
+    path = tmp_path / "state.sqlite"
+    store = s.RunStateStore(path)
+
+    def committed():
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    async def main():
+        counts = []
+        for i in range(4):
+            await store.record(i, f"https://example.com/{i}", True)
+            counts.append(committed())
+        await store.record_completed([(10, "https://example.com/10")])
+        counts.append(committed())
+        return counts
+
+    assert asyncio.run(main()) == [0, 0, 3, 3, 5]
+    store.close()
+    assert committed() == 5
@@ -0,0 +1,87 @@
+"""Telemetry：Prometheus 文本输出、span 嵌套与追踪文件、/metrics 服务与错误分类"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+
+import scrape_asyncio as s
+
+
+def test_render_counters_histograms_and_gauges():
+    telemetry = s.Telemetry()
+    telemetry.describe("jobs_total", "Jobs done")
+    telemetry.inc("jobs_total", status="ok")
+    telemetry.inc("jobs_total", 2, status="ok")
+    telemetry.observe("latency_seconds", 0.007)
+    telemetry.observe("latency_seconds", 100)
+    telemetry.gauge("queue_depth", lambda: 4)
+    telemetry.gauge("broken", lambda: 1 / 0)
+    lines = telemetry.render().splitlines()
+
+    assert lines[:3] == ["# HELP jobs_total Jobs done", "# TYPE jobs_total counter", 'jobs_total{status="ok"} 3']
+    assert 'latency_seconds_bucket{le="0.005"} 0' in lines
+    assert 'latency_seconds_bucket{le="0.01"} 1' in lines
+    assert 'latency_seconds_bucket{le="60"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "latency_seconds_count 2" in lines
+    assert "queue_depth 4" in lines
+    assert not any(line.startswith("broken") for line in lines)
+
+
+def test_spans_nest_and_are_written_to_trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    telemetry = s.Telemetry()
+
+    async def main():
+        await telemetry.start("", str(path))
+        with telemetry.span("attempt", trace_id="t1", url="https://example.com/") as attributes:
+            with telemetry.span("request"):
+                pass
+            attributes["outcome"] = "success"
+        with pytest.raises(ValueError):
+            with telemetry.span("write"):
+                raise ValueError("disk full")
+        await telemetry.close()
+
+    asyncio.run(main())
+    request, attempt, write = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert (request["name"], request["trace_id"], request["parent_id"]) == ("request", "t1", attempt["span_id"])
+    assert attempt["parent_id"] is None
+    assert attempt["attributes"] == {"url": "https://example.com/", "outcome": "success"}
+    assert (write["status"], write["parent_id"]) == ("error", None)
+    assert write["trace_id"] != "t1"
+    assert 'scrape_stage_seconds_count{stage="attempt"} 1' in telemetry.render()
+
+
+def test_metrics_endpoint():
+    telemetry = s.Telemetry()
+    telemetry.inc("jobs_total")
+
+    async def main():
+        await telemetry.start("127.0.0.1:0", "")
+        try:
+            host, port = telemetry._runner.addresses[0][:2]
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://{host}:{port}/metrics") as response:
+                    return response.status, await response.text()
+        finally:
+            await telemetry.close()
+
+    status, text = asyncio.run(main())
+    assert status == 200
+    assert "jobs_total 1" in text
+
+
+@pytest.mark.parametrize("error, expected", [
+    (s.EmptyContentError("empty"), "empty"),
+    (asyncio.TimeoutError(), "timeout"),
+    (ConnectionResetError(), "connection"),
+    (SimpleNamespace(status_code=503), "http_503"),
+    (PermissionError("read-only"), "io"),
+    (RuntimeError("boom"), "other"),
+])
+def test_error_class(error, expected):
+    assert s._error_class(error) == expected
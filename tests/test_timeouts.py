@@ -0,0 +1,64 @@
+"""请求超时：条目与主机的覆盖值、按截止时间缩短，以及交给 Firecrawl 的 timeout 参数"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import scrape_asyncio as s
+
+
+class FakeClient:
+    def __init__(self):
+        self.kwargs = []
+
+    async def scrape(self, url, **kwargs):
+        self.kwargs.append(kwargs)
+        return SimpleNamespace(markdown="body")
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(s, "GUI_MODE", True)
+    monkeypatch.setattr(s, "OUTPUT_SINK", "files")
+    monkeypatch.setattr(s, "_response_cache", None)
+
+
+def test_request_timeout(monkeypatch):
+    monkeypatch.setattr(s, "REQUEST_TIMEOUT", 60.0)
+    monkeypatch.setattr(s.time, "time", lambda: 100.0)
+    assert s._request_timeout(None, None) == 60.0
+    assert s._request_timeout(120.0, None) == 120.0
+    assert s._request_timeout(120.0, 130.0) == 30.0
+    assert s._request_timeout(None, 100.2) == s.REQUEST_TIMEOUT_MIN  # 截止时间将至仍保留最短超时
+
+
+def test_parse_schedule_timeout():
+    assert s._parse_schedule(1, {"timeout": "45"}, 0.0) == (0.0, None, 45.0)
+    assert s._parse_schedule(1, {"timeout": ""}, 0.0) == (0.0, None, None)
+    for value, message in (("slow", "不是数字"), (0, "必须大于 0")):
+        with pytest.raises(ValueError, match=message):
+            s._parse_schedule(3, {"timeout": value}, 0.0)
+
+
+def test_host_policy_timeout(monkeypatch):
+    monkeypatch.setattr(s, "HOST_LIMITS", '{"example.com": {"timeout": 120}}')
+    default, overrides = s.load_host_policies()
+    assert default.timeout == 0.0
+    assert s._match_host_policy("news.example.com", default, overrides).timeout == 120.0
+    assert s._match_host_policy("other.org", default, overrides) is default
+
+
+def test_timeout_is_sent_to_firecrawl(tmp_path, monkeypatch):
+    monkeypatch.setattr(s, "REQUEST_TIMEOUT", 60.0)
+    client = FakeClient()
+
+    async def main():
+        limiter = s.AdaptiveLimiter(2, 2, 2)
+        default = await s.scrape_single_article(limiter, client, 1, "t1", "https://example.com/1", 2, tmp_path)
+        override = await s.scrape_single_article(limiter, client, 2, "t2", "https://example.com/2", 2, tmp_path, timeout=12.5)
+        return default, override
+
+    default, override = asyncio.run(main())
+    assert default.success and override.success
+    assert [kwargs["timeout"] for kwargs in client.kwargs] == [60000, 12500]
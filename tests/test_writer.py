@@ -0,0 +1,82 @@
+"""ArticleWriter / _AppendSink / _read_article：各输出方式写出后按定位符读回"""
+
+import asyncio
+import json
+
+import pytest
+
+import scrape_asyncio as s
+
+ARTICLES = [
+    (1, "第一篇", "https://example.com/1", "# 正文\n\n含分隔线\n---\n\n之后的内容 ✓"),
+    (2, "Second: B&B", "https://example.com/2", "plain body"),
+    (3, "空正文后的条目", "https://example.com/3", "x" * 10000),
+]
+
+
+def write_all(sink, output_dir):
+    async def main():
+        writer = s.ArticleWriter(sink, 4)
+        locators = [await writer.write(output_dir, *article) for article in ARTICLES]
+        await writer.close()
+        return writer, locators
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("sink", ["files", "jsonl", "archive"])
+def test_round_trip(tmp_path, sink):
+    writer, locators = write_all(sink, tmp_path)
+    for (_, _, _, markdown), locator in zip(ARTICLES, locators):
+        assert s._read_article(tmp_path, locator) == markdown
+        assert writer.exists(tmp_path, locator)
+
+
+def test_files_sink_uses_index_prefixed_names(tmp_path):
+    _, locators = write_all("files", tmp_path)
+    assert locators[0] == "001_第一篇.md"
+    assert locators[1] == "002_Second: B&B.md"
+    content = (tmp_path / locators[0]).read_text(encoding="utf-8")
+    assert content.startswith("# 1. 第一篇\n\n**URL:** https://example.com/1")
+
+
+@pytest.mark.parametrize("sink", ["jsonl", "archive"])
+def test_append_sink_writes_offset_index(tmp_path, sink):
+    writer, locators = write_all(sink, tmp_path)
+    path = writer.sink_path(tmp_path)
+    entries = [json.loads(line) for line in path.with_name(path.name + ".idx").read_text().splitlines()]
+    assert [entry["index"] for entry in entries] == [1, 2, 3]
+    assert [f"{path.name}@{entry['offset']}" for entry in entries] == locators
+    assert entries[-1]["offset"] + entries[-1]["length"] == path.stat().st_size
+
+
+def test_append_sink_appends_across_writers(tmp_path):
+    """第二次运行追加到同一文件，之前的定位符仍然有效"""
+    _, first = write_all("jsonl", tmp_path)
+    _, second = write_all("jsonl", tmp_path)
+    assert first != second
+    for locator in first + second:
+        assert s._read_article(tmp_path, locator)
+
+
+def test_append_sink_direct_zlib(tmp_path):
+    sink = s._AppendSink(tmp_path / "articles.zlib")
+    locators = [sink.write({"index": i, "url": f"u{i}", "markdown": f"body {i}"})[0] for i in range(3)]
+    sink.close()
+    assert [s._read_article(tmp_path, locator) for locator in locators] == ["body 0", "body 1", "body 2"]
+
+
+def test_exists_rejects_offset_past_end(tmp_path):
+    writer, locators = write_all("jsonl", tmp_path)
+    size = writer.sink_path(tmp_path).stat().st_size
+    assert not writer.exists(tmp_path, f"articles.jsonl@{size}")
+    assert not writer.exists(tmp_path, "missing.jsonl@0")
+    assert not writer.exists(tmp_path, "missing.md")
+
+
+def test_read_article_bad_locator_raises_oserror(tmp_path):
+    _, locators = write_all("jsonl", tmp_path)
+    with pytest.raises(OSError):
+        s._read_article(tmp_path, "articles.jsonl@5")  # 指向记录中间
+    with pytest.raises(OSError):
+        s._read_article(tmp_path, "missing.md")